@@ -9,11 +9,11 @@ from alembic import context
 
 from app.config import settings
 from app.db.database import Base
-from app.models import User, Room, Game  # noqa: Import models to register them
+from app.models import User, Room, Game, GameAction  # noqa: Import models to register them
 
 config = context.config
 
-if config.config_file_name is not None:
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
     fileConfig(config.config_file_name)
 
 target_metadata = Base.metadata
@@ -0,0 +1,95 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=50), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=True),
+        sa.Column('hashed_password', sa.String(length=255), nullable=True),
+        sa.Column('display_name', sa.String(length=100), nullable=False),
+        sa.Column('avatar_url', sa.String(length=500), nullable=True),
+        sa.Column('is_guest', sa.Boolean(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email'),
+    )
+    op.create_index('ix_users_id', 'users', ['id'], unique=False)
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+
+    op.create_table(
+        'rooms',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('code', sa.String(length=6), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('host_id', sa.Integer(), nullable=False),
+        sa.Column('game_type', sa.String(length=50), nullable=False),
+        sa.Column('max_players', sa.Integer(), nullable=False),
+        sa.Column('min_players', sa.Integer(), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('WAITING', 'IN_GAME', 'FINISHED', name='roomstatus'),
+            nullable=False,
+        ),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['host_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_rooms_id', 'rooms', ['id'], unique=False)
+    op.create_index('ix_rooms_code', 'rooms', ['code'], unique=True)
+
+    op.create_table(
+        'games',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('room_id', sa.Integer(), nullable=False),
+        sa.Column('game_type', sa.String(length=50), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('SETUP', 'IN_PROGRESS', 'FINISHED', name='gamestatus'),
+            nullable=False,
+        ),
+        sa.Column('current_round', sa.Integer(), nullable=False),
+        sa.Column('state', sa.JSON(), nullable=True),
+        sa.Column('players', sa.JSON(), nullable=True),
+        sa.Column('winner_team', sa.String(length=50), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['room_id'], ['rooms.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_games_id', 'games', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_games_id', table_name='games')
+    op.drop_table('games')
+    op.drop_index('ix_rooms_code', table_name='rooms')
+    op.drop_index('ix_rooms_id', table_name='rooms')
+    op.drop_table('rooms')
+    op.drop_index('ix_users_username', table_name='users')
+    op.drop_index('ix_users_id', table_name='users')
+    op.drop_table('users')
+    sa.Enum(name='gamestatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='roomstatus').drop(op.get_bind(), checkfirst=True)
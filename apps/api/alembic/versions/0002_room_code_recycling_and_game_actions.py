@@ -0,0 +1,55 @@
+"""room code recycling and game actions
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Room codes only need to be unique among live rooms
+    op.drop_index('ix_rooms_code', table_name='rooms')
+    op.create_index('ix_rooms_code', 'rooms', ['code'], unique=False)
+    op.create_index(
+        'ix_rooms_code_live',
+        'rooms',
+        ['code'],
+        unique=True,
+        postgresql_where=sa.text("status != 'FINISHED'"),
+    )
+
+    op.create_table(
+        'game_actions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('game_id', sa.Integer(), nullable=False),
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('action', sa.String(length=50), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['game_id'], ['games.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_game_actions_game_seq', 'game_actions', ['game_id', 'seq'], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_game_actions_game_seq', table_name='game_actions')
+    op.drop_table('game_actions')
+    op.drop_index('ix_rooms_code_live', table_name='rooms')
+    op.drop_index('ix_rooms_code', table_name='rooms')
+    op.create_index('ix_rooms_code', 'rooms', ['code'], unique=True)
@@ -0,0 +1,64 @@
+"""guest last seen and purge indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Users backfilled per transaction
+BACKFILL_BATCH = 10000
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('last_seen_at', sa.DateTime(), nullable=True))
+
+    # users and rooms can be large: backfill and build the indexes outside the
+    # migration transaction, without long locks or blocking writes
+    with op.get_context().autocommit_block():
+        # Existing guests count as seen when they were last updated. Keyed
+        # batches, each its own transaction, instead of one rewrite of every guest.
+        conn = op.get_bind()
+        max_id = conn.execute(sa.text("SELECT max(id) FROM users")).scalar() or 0
+        for start in range(0, max_id + 1, BACKFILL_BATCH):
+            conn.execute(
+                sa.text(
+                    "UPDATE users SET last_seen_at = updated_at "
+                    "WHERE id >= :start AND id < :end AND is_guest AND last_seen_at IS NULL"
+                ),
+                {"start": start, "end": start + BACKFILL_BATCH},
+            )
+
+        op.create_index(
+            'ix_users_guest_last_seen',
+            'users',
+            ['last_seen_at'],
+            unique=False,
+            postgresql_where=sa.text('is_guest'),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_rooms_host_id',
+            'rooms',
+            ['host_id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rooms_host_id', table_name='rooms')
+    op.drop_index('ix_users_guest_last_seen', table_name='users')
+    op.drop_column('users', 'last_seen_at')
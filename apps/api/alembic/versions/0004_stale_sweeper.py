@@ -0,0 +1,46 @@
+"""abandoned game status and stale sweeper indexes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE gamestatus ADD VALUE IF NOT EXISTS 'ABANDONED'")
+        op.create_index(
+            'ix_rooms_live_updated_at',
+            'rooms',
+            ['updated_at'],
+            unique=False,
+            postgresql_where=sa.text("status != 'FINISHED'"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_games_open_created_at',
+            'games',
+            ['created_at'],
+            unique=False,
+            postgresql_where=sa.text("status IN ('SETUP', 'IN_PROGRESS')"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_games_open_created_at', table_name='games')
+    op.drop_index('ix_rooms_live_updated_at', table_name='rooms')
+    # Postgres can't drop an enum value; abandoned games are kept as finished
+    op.execute("UPDATE games SET status = 'FINISHED' WHERE status = 'ABANDONED'")
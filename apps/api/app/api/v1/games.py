@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
@@ -6,6 +7,7 @@ from app.db.database import get_db
 from app.models.game import Game, GameStatus
 from app.models.room import Room, RoomStatus
 from app.schemas.game import GameCreate, GameResponse
+from app.services.replay import stream_game_replay
 
 router = APIRouter()
 
@@ -44,12 +46,37 @@ async def get_game(game_id: int, db: AsyncSession = Depends(get_db)):
     return game
 
 
+@router.get("/{game_id}/replay")
+async def replay_game(
+    game_id: int,
+    speed: float = Query(0, ge=0, le=64),
+    format: str = Query("sse", pattern="^(sse|jsonl)$"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Stream a finished game's actions as server-sent events or JSON lines"""
+    result = await db.execute(select(Game.status).where(Game.id == game_id))
+    game_status = result.scalar_one_or_none()
+    if game_status is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Game not found",
+        )
+    if game_status != GameStatus.FINISHED:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Game is not finished",
+        )
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(stream_game_replay(game_id, speed, format), media_type=media_type)
+
+
 @router.get("/room/{room_id}/current", response_model=GameResponse)
 async def get_current_game(room_id: int, db: AsyncSession = Depends(get_db)):
     result = await db.execute(
         select(Game)
         .where(Game.room_id == room_id)
-        .where(Game.status != GameStatus.FINISHED)
+        .where(Game.status.in_((GameStatus.SETUP, GameStatus.IN_PROGRESS)))
         .order_by(Game.created_at.desc())
     )
     game = result.scalar_first()
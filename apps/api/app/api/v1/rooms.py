@@ -1,40 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from typing import Optional
 
+from app.core.security import get_current_user_id
 from app.db.database import get_db
+from app.db.redis import redis_client
 from app.models.room import Room, RoomStatus
 from app.schemas.room import RoomCreate, RoomResponse, RoomJoin
-from app.core.security import generate_room_code
+from app.services.chat import CHAT_HISTORY_PAGE_MAX, get_chat_history
+from app.services.room_codes import allocate_room_code, release_room_code
 
 router = APIRouter()
 
 
+def _select_room_by_code(code: str):
+    # Codes are recycled from finished rooms; the newest room owns the code
+    return (
+        select(Room)
+        .where(Room.code == code.upper())
+        .order_by(Room.created_at.desc())
+        .limit(1)
+    )
+
+
 @router.post("/", response_model=RoomResponse, status_code=status.HTTP_201_CREATED)
 async def create_room(
     room_data: RoomCreate,
     host_id: int,  # TODO: Get from auth token
     db: AsyncSession = Depends(get_db),
 ):
-    code = generate_room_code()
-    # Ensure unique code
-    while True:
-        result = await db.execute(select(Room).where(Room.code == code))
-        if not result.scalar_one_or_none():
-            break
-        code = generate_room_code()
-
-    room = Room(
-        code=code,
-        name=room_data.name,
-        host_id=host_id,
-        game_type=room_data.game_type,
-        max_players=room_data.max_players,
-        min_players=room_data.min_players,
-    )
-    db.add(room)
-    await db.flush()
-    await db.refresh(room)
+    code = await allocate_room_code(db)
+
+    try:
+        room = Room(
+            code=code,
+            name=room_data.name,
+            host_id=host_id,
+            game_type=room_data.game_type,
+            max_players=room_data.max_players,
+            min_players=room_data.min_players,
+        )
+        db.add(room)
+        await db.flush()
+        await db.refresh(room)
+    except Exception:
+        # Otherwise the code stays reserved forever
+        await release_room_code(code)
+        raise
     return room
 
 
@@ -52,8 +65,8 @@ async def get_room(room_id: int, db: AsyncSession = Depends(get_db)):
 
 @router.get("/code/{code}", response_model=RoomResponse)
 async def get_room_by_code(code: str, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Room).where(Room.code == code.upper()))
-    room = result.scalar_one_or_none()
+    result = await db.execute(_select_room_by_code(code))
+    room = result.scalars().first()
     if not room:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -62,10 +75,33 @@ async def get_room_by_code(code: str, db: AsyncSession = Depends(get_db)):
     return room
 
 
+@router.get("/code/{code}/chat", response_model=dict)
+async def get_room_chat(
+    code: str,
+    before: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=CHAT_HISTORY_PAGE_MAX),
+    user_id: int = Depends(get_current_user_id),
+):
+    # Same rule as the socket event: only players in the room read its chat
+    code = code.upper()
+    if not await redis_client.is_user_in_room(code, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not in this room",
+        )
+    try:
+        return await get_chat_history(code, before=before, limit=limit)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+
 @router.post("/join", response_model=RoomResponse)
 async def join_room(room_join: RoomJoin, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Room).where(Room.code == room_join.code.upper()))
-    room = result.scalar_one_or_none()
+    result = await db.execute(_select_room_by_code(room_join.code))
+    room = result.scalars().first()
     if not room:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -88,4 +124,7 @@ async def delete_room(room_id: int, db: AsyncSession = Depends(get_db)):
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Room not found",
         )
+    code = room.code
     await db.delete(room)
+    await db.commit()
+    await release_room_code(code)
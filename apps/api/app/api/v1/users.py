@@ -1,53 +1,75 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.db.database import get_db
 from app.models.user import User
-from app.schemas.user import UserCreate, UserResponse, UserUpdate, GuestUserCreate
-from app.core.security import get_password_hash, generate_guest_username, create_access_token
+from app.schemas.user import UserCreate, UserLogin, UserResponse, UserUpdate, GuestUserCreate
+from app.core.security import (
+    get_password_hash_async,
+    verify_password_async,
+    create_access_token,
+)
+from app.services.guests import create_guest
 
 router = APIRouter()
 
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def create_user(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
-    # Check if username exists
-    result = await db.execute(select(User).where(User.username == user_data.username))
-    if result.scalar_one_or_none():
+    hashed_password = None
+    if user_data.password:
+        hashed_password = await get_password_hash_async(user_data.password)
+
+    # One unique-index probe: a taken username or email inserts nothing
+    user = await db.scalar(
+        pg_insert(User)
+        .values(
+            username=user_data.username,
+            email=user_data.email,
+            display_name=user_data.display_name,
+            hashed_password=hashed_password,
+            is_guest=user_data.is_guest,
+        )
+        .on_conflict_do_nothing()
+        .returning(User)
+    )
+    if user is None:
+        taken = await db.scalar(select(User.id).where(User.username == user_data.username))
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered",
+            detail="Username already registered" if taken else "Email already registered",
         )
-
-    user = User(
-        username=user_data.username,
-        email=user_data.email,
-        display_name=user_data.display_name,
-        hashed_password=get_password_hash(user_data.password) if user_data.password else None,
-        is_guest=user_data.is_guest,
-    )
-    db.add(user)
-    await db.flush()
-    await db.refresh(user)
     return user
 
 
+@router.post("/login", response_model=dict)
+async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(User).where(User.username == credentials.username))
+    user = result.scalar_one_or_none()
+
+    valid = False
+    if user and user.hashed_password and user.is_active:
+        valid = await verify_password_async(credentials.password, user.hashed_password)
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+        )
+
+    token = create_access_token({"sub": str(user.id), "username": user.username})
+    return {
+        "user": UserResponse.model_validate(user),
+        "access_token": token,
+        "token_type": "bearer",
+    }
+
+
 @router.post("/guest", response_model=dict)
-async def create_guest_user(
-    guest_data: GuestUserCreate = None,
-    db: AsyncSession = Depends(get_db)
-):
-    username = generate_guest_username()
-    display_name = guest_data.display_name if guest_data and guest_data.display_name else username
-    user = User(
-        username=username,
-        display_name=display_name,
-        is_guest=True,
-    )
-    db.add(user)
-    await db.flush()
-    await db.refresh(user)
+async def create_guest_user(guest_data: GuestUserCreate = None):
+    # Batched with concurrent sign-ups into one INSERT ... RETURNING
+    user = await create_guest(guest_data.display_name if guest_data else None)
 
     token = create_access_token({"sub": str(user.id), "username": user.username})
     return {
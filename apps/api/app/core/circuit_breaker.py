@@ -0,0 +1,74 @@
+"""
+Circuit breaker for calls to an external dependency (e.g. Redis).
+
+After `failure_threshold` consecutive failures the breaker opens and calls
+are rejected immediately instead of each waiting for a timeout. Once
+`reset_timeout` seconds have passed a single trial call is let through
+(half-open); its outcome closes or re-opens the breaker.
+"""
+
+import time
+
+from app.core.metrics import metrics
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+    # Numeric values for the metrics gauge
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 5.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    @property
+    def is_closed(self) -> bool:
+        return self.state == self.CLOSED
+
+    def allow(self) -> bool:
+        """Whether a call may go through right now"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        metrics.inc(f"{self.name}.breaker.rejected")
+        return False
+
+    def record_success(self):
+        if self._state != self.CLOSED:
+            print(f"[{self.name}] Circuit closed")
+        self.failures = 0
+        self._state = self.CLOSED
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._state == self.HALF_OPEN or (
+            self._state == self.CLOSED and self.failures >= self.failure_threshold
+        ):
+            print(f"[{self.name}] Circuit opened after {self.failures} failures")
+            metrics.inc(f"{self.name}.breaker.opened")
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def record_cancelled(self):
+        """A call was cancelled: no verdict, but a half-open trial must free its slot"""
+        self._trial_in_flight = False
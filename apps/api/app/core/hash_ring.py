@@ -0,0 +1,46 @@
+"""
+Consistent hash ring.
+
+Each node is placed on the ring at `virtual_nodes` points, so keys spread
+evenly and adding or removing a node only moves the keys next to its
+points (about 1/N of them) instead of reshuffling everything.
+"""
+
+import bisect
+import hashlib
+from typing import Iterable, Optional
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    def __init__(self, nodes: Iterable[str] = (), virtual_nodes: int = 64):
+        self.virtual_nodes = virtual_nodes
+        self.nodes: frozenset[str] = frozenset()
+        self._points: list[int] = []
+        self._owners: list[str] = []
+        self.set_nodes(nodes)
+
+    def set_nodes(self, nodes: Iterable[str]) -> bool:
+        """Replace the node set. Returns True if it changed."""
+        nodes = frozenset(nodes)
+        if nodes == self.nodes:
+            return False
+
+        ring = sorted(
+            (_hash(f"{node}#{i}"), node)
+            for node in nodes
+            for i in range(self.virtual_nodes)
+        )
+        self.nodes = nodes
+        self._points = [point for point, _ in ring]
+        self._owners = [node for _, node in ring]
+        return True
+
+    def owner(self, key) -> Optional[str]:
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, _hash(str(key))) % len(self._points)
+        return self._owners[index]
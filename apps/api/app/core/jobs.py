@@ -0,0 +1,159 @@
+"""
+In-process background jobs.
+
+Socket handlers hand off side effects (DB writes, Redis cleanup, archiving)
+that the next event doesn't need to wait for. Jobs with the same key (a
+room or game) run one at a time in submission order; different keys run
+concurrently on a fixed number of workers. Failed jobs are retried with
+exponential backoff.
+
+When `max_pending` jobs are waiting, submit() waits for room instead of
+growing the queue without bound, so a slow DB pushes back on the handlers
+rather than exhausting memory.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+from app.core.metrics import metrics
+
+
+class _Job:
+    __slots__ = ("label", "func", "args", "submitted")
+
+    def __init__(self, label: str, func: Callable[..., Awaitable[None]], args: tuple):
+        self.label = label
+        self.func = func
+        self.args = args
+        self.submitted = time.perf_counter()
+
+
+class JobQueue:
+    def __init__(
+        self,
+        name: str,
+        concurrency: int = 8,
+        max_pending: int = 10000,
+        max_retries: int = 3,
+        retry_delay: float = 0.5,
+    ):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        self._keys: dict[str, deque[_Job]] = {}  # Jobs waiting per key
+        self._ready: Optional[asyncio.Queue] = None  # Keys with a job to run, one entry per key
+        self._workers: list[asyncio.Task] = []
+        self._pending = 0
+        self._running = 0
+        self._space: Optional[asyncio.Condition] = None
+        self._idle: Optional[asyncio.Event] = None
+
+        metrics.register_gauge(f"jobs.{name}.pending", lambda: self._pending)
+        metrics.register_gauge(f"jobs.{name}.running", lambda: self._running)
+        metrics.register_gauge(f"jobs.{name}.keys", lambda: len(self._keys))
+        metrics.register_gauge(f"jobs.{name}.oldest_wait_ms", self._oldest_wait_ms)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _start(self):
+        self._ready = asyncio.Queue()
+        self._space = asyncio.Condition()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def submit(self, key: str, func: Callable[..., Awaitable[None]], *args, label: str = None):
+        """Queue func(*args) behind the other jobs of `key`"""
+        if not self._workers:
+            self._start()
+
+        if self._pending >= self.max_pending:
+            metrics.inc(f"jobs.{self.name}.throttled")
+            async with self._space:
+                await self._space.wait_for(lambda: self._pending < self.max_pending)
+
+        job = _Job(label or getattr(func, "__name__", "job"), func, args)
+        self._pending += 1
+        self._idle.clear()
+        metrics.inc(f"jobs.{self.name}.submitted")
+
+        queue = self._keys.get(key)
+        if queue is None:
+            self._keys[key] = deque([job])
+            self._ready.put_nowait(key)
+        else:
+            # The key is already scheduled or running; its worker picks this up next
+            queue.append(job)
+
+    async def _work(self):
+        while True:
+            key = await self._ready.get()
+            queue = self._keys[key]
+            job = queue[0]
+            self._running += 1
+            metrics.observe(f"jobs.{self.name}.wait", time.perf_counter() - job.submitted)
+            try:
+                await self._run(job)
+            finally:
+                self._running -= 1
+                queue.popleft()
+                if queue:
+                    # Back of the line, so one busy key can't starve the others
+                    self._ready.put_nowait(key)
+                else:
+                    del self._keys[key]
+                await self._release()
+
+    async def _run(self, job: _Job):
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                await job.func(*job.args)
+                metrics.observe(f"jobs.{self.name}.run", time.perf_counter() - started)
+                metrics.inc(f"jobs.{self.name}.completed")
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt == self.max_retries:
+                    metrics.inc(f"jobs.{self.name}.failed")
+                    print(f"[jobs] {job.label} failed after {attempt + 1} attempts: {e}")
+                    return
+                metrics.inc(f"jobs.{self.name}.retried")
+                delay = self.retry_delay * 2 ** attempt
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+
+    async def _release(self):
+        self._pending -= 1
+        if self._pending == 0:
+            self._idle.set()
+        async with self._space:
+            self._space.notify()
+
+    def _oldest_wait_ms(self) -> float:
+        if not self._keys:
+            return 0.0
+        oldest = min(queue[0].submitted for queue in self._keys.values())
+        return round((time.perf_counter() - oldest) * 1000, 3)
+
+    async def drain(self, timeout: float):
+        """Wait up to `timeout` seconds for queued jobs, then stop the workers"""
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            print(f"[jobs] Dropping {self._pending} {self.name} jobs still queued at shutdown")
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+        self._keys.clear()
+        self._pending = 0
@@ -0,0 +1,82 @@
+"""
+Lightweight in-process metrics (counters, gauges and timings).
+Exposed as JSON on GET /metrics.
+"""
+
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Callable
+
+
+class Timing:
+    """Count, total and max of observed durations, plus a recent sample for percentiles"""
+
+    def __init__(self, sample_size: int = 1024):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._recent: deque[float] = deque(maxlen=sample_size)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self._recent.append(seconds)
+
+    def percentile(self, p: float) -> float:
+        if not self._recent:
+            return 0.0
+        ordered = sorted(self._recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50) * 1000, 3),
+            "p99_ms": round(self.percentile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self._counters: dict[str, int] = defaultdict(int)
+        self._gauges: dict[str, float] = {}
+        self._timings: dict[str, Timing] = defaultdict(Timing)
+        self._gauge_callbacks: dict[str, Callable[[], float]] = {}
+
+    def inc(self, name: str, value: int = 1):
+        self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float):
+        self._gauges[name] = value
+
+    def register_gauge(self, name: str, callback: Callable[[], float]):
+        """Gauge whose value is read from `callback` when a snapshot is taken"""
+        self._gauge_callbacks[name] = callback
+
+    def observe(self, name: str, seconds: float):
+        self._timings[name].observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def snapshot(self) -> dict:
+        return {
+            "counters": dict(self._counters),
+            "gauges": {
+                **self._gauges,
+                **{name: callback() for name, callback in self._gauge_callbacks.items()},
+            },
+            "timings": {name: t.to_dict() for name, t in self._timings.items()},
+        }
+
+
+metrics = Metrics()
@@ -0,0 +1,208 @@
+"""
+Rate limiting helpers.
+
+- TokenBucketLimiter: in-process buckets (socket events such as chat)
+- RateLimitMiddleware: per-route sliding windows for the REST API, shared
+  by all workers through Redis, with SlidingWindowLimiter as the local
+  fallback while Redis is unavailable
+"""
+
+import json
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app.core.metrics import metrics
+
+
+@dataclass
+class TokenBucket:
+    rate: float  # Tokens added per second
+    capacity: float  # Maximum burst
+    tokens: float = 0.0
+    updated_at: float = field(default_factory=time.monotonic)
+
+    def consume(self, amount: float = 1.0) -> bool:
+        """Take tokens from the bucket. Returns False if not enough are left."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens < amount:
+            return False
+        self.tokens -= amount
+        return True
+
+
+class TokenBucketLimiter:
+    """One token bucket per key (e.g. per user), with a bounded number of keys"""
+
+    def __init__(self, rate: float, capacity: int, max_keys: int = 10000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def allow(self, key: str) -> bool:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate=self.rate, capacity=self.capacity, tokens=self.capacity)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                # Least recently used buckets have refilled long ago
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.consume()
+
+    def reset(self, key: str):
+        self._buckets.pop(key, None)
+
+
+class SlidingWindowLimiter:
+    """At most `limit` hits per `window` seconds per key, kept in memory"""
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._hits: OrderedDict[str, deque[float]] = OrderedDict()
+
+    def hit(self, key: str, limit: int, window: float) -> tuple[bool, float]:
+        """Count a hit. Returns (allowed, seconds until the next hit is allowed)."""
+        now = time.monotonic()
+        hits = self._hits.get(key)
+        if hits is None:
+            hits = self._hits[key] = deque()
+            if len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+        else:
+            self._hits.move_to_end(key)
+
+        while hits and hits[0] <= now - window:
+            hits.popleft()
+        if len(hits) >= limit:
+            return False, hits[0] + window - now
+        hits.append(now)
+        return True, 0.0
+
+
+@dataclass
+class RateLimitRule:
+    method: str
+    path: str  # Exact path, or a prefix ending in "*"
+    limit: int
+    window: float  # Seconds
+    scope: str = "ip"  # "ip", or "user" (the bearer token's user; IP without one)
+
+    @classmethod
+    def parse(cls, route: str, spec: str) -> "RateLimitRule":
+        """From ("POST /api/v1/users/guest", "<limit>/<seconds>[/ip|user]")"""
+        method, path = route.split(" ", 1)
+        limit, window, *scope = spec.split("/")
+        rule = cls(method.upper(), path.strip(), int(limit), float(window), *scope)
+        if rule.scope not in ("ip", "user"):
+            raise ValueError(f"Unknown rate limit scope {rule.scope!r} for {route}")
+        return rule
+
+    def matches(self, method: str, path: str) -> bool:
+        if method != self.method:
+            return False
+        if self.path.endswith("*"):
+            return path.startswith(self.path[:-1])
+        return path == self.path
+
+
+class RateLimitMiddleware:
+    """
+    Rejects requests over their route's limit with 429 before the app (and
+    its DB session) sees them. One Redis round trip per limited request;
+    requests on routes without a rule pass straight through.
+    """
+
+    def __init__(self, app, rules: list[RateLimitRule], trust_forwarded: bool = False):
+        self.app = app
+        self.rules = rules
+        self.trust_forwarded = trust_forwarded
+        self.fallback = SlidingWindowLimiter()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.rules:
+            return await self.app(scope, receive, send)
+
+        rule = next((r for r in self.rules if r.matches(scope["method"], scope["path"])), None)
+        if rule is None:
+            return await self.app(scope, receive, send)
+
+        key = f"{rule.method}:{rule.path}:{self._client_key(scope, rule)}"
+        allowed, retry_after = await self._hit(key, rule)
+        if allowed:
+            metrics.inc("rate_limit.allowed")
+            return await self.app(scope, receive, send)
+
+        metrics.inc("rate_limit.limited")
+        await self._reject(send, retry_after)
+
+    async def _hit(self, key: str, rule: RateLimitRule) -> tuple[bool, float]:
+        from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+
+        from app.db.redis import redis_client
+
+        try:
+            allowed, retry_after_ms = await redis_client.hit_rate_limit(
+                key, rule.limit, int(rule.window * 1000)
+            )
+            return allowed, retry_after_ms / 1000
+        except (RedisConnectionError, RedisTimeoutError, OSError):
+            # Per worker, so the effective limit is multiplied by the worker count
+            metrics.inc("rate_limit.fallback")
+            return self.fallback.hit(key, rule.limit, rule.window)
+
+    def _client_key(self, scope, rule: RateLimitRule) -> str:
+        headers = dict(scope["headers"])
+        if rule.scope == "user":
+            user_id = self._token_user(headers.get(b"authorization"))
+            if user_id:
+                return f"user:{user_id}"
+
+        if self.trust_forwarded:
+            # Only the hop our proxy added is trustworthy: X-Real-IP is set by it, and
+            # it appends the address it saw to X-Forwarded-For (entries left of it
+            # come from the client)
+            real_ip = headers.get(b"x-real-ip", b"").decode("latin-1").strip()
+            if real_ip:
+                return f"ip:{real_ip}"
+            forwarded = headers.get(b"x-forwarded-for", b"").decode("latin-1").split(",")[-1].strip()
+            if forwarded:
+                return f"ip:{forwarded}"
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    @staticmethod
+    def _token_user(authorization: Optional[bytes]) -> Optional[str]:
+        if not authorization or not authorization.lower().startswith(b"bearer "):
+            return None
+        from fastapi import HTTPException
+
+        from app.core.security import decode_access_token_cached
+
+        try:
+            return str(decode_access_token_cached(authorization[7:].decode("latin-1"))["sub"])
+        except (HTTPException, KeyError):
+            return None
+
+    @staticmethod
+    async def _reject(send, retry_after: float):
+        body = json.dumps({"detail": "Too many requests"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, int(retry_after + 0.999))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def rate_limit_rules(config: dict[str, str]) -> list[RateLimitRule]:
+    return [RateLimitRule.parse(route, spec) for route, spec in config.items()]
@@ -1,8 +1,14 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
+import asyncio
+import hashlib
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import HTTPException, status
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 import secrets
 
 from app.config import settings
@@ -13,6 +19,17 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
+# bcrypt is deliberately slow, so it runs on a small dedicated pool
+# instead of the event loop that serves sockets.
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="password-hash",
+)
+_password_jobs_pending = 0
+
+# Verified token claims keyed by token hash (LRU, entries dropped at expiry)
+_token_claims_cache: "OrderedDict[bytes, dict]" = OrderedDict()
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -22,6 +39,36 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def _run_password_job(func, *args):
+    """Run a bcrypt call on the password pool, shedding load when it is saturated"""
+    global _password_jobs_pending
+    if _password_jobs_pending >= settings.password_hash_max_pending:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again",
+            headers={"Retry-After": "1"},
+        )
+
+    _password_jobs_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, func, *args)
+    finally:
+        _password_jobs_pending -= 1
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_password_job(get_password_hash, password)
+
+
+def shutdown_password_executor():
+    _password_executor.shutdown(wait=False, cancel_futures=True)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -44,6 +91,44 @@ def decode_access_token(token: str) -> dict:
         )
 
 
+def decode_access_token_cached(token: str) -> dict:
+    """
+    Decode a token, reusing claims verified earlier.
+    Lets reconnect storms skip the HMAC check and JSON decoding.
+    """
+    if settings.token_cache_size <= 0:
+        return decode_access_token(token)
+
+    key = hashlib.sha256(token.encode()).digest()
+    claims = _token_claims_cache.get(key)
+    if claims is not None:
+        if claims.get("exp", 0) > time.time():
+            _token_claims_cache.move_to_end(key)
+            return claims
+        del _token_claims_cache[key]
+
+    claims = decode_access_token(token)
+    _token_claims_cache[key] = claims
+    if len(_token_claims_cache) > settings.token_cache_size:
+        _token_claims_cache.popitem(last=False)
+    return claims
+
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+def get_current_user_id(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+) -> int:
+    """Route dependency: the user ID of the request's bearer token"""
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+        )
+    return int(decode_access_token_cached(credentials.credentials)["sub"])
+
+
 def generate_room_code() -> str:
     return secrets.token_hex(3).upper()
 
@@ -0,0 +1,9 @@
+"""
+Identity of this API worker process (game ownership, presence heartbeats).
+"""
+
+import os
+import socket
+import uuid
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
@@ -1,7 +1,11 @@
+import time
+
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.config import settings
+from app.core.metrics import metrics
 
 
 # Convert postgresql:// to postgresql+asyncpg://
@@ -9,13 +13,36 @@ database_url = settings.database_url.replace(
     "postgresql://", "postgresql+asyncpg://"
 )
 
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long callers wait for a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe("db.pool.checkout_wait", time.perf_counter() - started)
+
+
 engine = create_async_engine(
     database_url,
     echo=settings.api_debug,
-    pool_size=5,
-    max_overflow=10,
+    poolclass=InstrumentedPool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    # asyncpg prepared statements are cached per connection, so repeated
+    # lookups like select(User).where(User.id == ...) skip the parse/plan step
+    connect_args={"prepared_statement_cache_size": settings.db_statement_cache_size},
 )
 
+metrics.register_gauge("db.pool.size", lambda: engine.pool.size())
+metrics.register_gauge("db.pool.in_use", lambda: engine.pool.checkedout())
+metrics.register_gauge("db.pool.overflow", lambda: max(engine.pool.overflow(), 0))
+metrics.register_gauge("db.pool.idle", lambda: engine.pool.checkedin())
+
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
@@ -0,0 +1,136 @@
+"""
+Schema migrations.
+
+    python -m app.db.migrate            # upgrade the database to head
+    python -m app.db.migrate --check    # exit 1 unless the database is at head
+
+Databases created by the old create_all startup (tables but no
+alembic_version) are stamped at the initial revision before upgrading.
+
+The development startup (SCHEMA_MODE=create_all) goes through create_schema():
+an empty database gets the current models' tables and is stamped at head, so
+later migrations apply on top of it; any other database is upgraded to head.
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+from app.db.database import Base, engine
+
+
+API_ROOT = Path(__file__).resolve().parents[2]
+INITIAL_REVISION = "0001"
+
+
+def _alembic_config(configure_logger: bool = True):
+    from alembic.config import Config
+
+    config = Config(str(API_ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(API_ROOT / "alembic"))
+    # Inside the server, keep uvicorn's logging configuration
+    config.attributes["configure_logger"] = configure_logger
+    return config
+
+
+def get_head_revision() -> str:
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(_alembic_config()).get_current_head()
+
+
+async def get_current_revision() -> Optional[str]:
+    """Read the database revision (a single query). None if never migrated."""
+    try:
+        async with engine.connect() as conn:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+            return result.scalar_one_or_none()
+    except ProgrammingError:
+        return None
+
+
+async def check_schema_revision():
+    """Fail fast if the database isn't migrated to the revision this code expects"""
+    current = await get_current_revision()
+    head = get_head_revision()
+    if current != head:
+        raise RuntimeError(
+            f"Database schema is at revision {current}, expected {head}. "
+            "Run `python -m app.db.migrate` first."
+        )
+
+
+async def _has_legacy_schema() -> bool:
+    async with engine.connect() as conn:
+        result = await conn.execute(text("SELECT to_regclass('users') IS NOT NULL"))
+        return bool(result.scalar())
+
+
+async def _inspect() -> tuple[Optional[str], bool]:
+    current = await get_current_revision()
+    legacy = current is None and await _has_legacy_schema()
+    await engine.dispose()
+    return current, legacy
+
+
+def _upgrade(legacy: bool, configure_logger: bool = True):
+    from alembic import command
+
+    config = _alembic_config(configure_logger)
+    if legacy:
+        print(f"[migrate] Existing schema without revision, stamping {INITIAL_REVISION}")
+        command.stamp(config, INITIAL_REVISION)
+    command.upgrade(config, "head")
+
+
+def _stamp_head():
+    from alembic import command
+
+    command.stamp(_alembic_config(configure_logger=False), "head")
+
+
+def upgrade():
+    _, legacy = asyncio.run(_inspect())
+    _upgrade(legacy)
+
+
+async def create_schema():
+    """Create the current schema on an empty database, otherwise migrate to head"""
+    import app.models  # noqa: F401 - register every table on Base.metadata
+
+    current = await get_current_revision()
+    head = get_head_revision()
+    if current == head:
+        return
+    # Alembic's env.py runs its own event loop, so it gets a thread
+    if current is None and not await _has_legacy_schema():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await asyncio.to_thread(_stamp_head)
+        print(f"[migrate] Created schema, stamped {head}")
+    else:
+        await asyncio.to_thread(_upgrade, current is None, False)
+        print(f"[migrate] Upgraded schema from {current} to {head}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Database migrations")
+    parser.add_argument("--check", action="store_true", help="only check the revision")
+    args = parser.parse_args()
+
+    if args.check:
+        current, _ = asyncio.run(_inspect())
+        head = get_head_revision()
+        print(f"current={current} head={head}")
+        sys.exit(0 if current == head else 1)
+
+    upgrade()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,283 @@
 import redis.asyncio as redis
-from typing import Optional
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+from collections import OrderedDict
+from typing import Any, Optional
+import asyncio
+import functools
 import json
+import os
 import time
 
 from app.config import settings
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.metrics import metrics
+
+
+ACTIVE_GAMES_KEY = "games:active"
+# Live workers, scored by last heartbeat (game ownership and presence cleanup)
+WORKERS_KEY = "workers"
+PRESENCE_CHANNEL = "presence:invalidate"
+ROOM_CODES_FREE_KEY = "room_codes:free"
+ROOM_CODES_USED_KEY = "room_codes:used"
+# Last activity time of each game / room (ZSETs scored by unix time, for the stale sweeper)
+GAMES_ACTIVITY_KEY = "games:activity"
+ROOMS_ACTIVITY_KEY = "rooms:activity"
+
+# Pop a random free code and mark it used in one round trip.
+# Returns {code or false, remaining free codes}.
+_RESERVE_ROOM_CODE_LUA = """
+local code = redis.call('SPOP', KEYS[1])
+if code then
+    redis.call('SADD', KEYS[2], code)
+end
+return {code, redis.call('SCARD', KEYS[1])}
+"""
+
+# Add candidate codes to the free pool, skipping codes currently in use.
+_ADD_FREE_ROOM_CODES_LUA = """
+local added = 0
+for _, code in ipairs(ARGV) do
+    if redis.call('SISMEMBER', KEYS[2], code) == 0 then
+        added = added + redis.call('SADD', KEYS[1], code)
+    end
+end
+return added
+"""
+
+# Move a code from the used set back to the free pool.
+_RELEASE_ROOM_CODE_LUA = """
+if redis.call('SREM', KEYS[2], ARGV[1]) == 1 then
+    redis.call('SADD', KEYS[1], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+# Record one vote on a game ballot (compact hash, see open_ballot).
+# Checks the ballot kind, eligibility, "good must succeed" and double votes.
+# The caller casting the last vote closes the ballot and gets every vote back.
+_CAST_BALLOT_VOTE_LUA = """
+local kind = redis.call('HGET', KEYS[1], 'kind')
+if kind ~= ARGV[1] then
+    if ARGV[1] == 'team' then
+        return redis.error_reply('Not in team vote phase')
+    end
+    return redis.error_reply('Not in mission phase')
+end
+
+local voter = ',' .. ARGV[2] .. ','
+local voters = redis.call('HGET', KEYS[1], 'voters')
+if not string.find(',' .. voters .. ',', voter, 1, true) then
+    if kind == 'team' then
+        return redis.error_reply('Invalid player')
+    end
+    return redis.error_reply('Player is not on the mission team')
+end
+
+if kind == 'mission' and ARGV[3] == '0' then
+    local evil = redis.call('HGET', KEYS[1], 'evil') or ''
+    if not string.find(',' .. evil .. ',', voter, 1, true) then
+        return redis.error_reply('Good team members must vote success')
+    end
+end
+
+if redis.call('HSETNX', KEYS[1], 'v:' .. ARGV[2], ARGV[3] .. '|' .. ARGV[4]) == 0 then
+    return redis.error_reply('Player has already voted')
+end
+
+local count = redis.call('HINCRBY', KEYS[1], 'count', 1)
+local needed = tonumber(redis.call('HGET', KEYS[1], 'needed'))
+if count < needed then
+    return {count, needed}
+end
+
+redis.call('HSET', KEYS[1], 'kind', 'closed')
+local votes = {}
+for id in string.gmatch(voters, '[^,]+') do
+    table.insert(votes, id)
+    table.insert(votes, redis.call('HGET', KEYS[1], 'v:' .. id))
+end
+return {count, needed, votes}
+"""
+
+# Add a socket to a user's room presence (room:{id}:users field = JSON with
+# username, display_name and sids) and tell every worker to drop its cached roster.
+# The socket is also listed under its worker (KEYS[3]) for ghost cleanup.
+_JOIN_ROOM_LUA = """
+local raw = redis.call('HGET', KEYS[1], ARGV[1])
+local ok, entry = false, nil
+if raw then
+    ok, entry = pcall(cjson.decode, raw)
+end
+if not ok or type(entry) ~= 'table' or type(entry.sids) ~= 'table' then
+    entry = {sids = {}}
+end
+entry.username = ARGV[3]
+entry.display_name = ARGV[4]
+
+local present = false
+for _, sid in ipairs(entry.sids) do
+    if sid == ARGV[2] then
+        present = true
+    end
+end
+if not present then
+    table.insert(entry.sids, ARGV[2])
+end
+
+redis.call('HSET', KEYS[1], ARGV[1], cjson.encode(entry))
+redis.call('ZADD', KEYS[2], 'NX', ARGV[5], ARGV[1])
+redis.call('SADD', KEYS[3], ARGV[7] .. '|' .. ARGV[1] .. '|' .. ARGV[2])
+redis.call('PUBLISH', ARGV[6], ARGV[7])
+return #entry.sids
+"""
+
+# Remove a socket from a user's room presence; the user leaves the room
+# (and the join order) with their last socket. Returns sockets left.
+_LEAVE_ROOM_LUA = """
+local remaining = 0
+local raw = redis.call('HGET', KEYS[1], ARGV[1])
+if raw then
+    local ok, entry = pcall(cjson.decode, raw)
+    local sids = {}
+    if ok and type(entry) == 'table' and type(entry.sids) == 'table' then
+        for _, sid in ipairs(entry.sids) do
+            if sid ~= ARGV[2] then
+                table.insert(sids, sid)
+            end
+        end
+    end
+    remaining = #sids
+    if remaining > 0 then
+        entry.sids = sids
+        redis.call('HSET', KEYS[1], ARGV[1], cjson.encode(entry))
+    else
+        redis.call('HDEL', KEYS[1], ARGV[1])
+    end
+end
+if remaining == 0 then
+    redis.call('ZREM', KEYS[2], ARGV[1])
+end
+redis.call('SREM', KEYS[3], ARGV[4] .. '|' .. ARGV[1] .. '|' .. ARGV[2])
+redis.call('PUBLISH', ARGV[3], ARGV[4])
+return remaining
+"""
+
+# Game state of the room's current game in one round trip (nil if none).
+# The state key is derived from the mapping, so this needs a single Redis node.
+_GET_ROOM_GAME_STATE_LUA = """
+local game_id = redis.call('GET', KEYS[1])
+if not game_id then
+    return false
+end
+return redis.call('GET', 'game:' .. game_id .. ':state')
+"""
+
+# Delete the room -> game mapping only if it still points at ARGV[1]
+# (a new game may have started in the room since).
+_DELETE_ROOM_GAME_ID_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisUnavailableError(RedisConnectionError):
+    """Raised without calling Redis while the circuit breaker is open"""
+
+
+# Sliding-window rate limit: a ZSET of request timestamps (ms) per key.
+# ARGV = now, window, limit, unique member. Returns {allowed, count, retry_after_ms}.
+_RATE_LIMIT_LUA = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local count = redis.call('ZCARD', KEYS[1])
+if count >= tonumber(ARGV[3]) then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    return {0, count, tonumber(oldest[2]) + window - now}
+end
+redis.call('ZADD', KEYS[1], now, ARGV[4])
+redis.call('PEXPIRE', KEYS[1], window)
+return {1, count + 1, 0}
+"""
+
+
+# Errors that mean Redis is down or stalled (as opposed to a bad command)
+_UNAVAILABLE_ERRORS = (RedisConnectionError, RedisTimeoutError, asyncio.TimeoutError, OSError)
+
+
+def _guarded(method):
+    """Run a Redis call through the circuit breaker"""
+
+    @functools.wraps(method)
+    async def wrapper(self: "RedisClient", *args, **kwargs):
+        if not self.breaker.allow():
+            raise RedisUnavailableError("Redis circuit breaker is open")
+        try:
+            result = await method(self, *args, **kwargs)
+        except _UNAVAILABLE_ERRORS:
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            # Redis answered, the command itself failed
+            self.breaker.record_success()
+            raise
+        except BaseException:
+            # Cancelled (shutdown, job drain): otherwise a half-open breaker stays stuck
+            self.breaker.record_cancelled()
+            raise
+        self.breaker.record_success()
+        return result
+
+    return wrapper
 
 
 class RedisClient:
     def __init__(self):
         self._client: Optional[redis.Redis] = None
+        self.breaker = CircuitBreaker(
+            "redis",
+            failure_threshold=settings.redis_breaker_failures,
+            reset_timeout=settings.redis_breaker_reset_seconds,
+        )
+        # Writes deferred while Redis is unavailable, keyed so later writes replace earlier ones
+        self._replay_queue: OrderedDict[str, tuple[str, tuple]] = OrderedDict()
+        self._replay_task: Optional[asyncio.Task] = None
+
+        metrics.register_gauge(
+            "redis.breaker.state", lambda: CircuitBreaker.STATE_VALUES[self.breaker.state]
+        )
+        metrics.register_gauge("redis.replay_queue.size", lambda: len(self._replay_queue))
 
     async def connect(self):
-        self._client = redis.from_url(
+        pool = redis.BlockingConnectionPool.from_url(
             settings.redis_url,
+            max_connections=settings.redis_max_connections,
+            timeout=settings.redis_pool_timeout,
+            socket_timeout=settings.redis_socket_timeout,
+            socket_connect_timeout=settings.redis_connect_timeout,
             encoding="utf-8",
             decode_responses=True,
         )
+        self._client = redis.Redis(connection_pool=pool)
         await self._client.ping()
+        self._reserve_room_code = self._client.register_script(_RESERVE_ROOM_CODE_LUA)
+        self._add_free_room_codes = self._client.register_script(_ADD_FREE_ROOM_CODES_LUA)
+        self._release_room_code = self._client.register_script(_RELEASE_ROOM_CODE_LUA)
+        self._cast_ballot_vote = self._client.register_script(_CAST_BALLOT_VOTE_LUA)
+        self._join_room = self._client.register_script(_JOIN_ROOM_LUA)
+        self._get_room_game_state = self._client.register_script(_GET_ROOM_GAME_STATE_LUA)
+        self._delete_room_game_id = self._client.register_script(_DELETE_ROOM_GAME_ID_LUA)
+        self._rate_limit = self._client.register_script(_RATE_LIMIT_LUA)
+        self._leave_room = self._client.register_script(_LEAVE_ROOM_LUA)
 
     async def disconnect(self):
+        if self._replay_task:
+            self._replay_task.cancel()
+        if self._replay_queue:
+            print(f"[redis] Dropping {len(self._replay_queue)} deferred writes on shutdown")
         if self._client:
             await self._client.close()
 
@@ -28,7 +287,58 @@ class RedisClient:
             raise RuntimeError("Redis client not connected")
         return self._client
 
+    # Memory-only fallback
+    async def write_or_defer(self, key: str, method: str, *args) -> bool:
+        """
+        Run a write, or queue it to replay once Redis recovers.
+        A later write with the same key replaces the queued one.
+        Returns False if the write was deferred.
+        """
+        ran, _ = await self.run_or_defer(key, method, *args)
+        return ran
+
+    async def run_or_defer(self, key: str, method: str, *args) -> tuple[bool, Any]:
+        """write_or_defer that also returns the write's result: (True, result) or (False, None)"""
+        if key not in self._replay_queue:
+            try:
+                return True, await getattr(self, method)(*args)
+            except _UNAVAILABLE_ERRORS as e:
+                if not isinstance(e, RedisUnavailableError):
+                    print(f"[redis] {method} failed, deferring: {e}")
+
+        # Queued writes for the same key must not be overtaken
+        self._replay_queue.pop(key, None)
+        self._replay_queue[key] = (method, args)
+        metrics.inc("redis.replay.deferred")
+        if len(self._replay_queue) > settings.redis_replay_queue_size:
+            self._replay_queue.popitem(last=False)
+            metrics.inc("redis.replay.dropped")
+
+        if self._replay_task is None or self._replay_task.done():
+            self._replay_task = asyncio.create_task(self._replay_deferred())
+        return False, None
+
+    async def _replay_deferred(self):
+        while self._replay_queue:
+            key, entry = next(iter(self._replay_queue.items()))
+            method, args = entry
+            try:
+                await getattr(self, method)(*args)
+                metrics.inc("redis.replay.replayed")
+            except _UNAVAILABLE_ERRORS:
+                await asyncio.sleep(settings.redis_replay_interval)
+                continue
+            except Exception as e:
+                print(f"[redis] Dropping deferred {method} for {key}: {e}")
+                metrics.inc("redis.replay.dropped")
+
+            # Keep the entry if a newer write replaced it meanwhile
+            if self._replay_queue.get(key) is entry:
+                del self._replay_queue[key]
+        print("[redis] Deferred writes replayed")
+
     # Session management
+    @_guarded
     async def set_session(self, session_id: str, user_data: dict, expire: int = 86400):
         await self.client.setex(
             f"session:{session_id}",
@@ -36,26 +346,75 @@ class RedisClient:
             json.dumps(user_data),
         )
 
+    @_guarded
     async def get_session(self, session_id: str) -> Optional[dict]:
         data = await self.client.get(f"session:{session_id}")
         if data:
             return json.loads(data)
         return None
 
+    @_guarded
     async def delete_session(self, session_id: str):
         await self.client.delete(f"session:{session_id}")
 
     # Room management
-    async def add_user_to_room(self, room_id: str, user_id: str, socket_id: str):
-        # Hash for socket_id mapping
-        await self.client.hset(f"room:{room_id}:users", user_id, socket_id)
-        # ZSET for join order (timestamp as score)
-        await self.client.zadd(f"room:{room_id}:order", {user_id: time.time()})
+    @_guarded
+    async def add_user_to_room(
+        self,
+        room_id: str,
+        user_id: str,
+        socket_id: str,
+        username: str = None,
+        display_name: str = None,
+        worker_id: str = "",
+    ) -> int:
+        """Add a socket to the user's presence in the room. Returns the user's socket count."""
+        # Hash of user_id -> presence JSON, ZSET for join order (timestamp as score)
+        return await self._join_room(
+            keys=[f"room:{room_id}:users", f"room:{room_id}:order", f"worker:{worker_id}:sockets"],
+            args=[user_id, socket_id, username or "", display_name or "", time.time(),
+                  PRESENCE_CHANNEL, room_id],
+        )
+
+    @_guarded
+    async def remove_user_from_room(
+        self, room_id: str, user_id: str, socket_id: str = "", worker_id: str = ""
+    ) -> int:
+        """Remove a socket from the user's presence in the room. Returns sockets left."""
+        return await self._leave_room(
+            keys=[f"room:{room_id}:users", f"room:{room_id}:order", f"worker:{worker_id}:sockets"],
+            args=[user_id, socket_id, PRESENCE_CHANNEL, room_id],
+        )
+
+    @_guarded
+    async def get_room_roster(self, room_id: str) -> list[dict]:
+        """Users in the room in join order: [{user_id, username, display_name, sids}]"""
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hgetall(f"room:{room_id}:users")
+        pipe.zrange(f"room:{room_id}:order", 0, -1)
+        users, order = await pipe.execute()
 
-    async def remove_user_from_room(self, room_id: str, user_id: str):
-        await self.client.hdel(f"room:{room_id}:users", user_id)
-        await self.client.zrem(f"room:{room_id}:order", user_id)
+        joined = set(order)
+        roster = []
+        for user_id in order + [user_id for user_id in users if user_id not in joined]:
+            raw = users.get(user_id)
+            if raw is None:
+                continue
+            try:
+                entry = json.loads(raw)
+            except ValueError:
+                continue
+            if not isinstance(entry, dict):
+                continue
+            roster.append({
+                "user_id": int(user_id) if user_id.isdigit() else user_id,
+                "username": entry.get("username"),
+                "display_name": entry.get("display_name"),
+                "sids": entry.get("sids", []),
+            })
+        return roster
 
+    @_guarded
     async def get_next_host(self, room_id: str, exclude_user_id: str) -> Optional[str]:
         """Return the user_id of the earliest joined user, excluding the specified user."""
         # Get all members sorted by join time (ascending)
@@ -65,9 +424,15 @@ class RedisClient:
                 return member
         return None
 
+    @_guarded
     async def get_room_users(self, room_id: str) -> dict:
         return await self.client.hgetall(f"room:{room_id}:users")
 
+    @_guarded
+    async def is_user_in_room(self, room_id: str, user_id) -> bool:
+        return bool(await self.client.hexists(f"room:{room_id}:users", str(user_id)))
+
+    @_guarded
     async def set_room_state(self, room_id: str, state: dict, expire: int = 3600):
         await self.client.setex(
             f"room:{room_id}:state",
@@ -75,30 +440,327 @@ class RedisClient:
             json.dumps(state),
         )
 
+    @_guarded
     async def get_room_state(self, room_id: str) -> Optional[dict]:
         data = await self.client.get(f"room:{room_id}:state")
         if data:
             return json.loads(data)
         return None
 
+    @_guarded
     async def delete_room(self, room_id: str):
         keys = await self.client.keys(f"room:{room_id}:*")
         if keys:
             await self.client.delete(*keys)
 
+    @_guarded
     async def clear_room_order(self, room_id: str):
         """Clear the room order ZSET when room is deleted."""
         await self.client.delete(f"room:{room_id}:order")
 
+    # Ghost cleanup (sockets of dead workers)
+    @_guarded
+    async def claim_worker_sweep(self, worker_id: str, expire: int = 60) -> bool:
+        """Only one worker sweeps a dead worker at a time"""
+        return bool(await self.client.set(f"worker:{worker_id}:sweep", 1, nx=True, ex=expire))
+
+    @_guarded
+    async def remove_ghost_sockets(self, worker_id: str, count: int) -> list[tuple[str, str, int]]:
+        """
+        Remove up to `count` sockets of a dead worker from their rooms, and their
+        sessions, in one round trip. Returns (room_id, user_id, sockets left) per socket.
+        """
+        # The leave script removes each entry from the set once it's done
+        entries = await self.client.srandmember(f"worker:{worker_id}:sockets", count)
+        if not entries:
+            return []
+
+        ghosts = [entry.split("|", 2) for entry in entries]
+        pipe = self.client.pipeline(transaction=False)
+        for room_id, user_id, socket_id in ghosts:
+            await self._leave_room(
+                keys=[f"room:{room_id}:users", f"room:{room_id}:order", f"worker:{worker_id}:sockets"],
+                args=[user_id, socket_id, PRESENCE_CHANNEL, room_id],
+                client=pipe,
+            )
+            pipe.delete(f"session:socket:{socket_id}")
+        results = await pipe.execute()
+        return [
+            (room_id, user_id, int(remaining))
+            for (room_id, user_id, _), remaining in zip(ghosts, results[::2])
+        ]
+
+    # Chat history (capped stream per room)
+    @_guarded
+    async def append_chat_messages(
+        self, room_id: str, messages: list[dict], max_len: int, expire: int = 86400
+    ) -> list[str]:
+        """Append messages to the room's chat stream in one round trip. Returns entry IDs."""
+        key = f"room:{room_id}:chat"
+        pipe = self.client.pipeline(transaction=False)
+        for message in messages:
+            pipe.xadd(key, {"data": json.dumps(message)}, maxlen=max_len, approximate=True)
+        pipe.expire(key, expire)
+        results = await pipe.execute()
+        return results[:-1]
+
+    @_guarded
+    async def get_chat_messages(
+        self, room_id: str, before: Optional[str] = None, count: int = 50
+    ) -> list[dict]:
+        """Get up to `count` messages older than the `before` entry ID, oldest first."""
+        entries = await self.client.xrevrange(
+            f"room:{room_id}:chat",
+            max=f"({before}" if before else "+",
+            min="-",
+            count=count,
+        )
+        messages = []
+        for entry_id, fields in reversed(entries):
+            message = json.loads(fields["data"])
+            message["id"] = entry_id
+            messages.append(message)
+        return messages
+
+    # Room code allocation
+    @_guarded
+    async def reserve_room_code(self) -> tuple[Optional[str], int]:
+        """Atomically take a free room code. Returns (code, remaining free codes)."""
+        code, remaining = await self._reserve_room_code(
+            keys=[ROOM_CODES_FREE_KEY, ROOM_CODES_USED_KEY]
+        )
+        return code or None, int(remaining)
+
+    @_guarded
+    async def add_free_room_codes(self, codes: list[str]) -> int:
+        """Add codes to the free pool (codes in use are skipped). Returns count added."""
+        if not codes:
+            return 0
+        return await self._add_free_room_codes(
+            keys=[ROOM_CODES_FREE_KEY, ROOM_CODES_USED_KEY],
+            args=list(codes),
+        )
+
+    @_guarded
+    async def release_room_code(self, code: str) -> bool:
+        """Return a room code to the free pool."""
+        released = await self._release_room_code(
+            keys=[ROOM_CODES_FREE_KEY, ROOM_CODES_USED_KEY],
+            args=[code],
+        )
+        return bool(released)
+
+    # Rate limiting
+    @_guarded
+    async def hit_rate_limit(self, key: str, limit: int, window_ms: int) -> tuple[bool, int]:
+        """Count a request in key's sliding window. Returns (allowed, retry_after_ms)."""
+        now = int(time.time() * 1000)
+        allowed, _, retry_after = await self._rate_limit(
+            keys=[f"ratelimit:{key}"],
+            args=[now, window_ms, limit, f"{now}-{os.urandom(4).hex()}"],
+        )
+        return bool(allowed), int(retry_after)
+
+    # Stale room and game sweeper
+    @_guarded
+    async def claim_sweep(self, name: str, worker_id: str, expire: int) -> bool:
+        """Let one worker run the named sweep for `expire` seconds"""
+        return bool(await self.client.set(f"sweep:{name}", worker_id, nx=True, ex=expire))
+
+    @_guarded
+    async def touch_rooms(self, activity: dict[str, float]):
+        """Record room activity times (never moves a room's time backwards)"""
+        await self.client.zadd(ROOMS_ACTIVITY_KEY, activity, gt=True)
+
+    @_guarded
+    async def get_idle_games(self, before: float, count: int) -> list[tuple[int, Optional[str]]]:
+        """Up to `count` games last saved before `before`, oldest first, with their room (if known)"""
+        game_ids = await self.client.zrangebyscore(GAMES_ACTIVITY_KEY, "-inf", before, start=0, num=count)
+        if not game_ids:
+            return []
+        values = await self.client.mget([f"game:{game_id}:state" for game_id in game_ids])
+        games = []
+        for game_id, value in zip(game_ids, values):
+            room_id = None
+            if value is not None:
+                # The state expires with the room mapping; without it there is nothing to unmap
+                room_id = json.loads(value).get("room_id")
+            games.append((int(game_id), str(room_id) if room_id is not None else None))
+        return games
+
+    @_guarded
+    async def get_games_activity(self, game_ids: list[int]) -> list[Optional[float]]:
+        """Last save time of each game (None if not tracked)"""
+        if not game_ids:
+            return []
+        return await self.client.zmscore(GAMES_ACTIVITY_KEY, game_ids)
+
+    @_guarded
+    async def get_rooms_activity(self, room_ids: list[str]) -> list[dict]:
+        """Present users, last activity and current game activity of each room"""
+        if not room_ids:
+            return []
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zmscore(ROOMS_ACTIVITY_KEY, room_ids)
+        for room_id in room_ids:
+            pipe.hlen(f"room:{room_id}:users")
+            pipe.get(f"room:{room_id}:game_id")
+        touched, *replies = await pipe.execute()
+        game_ids = [int(game_id) if game_id else None for game_id in replies[1::2]]
+
+        running = [game_id for game_id in game_ids if game_id is not None]
+        game_touched = {}
+        if running:
+            game_touched = dict(zip(running, await self.client.zmscore(GAMES_ACTIVITY_KEY, running)))
+        return [
+            {
+                "present": present,
+                "touched_at": touched_at,
+                "game_id": game_id,
+                "game_touched_at": game_touched.get(game_id),
+            }
+            for present, touched_at, game_id in zip(replies[::2], touched, game_ids)
+        ]
+
+    @_guarded
+    async def cleanup_games(self, games: list[tuple[int, Optional[str]]]):
+        """Delete the state, ballot and room mapping of closed games in one round trip"""
+        if not games:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        game_ids = [game_id for game_id, _ in games]
+        pipe.delete(*[f"game:{game_id}:{suffix}" for game_id in game_ids for suffix in ("state", "ballot")])
+        pipe.srem(ACTIVE_GAMES_KEY, *game_ids)
+        pipe.zrem(GAMES_ACTIVITY_KEY, *game_ids)
+        for game_id, room_id in games:
+            if room_id is not None:
+                await self._delete_room_game_id(
+                    keys=[f"room:{room_id}:game_id"], args=[str(game_id)], client=pipe
+                )
+        await pipe.execute()
+
+    @_guarded
+    async def cleanup_rooms(self, room_ids: list[str]):
+        """Delete the presence, chat and game mapping of closed rooms and free their codes"""
+        if not room_ids:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        pipe.delete(*[
+            f"room:{room_id}:{suffix}"
+            for room_id in room_ids
+            for suffix in ("users", "order", "state", "chat", "game_id")
+        ])
+        pipe.zrem(ROOMS_ACTIVITY_KEY, *room_ids)
+        for room_id in room_ids:
+            await self._release_room_code(
+                keys=[ROOM_CODES_FREE_KEY, ROOM_CODES_USED_KEY], args=[room_id], client=pipe
+            )
+        await pipe.execute()
+
+    # Worker registry (game ownership and ghost cleanup across workers)
+    @_guarded
+    async def heartbeat_worker(self, worker_id: str, ttl: float) -> set[str]:
+        """Mark a worker alive and return the workers heard from in the last `ttl` seconds."""
+        now = time.time()
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zadd(WORKERS_KEY, {worker_id: now})
+        pipe.zrangebyscore(WORKERS_KEY, now - ttl, "+inf")
+        _, workers = await pipe.execute()
+        return set(workers)
+
+    @_guarded
+    async def get_dead_workers(self, ttl: float) -> list[tuple[str, float]]:
+        """
+        Workers silent for `ttl` seconds, with their last heartbeat time. They stay
+        registered until their sockets are swept (forget_worker).
+        """
+        return await self.client.zrangebyscore(WORKERS_KEY, "-inf", f"({time.time() - ttl}", withscores=True)
+
+    @_guarded
+    async def retire_worker(self, worker_id: str):
+        """Mark a stopping worker dead right away, so the others sweep its sockets"""
+        await self.client.zadd(WORKERS_KEY, {worker_id: 0})
+
+    @_guarded
+    async def forget_worker(self, worker_id: str):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zrem(WORKERS_KEY, worker_id)
+        pipe.delete(f"worker:{worker_id}:sockets")
+        await pipe.execute()
+
+    @staticmethod
+    def worker_channel(worker_id: str) -> str:
+        return f"worker:{worker_id}:events"
+
+    @_guarded
+    async def publish_worker_event(self, worker_id: str, message: dict) -> int:
+        """Send an event to one worker. Returns the number of subscribers that got it."""
+        return await self.client.publish(self.worker_channel(worker_id), json.dumps(message))
+
+    # Game ballots (stateless vote execution)
+    @_guarded
+    async def open_ballot(self, game_id: int, ballot: Optional[dict], expire: int = 7200):
+        """
+        Replace the ballot of a game in one round trip.
+        `ballot` holds kind, voters, evil, needed and any votes already cast
+        (as v:<user_id> fields); None closes voting.
+        """
+        key = f"game:{game_id}:ballot"
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(key)
+        if ballot:
+            pipe.hset(key, mapping=ballot)
+            pipe.expire(key, expire)
+        await pipe.execute()
+
+    @_guarded
+    async def cast_ballot_vote(
+        self, game_id: int, kind: str, user_id: int, value: bool, at: float
+    ) -> tuple[int, int, Optional[dict[int, tuple[bool, float]]]]:
+        """
+        Atomically record a vote. Returns (votes cast, votes needed, votes)
+        where votes is {user_id: (value, cast_at)} once the ballot is complete.
+        Rule violations raise redis ResponseError with the game's error message.
+        """
+        result = await self._cast_ballot_vote(
+            keys=[f"game:{game_id}:ballot"],
+            args=[kind, user_id, "1" if value else "0", repr(at)],
+        )
+        count, needed = int(result[0]), int(result[1])
+        if len(result) < 3:
+            return count, needed, None
+
+        flat = result[2]
+        votes = {}
+        for voter, cast in zip(flat[::2], flat[1::2]):
+            vote, cast_at = cast.split("|")
+            votes[int(voter)] = (vote == "1", float(cast_at))
+        return count, needed, votes
+
+    @_guarded
+    async def get_ballot_votes(self, game_id: int) -> Optional[tuple[str, dict[int, bool]]]:
+        """(kind, {user_id: vote}) of the votes cast so far on a game's open ballot"""
+        ballot = await self.client.hgetall(f"game:{game_id}:ballot")
+        if not ballot:
+            return None
+        votes = {
+            int(field[2:]): value.split("|")[0] == "1"
+            for field, value in ballot.items()
+            if field.startswith("v:")
+        }
+        return ballot["kind"], votes
+
     # Game state management (for reconnection support)
+    @_guarded
     async def save_game_state(self, game_id: int, state: dict, expire: int = 7200):
         """Save game state to Redis (2 hour expiry by default)."""
-        await self.client.setex(
-            f"game:{game_id}:state",
-            expire,
-            json.dumps(state),
-        )
+        pipe = self.client.pipeline(transaction=False)
+        pipe.setex(f"game:{game_id}:state", expire, json.dumps(state))
+        pipe.sadd(ACTIVE_GAMES_KEY, game_id)
+        pipe.zadd(GAMES_ACTIVITY_KEY, {game_id: time.time()})
+        await pipe.execute()
 
+    @_guarded
     async def get_game_state(self, game_id: int) -> Optional[dict]:
         """Get game state from Redis."""
         data = await self.client.get(f"game:{game_id}:state")
@@ -106,14 +768,38 @@ class RedisClient:
             return json.loads(data)
         return None
 
+    @_guarded
     async def delete_game_state(self, game_id: int):
         """Delete game state from Redis."""
-        await self.client.delete(f"game:{game_id}:state")
+        pipe = self.client.pipeline(transaction=False)
+        pipe.delete(f"game:{game_id}:state", f"game:{game_id}:ballot")
+        pipe.srem(ACTIVE_GAMES_KEY, game_id)
+        pipe.zrem(GAMES_ACTIVITY_KEY, game_id)
+        await pipe.execute()
+
+    @_guarded
+    async def get_active_game_states(self) -> list[dict]:
+        """Get the state of every active game (used to warm up after a restart)."""
+        game_ids = await self.client.smembers(ACTIVE_GAMES_KEY)
+        if not game_ids:
+            return []
+
+        game_ids = list(game_ids)
+        values = await self.client.mget([f"game:{game_id}:state" for game_id in game_ids])
+
+        # States that expired leave stale IDs behind
+        expired = [game_id for game_id, value in zip(game_ids, values) if value is None]
+        if expired:
+            await self.client.srem(ACTIVE_GAMES_KEY, *expired)
 
+        return [json.loads(value) for value in values if value is not None]
+
+    @_guarded
     async def set_room_game_id(self, room_id: str, game_id: int, expire: int = 7200):
         """Map room to active game ID for reconnection."""
         await self.client.setex(f"room:{room_id}:game_id", expire, str(game_id))
 
+    @_guarded
     async def get_room_game_id(self, room_id: str) -> Optional[int]:
         """Get active game ID for a room."""
         data = await self.client.get(f"room:{room_id}:game_id")
@@ -121,9 +807,21 @@ class RedisClient:
             return int(data)
         return None
 
-    async def delete_room_game_id(self, room_id: str):
-        """Delete room to game ID mapping."""
-        await self.client.delete(f"room:{room_id}:game_id")
+    @_guarded
+    async def get_room_game_state(self, room_id: str) -> Optional[dict]:
+        """Get the state of the room's current game (mapping + state in one round trip)."""
+        data = await self._get_room_game_state(keys=[f"room:{room_id}:game_id"])
+        if data:
+            return json.loads(data)
+        return None
+
+    @_guarded
+    async def delete_room_game_id(self, room_id: str, game_id: Optional[int] = None):
+        """Delete room to game ID mapping (only if it still maps to game_id, when given)."""
+        if game_id is None:
+            await self.client.delete(f"room:{room_id}:game_id")
+        else:
+            await self._delete_room_game_id(keys=[f"room:{room_id}:game_id"], args=[str(game_id)])
 
 
 redis_client = RedisClient()
@@ -0,0 +1,18 @@
+from app.games.registry import (
+    GameEngine,
+    register_engine,
+    get_engine,
+    registered_game_types,
+    loaded_engines,
+)
+
+# Built-in engines (imported lazily on first use)
+register_engine("avalon", "app.services.avalon")
+
+__all__ = [
+    "GameEngine",
+    "register_engine",
+    "get_engine",
+    "registered_game_types",
+    "loaded_engines",
+]
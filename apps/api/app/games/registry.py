@@ -0,0 +1,87 @@
+"""
+Game Engine Registry
+
+Engines are registered by game_type with the import path of the module
+that defines them. The module is only imported the first time a game of
+that type is used, so adding games doesn't slow down worker startup or
+grow its memory.
+
+An engine module exposes a module-level `ENGINE = GameEngine(...)`.
+"""
+
+import importlib
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+
+@dataclass
+class GameEngine:
+    game_type: str
+    display_name: str
+    min_players: int
+    max_players: int
+
+    # Rule tables (team sizes, role configs, ...) keyed by name
+    rules: dict[str, Any] = field(default_factory=dict)
+
+    # Lifecycle and persistence hooks
+    create_game: Callable[[int, str, list[dict]], Any] = None
+    get_game: Callable[[int], Optional[Any]] = None
+    load_game: Callable[[int], Awaitable[Optional[Any]]] = None
+    reload_game: Callable[[int], Awaitable[Optional[Any]]] = None  # Skips the memory cache
+    load_game_by_room: Callable[..., Awaitable[Optional[Any]]] = None  # (room_id, fresh=False)
+    save_game: Callable[[Any], Awaitable[None]] = None
+    remove_game: Callable[[int, Optional[str]], Awaitable[None]] = None
+    persist_result: Callable[[Any], Awaitable[None]] = None
+    archive_result: Callable[[Any], Awaitable[None]] = None
+
+    # Warm restart hooks: save unsaved games on shutdown, reload them on startup
+    flush_games: Callable[[], Awaitable[int]] = None
+    restore_games: Callable[[], Awaitable[int]] = None
+    # Save and drop games this worker no longer owns (keep(game_id) -> bool)
+    release_games: Callable[[Callable[[int], bool]], Awaitable[int]] = None
+    # Save and drop games idle in memory for this many seconds (the stale sweeper)
+    evict_idle_games: Callable[[float], Awaitable[int]] = None
+
+    def player_count_error(self, count: int) -> Optional[str]:
+        if count < self.min_players:
+            return f"{self.display_name}은 최소 {self.min_players}명이 필요합니다"
+        if count > self.max_players:
+            return f"{self.display_name}은 최대 {self.max_players}명까지 가능합니다"
+        return None
+
+
+_engine_modules: dict[str, str] = {}
+_engines: dict[str, GameEngine] = {}
+
+
+def register_engine(game_type: str, module_path: str):
+    """Register an engine module without importing it"""
+    _engine_modules[game_type] = module_path
+
+
+def get_engine(game_type: str) -> Optional[GameEngine]:
+    """Get the engine for a game type, importing its module on first use"""
+    engine = _engines.get(game_type)
+    if engine is not None:
+        return engine
+
+    module_path = _engine_modules.get(game_type)
+    if module_path is None:
+        return None
+
+    engine = importlib.import_module(module_path).ENGINE
+    if engine.game_type != game_type:
+        raise RuntimeError(
+            f"Engine in {module_path} is for {engine.game_type!r}, not {game_type!r}"
+        )
+    _engines[game_type] = engine
+    return engine
+
+
+def registered_game_types() -> list[str]:
+    return sorted(_engine_modules)
+
+
+def loaded_engines() -> list[str]:
+    return sorted(_engines)
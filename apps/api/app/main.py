@@ -4,22 +4,64 @@ import socketio
 from contextlib import asynccontextmanager
 
 from app.config import settings
-from app.db.database import engine, Base
+from app.db.database import engine
+from app.db.migrate import check_schema_revision, create_schema
 from app.db.redis import redis_client
+from app.core.metrics import metrics
+from app.core.rate_limit import RateLimitMiddleware, rate_limit_rules
+from app.core.security import shutdown_password_executor
 from app.api.v1 import router as api_router
-from app.sockets.manager import sio
+from app.games import get_engine, loaded_engines, registered_game_types
+from app.services.archive import close_archive
+from app.services.guests import guest_maintenance
+from app.services.sweeper import stale_sweeper
+from app.sockets.manager import cluster, jobs, manager, sio
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    if settings.schema_mode == "check":
+        await check_schema_revision()
+    else:
+        await create_schema()
     await redis_client.connect()
+    if settings.restore_games_on_startup:
+        await restore_games()
+    await manager.presence.start()
+    await cluster.start()
+    guest_maintenance.start()
+    stale_sweeper.start()
     yield
     # Shutdown
+    await cluster.stop()
+    await manager.presence.stop()
+    await jobs.drain(settings.jobs_drain_seconds)
+    await guest_maintenance.stop()
+    await stale_sweeper.stop()
+    await flush_games()
+    close_archive()
     await redis_client.disconnect()
     await engine.dispose()
+    shutdown_password_executor()
+
+
+async def restore_games():
+    """Reload active games saved in Redis (otherwise they're loaded on first use)"""
+    for game_type in registered_game_types():
+        engine = get_engine(game_type)
+        if engine.restore_games:
+            restored = await engine.restore_games()
+            print(f"[startup] Restored {restored} {game_type} games from Redis")
+
+
+async def flush_games():
+    """Save in-memory games with unsaved changes so the next worker can pick them up"""
+    for game_type in loaded_engines():
+        engine = get_engine(game_type)
+        if engine.flush_games:
+            flushed = await engine.flush_games()
+            print(f"[shutdown] Flushed {flushed} {game_type} games to Redis")
 
 
 app = FastAPI(
@@ -29,6 +71,13 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Rate limits run inside CORS so 429 responses still carry CORS headers
+app.add_middleware(
+    RateLimitMiddleware,
+    rules=rate_limit_rules(settings.rate_limits),
+    trust_forwarded=settings.rate_limit_trust_forwarded,
+)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -50,6 +99,11 @@ async def health_check():
     }
 
 
+@app.get("/metrics")
+async def get_metrics():
+    return metrics.snapshot()
+
+
 @app.get("/")
 async def root():
     return {
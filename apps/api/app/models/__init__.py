@@ -1,5 +1,5 @@
 from app.models.user import User
 from app.models.room import Room
-from app.models.game import Game
+from app.models.game import Game, GameAction
 
-__all__ = ["User", "Room", "Game"]
+__all__ = ["User", "Room", "Game", "GameAction"]
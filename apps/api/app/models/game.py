@@ -1,4 +1,4 @@
-from sqlalchemy import String, Integer, ForeignKey, DateTime, JSON, Enum as SQLEnum
+from sqlalchemy import String, Integer, ForeignKey, DateTime, JSON, Index, Enum as SQLEnum, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from typing import Optional, Any, TYPE_CHECKING
@@ -14,10 +14,19 @@ class GameStatus(enum.Enum):
     SETUP = "setup"
     IN_PROGRESS = "in_progress"
     FINISHED = "finished"
+    ABANDONED = "abandoned"  # Closed by the stale sweeper before it finished
 
 
 class Game(Base):
     __tablename__ = "games"
+    __table_args__ = (
+        # Unfinished games by age, for the stale sweeper
+        Index(
+            "ix_games_open_created_at",
+            "created_at",
+            postgresql_where=text("status IN ('SETUP', 'IN_PROGRESS')"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     room_id: Mapped[int] = mapped_column(ForeignKey("rooms.id"))
@@ -35,3 +44,20 @@ class Game(Base):
 
     # Relationships
     room: Mapped["Room"] = relationship("Room", back_populates="games")
+
+
+class GameAction(Base):
+    """One entry of a finished game's action log (used for replays)"""
+
+    __tablename__ = "game_actions"
+    __table_args__ = (
+        Index("ix_game_actions_game_seq", "game_id", "seq", unique=True),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    game_id: Mapped[int] = mapped_column(ForeignKey("games.id", ondelete="CASCADE"))
+    seq: Mapped[int] = mapped_column(Integer)
+    action: Mapped[str] = mapped_column(String(50))
+    user_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    payload: Mapped[Optional[dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime)
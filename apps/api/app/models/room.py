@@ -1,4 +1,4 @@
-from sqlalchemy import String, Integer, ForeignKey, DateTime, Enum as SQLEnum
+from sqlalchemy import String, Integer, ForeignKey, DateTime, Index, Enum as SQLEnum, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from typing import Optional, TYPE_CHECKING
@@ -19,11 +19,27 @@ class RoomStatus(enum.Enum):
 
 class Room(Base):
     __tablename__ = "rooms"
+    __table_args__ = (
+        # Codes only need to be unique among live rooms, so codes of
+        # finished rooms can be recycled by the room code allocator.
+        Index(
+            "ix_rooms_code_live",
+            "code",
+            unique=True,
+            postgresql_where=text("status != 'FINISHED'"),
+        ),
+        # Live rooms by last update, for the stale sweeper
+        Index(
+            "ix_rooms_live_updated_at",
+            "updated_at",
+            postgresql_where=text("status != 'FINISHED'"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    code: Mapped[str] = mapped_column(String(6), unique=True, index=True)
+    code: Mapped[str] = mapped_column(String(6), index=True)
     name: Mapped[str] = mapped_column(String(100))
-    host_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    host_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     game_type: Mapped[str] = mapped_column(String(50))
     max_players: Mapped[int] = mapped_column(Integer, default=10)
     min_players: Mapped[int] = mapped_column(Integer, default=5)
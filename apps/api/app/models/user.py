@@ -1,4 +1,4 @@
-from sqlalchemy import String, Boolean, DateTime
+from sqlalchemy import String, Boolean, DateTime, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from typing import Optional, TYPE_CHECKING
@@ -11,6 +11,14 @@ if TYPE_CHECKING:
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Only guests are purged, oldest first (see app.services.guests)
+        Index(
+            "ix_users_guest_last_seen",
+            "last_seen_at",
+            postgresql_where=text("is_guest"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     username: Mapped[str] = mapped_column(String(50), unique=True, index=True)
@@ -24,6 +32,10 @@ class User(Base):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
+    # Updated in batches from socket connects
+    last_seen_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=True
+    )
 
     # Relationships
     hosted_rooms: Mapped[list["Room"]] = relationship(
@@ -1,9 +1,9 @@
-from app.schemas.user import UserCreate, UserResponse, UserUpdate
+from app.schemas.user import UserCreate, UserLogin, UserResponse, UserUpdate
 from app.schemas.room import RoomCreate, RoomResponse, RoomJoin
 from app.schemas.game import GameCreate, GameResponse, GameState
 
 __all__ = [
-    "UserCreate", "UserResponse", "UserUpdate",
+    "UserCreate", "UserLogin", "UserResponse", "UserUpdate",
     "RoomCreate", "RoomResponse", "RoomJoin",
     "GameCreate", "GameResponse", "GameState",
 ]
@@ -14,6 +14,11 @@ class UserCreate(UserBase):
     is_guest: bool = False
 
 
+class UserLogin(BaseModel):
+    username: str
+    password: str
+
+
 class UserUpdate(BaseModel):
     display_name: Optional[str] = None
     avatar_url: Optional[str] = None
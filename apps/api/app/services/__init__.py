@@ -1,14 +1,6 @@
-from app.services.avalon import (
-    AvalonGame,
-    AvalonPhase,
-    AvalonRole,
-    AvalonTeam,
-    get_game,
-    create_game,
-    remove_game,
-)
-
-__all__ = [
+# Avalon names are re-exported lazily so importing app.services
+# doesn't load the engine (see app.games for the engine registry).
+_AVALON_EXPORTS = [
     "AvalonGame",
     "AvalonPhase",
     "AvalonRole",
@@ -17,3 +9,13 @@ __all__ = [
     "create_game",
     "remove_game",
 ]
+
+
+def __getattr__(name):
+    if name in _AVALON_EXPORTS:
+        from app.services import avalon
+        return getattr(avalon, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = list(_AVALON_EXPORTS)
@@ -0,0 +1,328 @@
+"""
+Game Analytics
+
+Offline metrics over the game archive (see app.services.archive). Archived
+games are flattened once into columnar NumPy arrays - one row per game, per
+mission and per team vote - and every metric is a grouped count over those
+columns, so nothing walks game dicts after loading.
+
+Parsing JSON is the slow part, so columns are cached per segment in
+CACHE_DIR as .npz files. A segment is only parsed again when it grows (the
+one being written), and segments are parsed in parallel processes.
+
+    python -m app.services.analytics [ARCHIVE_DIR] [--cache DIR] [--export DIR] [--workers N]
+
+Needs numpy, which the API itself doesn't import.
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from app.services.archive import ArchiveReader, list_segments, segment_path
+
+CACHE_FORMAT = 1
+
+# Column name -> array typecode, for each table
+GAME_COLUMNS = {
+    "game_id": "q",
+    "players": "b",
+    "evil_won": "b",  # 1 evil, 0 good, -1 unfinished
+    "assassinated": "b",
+    "merlin_killed": "b",
+}
+MISSION_COLUMNS = {
+    "players": "b",
+    "round": "b",
+    "team_size": "b",
+    "fail_votes": "b",
+    "failed": "b",
+}
+TEAM_VOTE_COLUMNS = {
+    "players": "b",
+    "round": "b",
+    "vote_track": "b",  # Rejections in a row before this vote
+    "approve_count": "b",
+    "approved": "b",
+}
+TABLES = {"games": GAME_COLUMNS, "missions": MISSION_COLUMNS, "team_votes": TEAM_VOTE_COLUMNS}
+
+
+def _append_game(game: dict, columns: dict[str, dict[str, array]]):
+    result = game["result"]
+    players = result["players"]
+    roles = {p["user_id"]: p["role"] for p in players}
+    target = result.get("assassination_target")
+    winner = result.get("winner_team")
+
+    games = columns["games"]
+    games["game_id"].append(game["game_id"])
+    games["players"].append(len(players))
+    games["evil_won"].append(-1 if winner is None else int(winner == "evil"))
+    games["assassinated"].append(target is not None)
+    games["merlin_killed"].append(target is not None and roles.get(target) == "merlin")
+
+    missions = columns["missions"]
+    for mission in result["mission_history"]:
+        missions["players"].append(len(players))
+        missions["round"].append(mission["round"])
+        missions["team_size"].append(mission["team_size"])
+        missions["fail_votes"].append(sum(1 for vote in mission["mission_votes"] or () if not vote))
+        missions["failed"].append(mission["result"] == "fail")
+
+    # Rejected teams only show up in the action log
+    team_votes = columns["team_votes"]
+    current_round = 1
+    for entry in game["action_log"]:
+        if entry["action"] == "mission_result":
+            current_round += 1
+        elif entry["action"] == "team_vote_result":
+            payload = entry["payload"]
+            approved = payload["team_approved"]
+            team_votes["players"].append(len(players))
+            team_votes["round"].append(current_round)
+            team_votes["vote_track"].append(payload["vote_track"] - (0 if approved else 1))
+            team_votes["approve_count"].append(payload["approve_count"])
+            team_votes["approved"].append(approved)
+
+
+def scan_segment(directory, segment: int) -> dict[str, dict[str, np.ndarray]]:
+    """Parse one archive segment into column arrays"""
+    columns = {
+        table: {name: array(code) for name, code in spec.items()}
+        for table, spec in TABLES.items()
+    }
+    for game in ArchiveReader(directory).iter_games([segment]):
+        if game.get("game_type", "avalon") == "avalon":
+            _append_game(game, columns)
+    return {
+        table: {name: np.frombuffer(values, dtype=values.typecode) for name, values in table_columns.items()}
+        for table, table_columns in columns.items()
+    }
+
+
+class GameColumns:
+    """Columnar view of archived games: games, missions and team_votes tables"""
+
+    def __init__(self, parts: list[dict[str, dict[str, np.ndarray]]]):
+        self.tables: dict[str, dict[str, np.ndarray]] = {
+            table: {
+                name: np.concatenate([part[table][name] for part in parts])
+                if parts else np.array([], dtype=code)
+                for name, code in spec.items()
+            }
+            for table, spec in TABLES.items()
+        }
+
+    @property
+    def games(self) -> dict[str, np.ndarray]:
+        return self.tables["games"]
+
+    @property
+    def missions(self) -> dict[str, np.ndarray]:
+        return self.tables["missions"]
+
+    @property
+    def team_votes(self) -> dict[str, np.ndarray]:
+        return self.tables["team_votes"]
+
+    def __len__(self) -> int:
+        return len(self.games["game_id"])
+
+
+def _cache_file(cache_dir: Path, segment: int) -> Path:
+    return cache_dir / f"segment-{segment:06d}.npz"
+
+
+def _read_cache(cache_dir: Path, segment: int, size: int) -> Optional[dict]:
+    path = _cache_file(cache_dir, segment)
+    if not path.exists():
+        return None
+    with np.load(path) as cached:
+        if int(cached["_format"]) != CACHE_FORMAT or int(cached["_size"]) != size:
+            return None
+        return {
+            table: {name: cached[f"{table}.{name}"] for name in spec}
+            for table, spec in TABLES.items()
+        }
+
+
+def _write_cache(cache_dir: Path, segment: int, size: int, part: dict):
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = _cache_file(cache_dir, segment)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        np.savez(
+            f,
+            _format=CACHE_FORMAT,
+            _size=size,
+            **{f"{table}.{name}": values for table, columns in part.items() for name, values in columns.items()},
+        )
+    os.replace(tmp, path)
+
+
+def load_columns(archive_dir, cache_dir=None, workers: Optional[int] = None) -> GameColumns:
+    """Columns for every archived game, parsing only segments that aren't cached yet"""
+    archive_dir = Path(archive_dir)
+    cache_dir = Path(cache_dir) if cache_dir else archive_dir / "analytics-cache"
+
+    segments = list_segments(archive_dir)
+    sizes = {segment: segment_path(archive_dir, segment).stat().st_size for segment in segments}
+    parts = {segment: _read_cache(cache_dir, segment, sizes[segment]) for segment in segments}
+    missing = [segment for segment, part in parts.items() if part is None]
+
+    if missing:
+        started = time.perf_counter()
+        if len(missing) > 1 and workers != 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                scanned = pool.map(scan_segment, [archive_dir] * len(missing), missing)
+                parts.update(zip(missing, scanned))
+        else:
+            parts.update((segment, scan_segment(archive_dir, segment)) for segment in missing)
+        for segment in missing:
+            _write_cache(cache_dir, segment, sizes[segment], parts[segment])
+        print(f"[analytics] Parsed {len(missing)} of {len(segments)} segments "
+              f"in {time.perf_counter() - started:.2f}s")
+
+    return GameColumns([parts[segment] for segment in segments])
+
+
+def _rate_table(keys: dict[str, np.ndarray], hits: np.ndarray, count_name: str, rate_name: str) -> list[dict]:
+    """Count rows and the share of `hits` per distinct combination of key columns"""
+    if not len(hits):
+        return []
+    # Keys are small integer codes, so combine them into one flat index and count with bincount
+    lows = [int(values.min()) for values in keys.values()]
+    dims = [int(values.max()) - low + 1 for values, low in zip(keys.values(), lows)]
+    flat = np.ravel_multi_index(
+        [values.astype(np.int64) - low for values, low in zip(keys.values(), lows)], dims
+    )
+    totals = np.bincount(flat, minlength=int(np.prod(dims)))
+    hit_totals = np.bincount(flat, weights=hits, minlength=len(totals))
+    present = np.flatnonzero(totals)
+    groups = np.stack(np.unravel_index(present, dims), axis=1) + lows
+    totals, hit_totals = totals[present], hit_totals[present]
+    return [
+        {
+            **{name: int(value) for name, value in zip(keys, group)},
+            count_name: int(total),
+            rate_name: round(float(hit_total / total), 4),
+        }
+        for group, total, hit_total in zip(groups, totals, hit_totals)
+    ]
+
+
+def mission_fail_rates(columns: GameColumns) -> list[dict]:
+    """Fail rate of each mission round by player count"""
+    missions = columns.missions
+    return _rate_table(
+        {"players": missions["players"], "round": missions["round"]},
+        missions["failed"], "missions", "fail_rate",
+    )
+
+
+def approval_by_vote_track(columns: GameColumns, by_players: bool = False) -> list[dict]:
+    """Team approval rate by the number of rejections in a row before the vote"""
+    votes = columns.team_votes
+    keys = {"vote_track": votes["vote_track"]}
+    if by_players:
+        keys = {"players": votes["players"], **keys}
+    return _rate_table(keys, votes["approved"], "team_votes", "approval_rate")
+
+
+def assassin_hit_rates(columns: GameColumns) -> list[dict]:
+    """Share of assassinations that killed Merlin, by player count"""
+    games = columns.games
+    assassinated = games["assassinated"] == 1
+    return _rate_table(
+        {"players": games["players"][assassinated]},
+        games["merlin_killed"][assassinated], "assassinations", "hit_rate",
+    )
+
+
+def evil_win_rates(columns: GameColumns) -> list[dict]:
+    """Evil win rate of finished games by player count"""
+    games = columns.games
+    finished = games["evil_won"] >= 0
+    return _rate_table(
+        {"players": games["players"][finished]},
+        games["evil_won"][finished], "games", "evil_win_rate",
+    )
+
+
+def summary_tables(columns: GameColumns) -> dict[str, list[dict]]:
+    return {
+        "mission_fail_rates": mission_fail_rates(columns),
+        "approval_by_vote_track": approval_by_vote_track(columns),
+        "approval_by_players_and_vote_track": approval_by_vote_track(columns, by_players=True),
+        "assassin_hit_rates": assassin_hit_rates(columns),
+        "evil_win_rates": evil_win_rates(columns),
+    }
+
+
+def export_tables(tables: dict[str, list[dict]], directory) -> list[Path]:
+    """Write each table to <directory>/<name>.csv"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for name, rows in tables.items():
+        path = directory / f"{name}.csv"
+        with open(path, "w", newline="") as f:
+            if rows:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+        paths.append(path)
+    return paths
+
+
+def _print_table(name: str, rows: list[dict]):
+    print(f"\n{name}")
+    if not rows:
+        print("  (no data)")
+        return
+    headers = list(rows[0])
+    widths = [max(len(h), *(len(str(row[h])) for row in rows)) for h in headers]
+    print("  " + "  ".join(h.rjust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  " + "  ".join(str(row[h]).rjust(w) for h, w in zip(headers, widths)))
+
+
+def main():
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description="Metrics over the game archive")
+    parser.add_argument("archive_dir", nargs="?", default=settings.archive_dir)
+    parser.add_argument("--cache", default=None, help="Column cache (default: ARCHIVE_DIR/analytics-cache)")
+    parser.add_argument("--export", default=None, help="Write every table as CSV to this directory")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    args = parser.parse_args()
+    if not args.archive_dir:
+        parser.error("no archive directory (pass one or set ARCHIVE_DIR)")
+
+    started = time.perf_counter()
+    columns = load_columns(args.archive_dir, args.cache, args.workers)
+    loaded = time.perf_counter()
+    tables = summary_tables(columns)
+    computed = time.perf_counter()
+
+    print(f"{len(columns)} games, {len(columns.missions['round'])} missions, "
+          f"{len(columns.team_votes['round'])} team votes "
+          f"(load {loaded - started:.2f}s, metrics {computed - loaded:.3f}s)")
+    for name, rows in tables.items():
+        _print_table(name, rows)
+    if args.export:
+        paths = export_tables(tables, args.export)
+        print(f"\nExported {len(paths)} tables to {args.export}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""
+Game Archive
+
+Append-only file archive of finished games for offline analysis, so exports
+don't have to page through Postgres.
+
+Layout of ARCHIVE_DIR:
+- segment-000001.jsonl.gz, ...: one JSON line per game. Every line is its own
+  gzip member, so a segment is still a plain .jsonl.gz (zcat, gzip.open) and
+  a single game can be decompressed on its own from its offset. A segment is
+  rotated once it reaches ARCHIVE_SEGMENT_BYTES.
+- index.bin: fixed-width slots addressed by game_id (slot = game_id * 16
+  bytes: segment u32, offset u64, length u32). Game IDs are sequential, so
+  the file stays small (16 MB per million games) and holes for missing IDs
+  are sparse. Readers mmap it and find a game in O(1).
+
+Games are written to the segment before their index slot, so a crash can
+leave at most an unindexed (or truncated) last line, never a slot that
+points at missing data. Archiving a game again appends a new line and
+repoints its slot; lookups return the latest copy.
+
+Several API processes may share ARCHIVE_DIR: every append holds an exclusive
+flock on index.bin, and takes the offset from the segment's size on disk and
+the current segment from the directory, not from its own file handle.
+"""
+
+import asyncio
+import fcntl
+import gzip
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Iterator, Optional
+
+INDEX_FILE = "index.bin"
+INDEX_SLOT = struct.Struct("<IQI")  # segment, offset, compressed length
+SEGMENT_PATTERN = re.compile(r"^segment-(\d{6})\.jsonl\.gz$")
+
+
+def segment_path(directory: Path, segment: int) -> Path:
+    return directory / f"segment-{segment:06d}.jsonl.gz"
+
+
+def list_segments(directory: Path) -> list[int]:
+    if not directory.is_dir():
+        return []
+    return sorted(
+        int(match.group(1))
+        for match in (SEGMENT_PATTERN.match(name) for name in os.listdir(directory))
+        if match
+    )
+
+
+def _compress_line(record: dict) -> bytes:
+    line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip member
+    return compressor.compress(line.encode()) + compressor.flush()
+
+
+class ArchiveWriter:
+    """
+    Appends games to the current segment. Thread-safe, and safe across
+    processes sharing the directory; calls block on disk I/O.
+    """
+
+    def __init__(self, directory, segment_bytes: int = 64 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._segment = 0
+        self._segment_fd: Optional[int] = None
+        self._index_fd: Optional[int] = None
+
+    def _open(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._index_fd = os.open(self.directory / INDEX_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def _open_segment(self, segment: int):
+        if self._segment_fd is not None:
+            os.close(self._segment_fd)
+        self._segment = segment
+        self._segment_fd = os.open(
+            segment_path(self.directory, segment), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644
+        )
+
+    def _sync_segment(self):
+        """Switch to the newest segment (another process may have rotated). Holds the flock."""
+        if self._segment_fd is None:
+            segments = list_segments(self.directory)
+            self._open_segment(segments[-1] if segments else 1)
+        while segment_path(self.directory, self._segment + 1).exists():
+            self._open_segment(self._segment + 1)
+
+    def append(self, game_id: int, record: dict) -> tuple[int, int, int]:
+        """Archive one game. Returns its (segment, offset, length)."""
+        data = _compress_line(record)
+        with self._lock:
+            if self._index_fd is None:
+                self._open()
+            fcntl.flock(self._index_fd, fcntl.LOCK_EX)
+            try:
+                self._sync_segment()
+                offset = os.fstat(self._segment_fd).st_size
+                if offset and offset + len(data) > self.segment_bytes:
+                    self._open_segment(self._segment + 1)
+                    offset = os.fstat(self._segment_fd).st_size
+
+                written = 0
+                while written < len(data):
+                    written += os.write(self._segment_fd, data[written:])
+                os.pwrite(
+                    self._index_fd,
+                    INDEX_SLOT.pack(self._segment, offset, len(data)),
+                    game_id * INDEX_SLOT.size,
+                )
+                return self._segment, offset, len(data)
+            finally:
+                fcntl.flock(self._index_fd, fcntl.LOCK_UN)
+
+    def close(self):
+        with self._lock:
+            if self._segment_fd is not None:
+                os.close(self._segment_fd)
+                self._segment_fd = None
+            if self._index_fd is not None:
+                os.close(self._index_fd)
+                self._index_fd = None
+
+
+class ArchiveReader:
+    """Random access by game_id through the mmapped index, and streaming scans"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._index: Optional[mmap.mmap] = None
+        self._index_file = None
+
+    def _index_map(self, needed: int) -> Optional[mmap.mmap]:
+        # Remap when the writer has grown the index past what we mapped
+        if self._index is not None and len(self._index) >= needed:
+            return self._index
+        path = self.directory / INDEX_FILE
+        if not path.exists() or path.stat().st_size < needed:
+            return None
+        self.close()
+        self._index_file = open(path, "rb")
+        self._index = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._index
+
+    def locate(self, game_id: int) -> Optional[tuple[int, int, int]]:
+        """(segment, offset, length) of a game, or None if it isn't archived"""
+        if game_id < 0:
+            return None
+        start = game_id * INDEX_SLOT.size
+        index = self._index_map(start + INDEX_SLOT.size)
+        if index is None:
+            return None
+        segment, offset, length = INDEX_SLOT.unpack_from(index, start)
+        return (segment, offset, length) if length else None
+
+    def get(self, game_id: int) -> Optional[dict]:
+        location = self.locate(game_id)
+        if location is None:
+            return None
+        segment, offset, length = location
+        with open(segment_path(self.directory, segment), "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+        return json.loads(zlib.decompress(data, 31))
+
+    def iter_games(self, segments: Optional[list[int]] = None) -> Iterator[dict]:
+        """Stream every archived game in write order, one line in memory at a time"""
+        for segment in segments if segments is not None else list_segments(self.directory):
+            path = segment_path(self.directory, segment)
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    for line in f:
+                        yield json.loads(line)
+            except (EOFError, gzip.BadGzipFile, zlib.error, json.JSONDecodeError) as e:
+                # Only the tail of the segment being written when a worker crashed
+                print(f"[archive] Stopped reading {path.name} at a damaged record: {e}")
+
+    def close(self):
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+
+
+_writer: Optional[ArchiveWriter] = None
+
+
+def get_writer() -> Optional[ArchiveWriter]:
+    """Process-wide writer for ARCHIVE_DIR (None when archiving is disabled)"""
+    global _writer
+    from app.config import settings
+
+    if not settings.archive_dir:
+        return None
+    if _writer is None:
+        _writer = ArchiveWriter(settings.archive_dir, settings.archive_segment_bytes)
+    return _writer
+
+
+async def archive_game(game_id: int, record: dict) -> bool:
+    """Append a finished game to the archive off the event loop. Returns False if disabled."""
+    writer = get_writer()
+    if writer is None:
+        return False
+    await asyncio.to_thread(writer.append, game_id, record)
+    return True
+
+
+def close_archive():
+    global _writer
+    if _writer is not None:
+        _writer.close()
+        _writer = None
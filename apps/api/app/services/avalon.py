@@ -4,11 +4,17 @@ Avalon Game Service
 Implements the game logic for The Resistance: Avalon.
 """
 
+import asyncio
 import random
+import time
 from typing import Optional
 from enum import Enum
 from dataclasses import dataclass, field
 
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.games.registry import GameEngine
+
 
 class AvalonPhase(str, Enum):
     NIGHT = "night"
@@ -170,10 +176,17 @@ class AvalonGameState:
     winner_team: Optional[AvalonTeam] = None
     assassination_target: Optional[int] = None
 
+    # Bumped on every state change (used to key cached payloads)
+    version: int = 0
+
+    # Ordered log of actions (for replays once the game is over)
+    action_log: list[dict] = field(default_factory=list)
+
     def to_dict(self) -> dict:
         return {
             "game_id": self.game_id,
             "room_id": self.room_id,
+            "version": self.version,
             "players": [p.to_public_dict() for p in self.players],
             "phase": self.phase.value,
             "current_round": self.current_round,
@@ -213,6 +226,24 @@ class AvalonGame:
 
     def __init__(self, game_id: int, room_id: int):
         self.state = AvalonGameState(game_id=game_id, room_id=room_id)
+        # Player views of the current version (see get_player_view_cached)
+        self._views: dict[int, dict] = {}
+        self._views_version = -1
+
+    def _log_action(
+        self,
+        action: str,
+        user_id: Optional[int] = None,
+        payload: Optional[dict] = None,
+        at: Optional[float] = None,
+    ):
+        self.state.action_log.append({
+            "seq": len(self.state.action_log) + 1,
+            "action": action,
+            "user_id": user_id,
+            "payload": payload or {},
+            "at": at or time.time(),
+        })
 
     def initialize_game(self, players: list[dict]) -> dict:
         """
@@ -244,6 +275,11 @@ class AvalonGame:
 
         # Move to team selection phase
         self.state.phase = AvalonPhase.TEAM_SELECTION
+        self.state.version += 1
+        self._log_action("game_started", payload={
+            "players": [p.to_dict() for p in self.state.players],
+            "leader_id": self.state.get_current_leader_id(),
+        })
 
         return self.state.to_dict()
 
@@ -284,6 +320,19 @@ class AvalonGame:
 
         return view
 
+    def get_player_view_cached(self, user_id: int) -> dict:
+        """
+        get_player_view, computed once per player per state version.
+        Callers must not modify the returned dict.
+        """
+        if self._views_version != self.state.version:
+            self._views = {}
+            self._views_version = self.state.version
+        view = self._views.get(user_id)
+        if view is None:
+            view = self._views[user_id] = self.get_player_view(user_id)
+        return view
+
     def _get_known_info(self, player: AvalonPlayer) -> list[dict]:
         """
         Get information visible to this player based on their role.
@@ -413,6 +462,8 @@ class AvalonGame:
         self.state.proposed_team = team_members
         self.state.team_votes = {}
         self.state.phase = AvalonPhase.TEAM_VOTE
+        self.state.version += 1
+        self._log_action("propose_team", leader_id, {"team": team_members})
 
         return {
             "success": True,
@@ -435,6 +486,8 @@ class AvalonGame:
             raise ValueError("Invalid player")
 
         self.state.team_votes[player_id] = approve
+        self.state.version += 1
+        self._log_action("vote_team", player_id, {"approve": approve})
 
         # Check if all players have voted
         if len(self.state.team_votes) == len(self.state.players):
@@ -454,6 +507,12 @@ class AvalonGame:
 
         # Team is approved if majority approves
         approved = approve_count > reject_count
+        self._log_action("team_vote_result", payload={
+            "team_approved": approved,
+            "approve_count": approve_count,
+            "reject_count": reject_count,
+            "vote_track": self.state.vote_track + (0 if approved else 1),
+        })
 
         if approved:
             # Team approved - move to mission phase
@@ -537,6 +596,9 @@ class AvalonGame:
             raise ValueError("Good team members must vote success")
 
         self.state.mission_votes[player_id] = success
+        self.state.version += 1
+        # Individual mission votes stay secret, even in replays
+        self._log_action("vote_mission", player_id)
 
         # Check if all team members have voted
         if len(self.state.mission_votes) == len(self.state.proposed_team):
@@ -580,6 +642,11 @@ class AvalonGame:
             result=result_str,
         )
         self.state.mission_history.append(mission_record)
+        self._log_action("mission_result", payload={
+            "round": completed_round,
+            "result": result_str,
+            "fail_count": fail_count,
+        })
 
         # Check for game end
         if self.state.success_count >= 3:
@@ -641,6 +708,30 @@ class AvalonGame:
             "mission_votes_shuffled": votes_list,
         }
 
+    def apply_ballot(self, kind: str, votes: dict[int, tuple[bool, float]]) -> dict:
+        """
+        Apply a complete ballot collected outside this object (stateless mode,
+        see avalon_ballot) and resolve it.
+        votes: user_id -> (vote, time cast), already validated by the ballot.
+        """
+        expected = AvalonPhase.TEAM_VOTE if kind == "team" else AvalonPhase.MISSION
+        if self.state.phase != expected:
+            raise ValueError(f"Ballot for {kind} does not match phase {self.state.phase.value}")
+
+        # Votes are logged in the order they were cast
+        for user_id, (vote, cast_at) in sorted(votes.items(), key=lambda item: item[1][1]):
+            self.state.version += 1
+            if kind == "team":
+                self.state.team_votes[user_id] = vote
+                self._log_action("vote_team", user_id, {"approve": vote}, at=cast_at)
+            else:
+                self.state.mission_votes[user_id] = vote
+                self._log_action("vote_mission", user_id, at=cast_at)
+
+        if kind == "team":
+            return self._resolve_team_vote()
+        return self._resolve_mission()
+
     def assassinate(self, assassin_id: int, target_id: int) -> dict:
         """
         Assassin attempts to kill Merlin.
@@ -661,6 +752,11 @@ class AvalonGame:
 
         self.state.assassination_target = target_id
         self.state.phase = AvalonPhase.GAME_OVER
+        self.state.version += 1
+        self._log_action("assassinate", assassin_id, {
+            "target_id": target_id,
+            "merlin_killed": target.role == AvalonRole.MERLIN,
+        })
 
         if target.role == AvalonRole.MERLIN:
             # Assassin killed Merlin - Evil wins!
@@ -701,6 +797,7 @@ class AvalonGame:
     def get_full_state(self) -> dict:
         """Get the complete game state (for storage)"""
         return {
+            "game_type": "avalon",
             "game_id": self.state.game_id,
             "room_id": self.state.room_id,
             "players": [p.to_dict() for p in self.state.players],
@@ -717,6 +814,8 @@ class AvalonGame:
             "mission_history": [m.to_dict() for m in self.state.mission_history],
             "winner_team": self.state.winner_team.value if self.state.winner_team else None,
             "assassination_target": self.state.assassination_target,
+            "version": self.state.version,
+            "action_log": self.state.action_log,
         }
 
     @classmethod
@@ -762,6 +861,8 @@ class AvalonGame:
         if state_dict.get("winner_team"):
             game.state.winner_team = AvalonTeam(state_dict["winner_team"])
         game.state.assassination_target = state_dict.get("assassination_target")
+        game.state.version = state_dict.get("version", 0)
+        game.state.action_log = state_dict.get("action_log", [])
 
         return game
 
@@ -769,6 +870,46 @@ class AvalonGame:
 # In-memory cache for active games (backed by Redis for persistence)
 _active_games: dict[int, AvalonGame] = {}
 
+# Version of each game last written to Redis (to find unsaved changes)
+_saved_versions: dict[int, int] = {}
+
+# Room code -> ID of its game in _active_games (rejoin without a Redis lookup)
+_room_games: dict[str, int] = {}
+
+# In-flight Redis loads by room, shared by concurrent rejoins of the same room
+_room_loads: dict[str, asyncio.Future] = {}
+
+# When each game in _active_games was last loaded or saved (monotonic, for idle eviction)
+_touched_at: dict[int, float] = {}
+
+
+def _cache_game(state: dict) -> AvalonGame:
+    """
+    Cache a game loaded from Redis. The cached object is kept unless Redis has
+    a newer version: an older one means the cached game has changes not saved
+    yet (partial votes aren't saved in memory mode).
+    """
+    game_id = state["game_id"]
+    cached = _active_games.get(game_id)
+    if cached and cached.state.version >= state.get("version", 0):
+        return cached
+
+    game = AvalonGame.from_state(state)
+    _active_games[game_id] = game
+    _saved_versions[game_id] = game.state.version
+    _room_games[str(game.state.room_id)] = game_id
+    _touched_at[game_id] = time.monotonic()
+    return game
+
+
+def _forget_game(game_id: int) -> Optional[AvalonGame]:
+    game = _active_games.pop(game_id, None)
+    _saved_versions.pop(game_id, None)
+    _touched_at.pop(game_id, None)
+    if game and _room_games.get(str(game.state.room_id)) == game_id:
+        del _room_games[str(game.state.room_id)]
+    return game
+
 
 def get_game(game_id: int) -> Optional[AvalonGame]:
     """Get an active game by ID from memory cache"""
@@ -784,11 +925,13 @@ async def get_game_async(game_id: int) -> Optional[AvalonGame]:
         return _active_games[game_id]
 
     # Try to restore from Redis
-    state = await redis_client.get_game_state(game_id)
+    try:
+        state = await redis_client.get_game_state(game_id)
+    except RedisConnectionError as e:
+        print(f"[get_game_async] Redis unavailable, game {game_id} not in memory: {e}")
+        return None
     if state:
-        game = AvalonGame.from_state(state)
-        _active_games[game_id] = game
-        return game
+        return _cache_game(state)
 
     return None
 
@@ -798,44 +941,228 @@ def create_game(game_id: int, room_id: int, players: list[dict]) -> AvalonGame:
     game = AvalonGame(game_id, room_id)
     game.initialize_game(players)
     _active_games[game_id] = game
+    _room_games[str(room_id)] = game_id
+    _touched_at[game_id] = time.monotonic()
     return game
 
 
+async def reload_game(game_id: int) -> Optional[AvalonGame]:
+    """
+    Load a game from Redis even if it's in memory. Used in stateless mode,
+    where another worker may have changed it since it was cached.
+    """
+    from app.db.redis import redis_client
+
+    state = await redis_client.get_game_state(game_id)
+    if not state:
+        return None
+    return _cache_game(state)
+
+
 async def save_game(game: AvalonGame):
-    """Save game state to Redis for persistence"""
+    """
+    Save game state to Redis for persistence.
+    While Redis is unavailable the game keeps running from memory and the
+    writes are replayed once it recovers.
+    """
     from app.db.redis import redis_client
 
+    game_id = game.state.game_id
+    room_id = str(game.state.room_id)
     state = game.get_full_state()
-    await redis_client.save_game_state(game.state.game_id, state)
+    _touched_at[game_id] = time.monotonic()
+    saved = await redis_client.write_or_defer(
+        f"game:{game_id}:state", "save_game_state", game_id, state
+    )
     # Also map room to game ID for reconnection
-    await redis_client.set_room_game_id(str(game.state.room_id), game.state.game_id)
+    mapped = await redis_client.write_or_defer(
+        f"room:{room_id}:game", "set_room_game_id", room_id, game_id
+    )
+    if saved and mapped:
+        _saved_versions[game_id] = state["version"]
+
+
+async def flush_games() -> int:
+    """Save every game with changes not yet written to Redis (graceful shutdown)"""
+    dirty = [
+        game for game in list(_active_games.values())
+        if _saved_versions.get(game.state.game_id) != game.state.version
+    ]
+    for game in dirty:
+        try:
+            await save_game(game)
+        except Exception as e:
+            print(f"[flush_games] Failed to save game {game.state.game_id}: {e}")
+    return len(dirty)
+
+
+async def restore_games() -> int:
+    """Load every active game from Redis into memory (warm-up after a restart)"""
+    from app.db.redis import redis_client
+
+    restored = 0
+    for state in await redis_client.get_active_game_states():
+        if state.get("game_type", "avalon") != "avalon" or state["game_id"] in _active_games:
+            continue
+        _cache_game(state)
+        restored += 1
+    return restored
+
+
+async def release_games(keep) -> int:
+    """Save and drop from memory the games `keep(game_id)` rejects (owned by another worker now)"""
+    released = [game_id for game_id in list(_active_games) if not keep(game_id)]
+    for game_id in released:
+        game = _active_games[game_id]
+        if _saved_versions.get(game_id) != game.state.version:
+            await save_game(game)
+        _forget_game(game_id)
+    return len(released)
+
+
+async def evict_idle_games(idle: float) -> int:
+    """Save and drop from memory the games not loaded or saved for `idle` seconds"""
+    cutoff = time.monotonic() - idle
+    evicted = [game_id for game_id, touched_at in list(_touched_at.items()) if touched_at < cutoff]
+    for game_id in evicted:
+        game = _active_games.get(game_id)
+        if game and _saved_versions.get(game_id) != game.state.version:
+            await save_game(game)
+        _forget_game(game_id)
+    return len(evicted)
+
+
+async def persist_finished_game(game: AvalonGame):
+    """Record the result and action log of a finished game in Postgres (for replays)"""
+    from datetime import datetime
+    from sqlalchemy import insert, update
+    from app.db.database import AsyncSessionLocal
+    from app.models.game import Game, GameAction, GameStatus
+
+    # Runs as a background job: errors propagate so the job is retried
+    result = game.get_game_result()
+    action_log = game.state.action_log
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(Game)
+            .where(Game.id == game.state.game_id)
+            .values(
+                status=GameStatus.FINISHED,
+                current_round=game.state.current_round,
+                winner_team=result["winner_team"],
+                players=result["players"],
+                state=result,
+                started_at=datetime.utcfromtimestamp(action_log[0]["at"]) if action_log else None,
+                finished_at=datetime.utcnow(),
+            )
+        )
+        if action_log:
+            await session.execute(
+                insert(GameAction),
+                [
+                    {
+                        "game_id": game.state.game_id,
+                        "seq": entry["seq"],
+                        "action": entry["action"],
+                        "user_id": entry["user_id"],
+                        "payload": entry["payload"],
+                        "created_at": datetime.utcfromtimestamp(entry["at"]),
+                    }
+                    for entry in action_log
+                ],
+            )
+        await session.commit()
+
+
+async def archive_finished_game(game: AvalonGame):
+    """Append a finished game to the file archive (when ARCHIVE_DIR is set)"""
+    from app.services.archive import archive_game
+
+    await archive_game(game.state.game_id, {
+        "game_id": game.state.game_id,
+        "game_type": "avalon",
+        "room_id": game.state.room_id,
+        "finished_at": time.time(),
+        "result": game.get_game_result(),
+        "action_log": game.state.action_log,
+    })
 
 
 def remove_game(game_id: int):
     """Remove a game from memory cache"""
-    if game_id in _active_games:
-        del _active_games[game_id]
+    _forget_game(game_id)
 
 
 async def remove_game_async(game_id: int, room_id: str = None):
     """Remove a game from memory and Redis"""
     from app.db.redis import redis_client
 
-    if game_id in _active_games:
-        if room_id is None:
-            room_id = str(_active_games[game_id].state.room_id)
-        del _active_games[game_id]
+    game = _forget_game(game_id)
+    if game and room_id is None:
+        room_id = str(game.state.room_id)
 
-    await redis_client.delete_game_state(game_id)
+    await redis_client.write_or_defer(f"game:{game_id}:state", "delete_game_state", game_id)
     if room_id:
-        await redis_client.delete_room_game_id(room_id)
+        # Own replay key: the delete is conditional, so it mustn't replace a newer game's mapping
+        await redis_client.write_or_defer(
+            f"room:{room_id}:game:{game_id}", "delete_room_game_id", room_id, game_id
+        )
 
 
-async def get_game_by_room(room_id: str) -> Optional[AvalonGame]:
-    """Get active game for a room (for reconnection)"""
+async def get_game_by_room(room_id: str, fresh: bool = False) -> Optional[AvalonGame]:
+    """
+    Get active game for a room (for reconnection).
+    Served from memory when cached; otherwise the room mapping and game state
+    come back in one Redis round trip. `fresh` always checks Redis (the
+    cached object is still reused if Redis has the same version).
+    """
     from app.db.redis import redis_client
 
-    game_id = await redis_client.get_room_game_id(room_id)
-    if game_id:
-        return await get_game_async(game_id)
+    room_id = str(room_id)
+    if not fresh:
+        game_id = _room_games.get(room_id)
+        if game_id in _active_games:
+            return _active_games[game_id]
+
+    load = _room_loads.get(room_id)
+    if load is None:
+        load = asyncio.ensure_future(redis_client.get_room_game_state(room_id))
+        _room_loads[room_id] = load
+        load.add_done_callback(lambda _: _room_loads.pop(room_id, None))
+
+    try:
+        state = await asyncio.shield(load)
+    except RedisConnectionError:
+        # Memory-only fallback
+        game_id = _room_games.get(room_id)
+        return _active_games.get(game_id) if game_id else None
+    if state:
+        return _cache_game(state)
     return None
+
+
+ENGINE = GameEngine(
+    game_type="avalon",
+    display_name="아발론",
+    min_players=5,
+    max_players=10,
+    rules={
+        "team_sizes": TEAM_SIZES,
+        "evil_count": EVIL_COUNT,
+        "fail_requirement": FAIL_REQUIREMENT,
+        "roles_config": ROLES_CONFIG,
+    },
+    create_game=create_game,
+    get_game=get_game,
+    load_game=get_game_async,
+    reload_game=reload_game,
+    load_game_by_room=get_game_by_room,
+    save_game=save_game,
+    remove_game=remove_game_async,
+    persist_result=persist_finished_game,
+    archive_result=archive_finished_game,
+    flush_games=flush_games,
+    restore_games=restore_games,
+    release_games=release_games,
+    evict_idle_games=evict_idle_games,
+)
@@ -0,0 +1,111 @@
+"""
+Stateless Avalon Votes
+
+Alternative to voting on the worker's in-process AvalonGame
+(GAME_EXECUTION_MODE=redis). Each game's open vote lives in a compact
+Redis hash (game:{id}:ballot), and a Lua script validates and records a
+vote in one round trip, so any worker can take any vote without sticky
+routing or a lock. The worker that casts the last vote gets the whole
+ballot back and resolves it on the game loaded fresh from Redis.
+
+Until then the votes are only in the ballot, not in the saved game, so views
+built for rejoining players merge them in (with_pending_votes).
+"""
+
+import time
+from typing import Optional
+
+from app.services.avalon import AvalonGame, AvalonPhase, AvalonTeam, reload_game, save_game
+
+
+def ballot_fields(game: AvalonGame) -> Optional[dict]:
+    """Compact ballot hash for the game's current phase (None if nobody votes)"""
+    state = game.state
+    if state.phase == AvalonPhase.TEAM_VOTE:
+        voters = [p.user_id for p in state.players]
+        kind, cast = "team", state.team_votes
+    elif state.phase == AvalonPhase.MISSION:
+        voters = state.proposed_team
+        kind, cast = "mission", state.mission_votes
+    else:
+        return None
+
+    fields = {
+        "kind": kind,
+        "voters": ",".join(str(user_id) for user_id in voters),
+        "evil": ",".join(str(p.user_id) for p in state.players if p.team == AvalonTeam.EVIL),
+        "needed": len(voters),
+        "count": len(cast),
+        "version": state.version,
+    }
+    # Votes cast in memory before switching modes carry over
+    now = time.time()
+    for user_id, vote in cast.items():
+        fields[f"v:{user_id}"] = f"{'1' if vote else '0'}|{now!r}"
+    return fields
+
+
+async def open_ballot(game: AvalonGame):
+    """Open (or close) voting in Redis to match the game's phase"""
+    from app.db.redis import redis_client
+
+    await redis_client.open_ballot(game.state.game_id, ballot_fields(game))
+
+
+async def with_pending_votes(game: AvalonGame) -> AvalonGame:
+    """
+    The game with the votes cast so far on its open ballot, for building views.
+    Returns a copy when there are any, so the cached game keeps its saved version.
+    """
+    from app.db.redis import redis_client
+
+    ballot = await redis_client.get_ballot_votes(game.state.game_id)
+    if not ballot:
+        return game
+    kind, votes = ballot
+    if kind == "team" and game.state.phase == AvalonPhase.TEAM_VOTE:
+        cast = game.state.team_votes
+    elif kind == "mission" and game.state.phase == AvalonPhase.MISSION:
+        cast = game.state.mission_votes
+    else:
+        return game
+    if votes.keys() <= cast.keys():
+        return game
+
+    merged = AvalonGame.from_state(game.get_full_state())
+    target = merged.state.team_votes if kind == "team" else merged.state.mission_votes
+    target.update(votes)
+    return merged
+
+
+async def cast_vote(game_id: int, kind: str, user_id: int, vote: bool) -> dict:
+    """
+    Record a vote in one round trip.
+    Returns {votes_count, needed, votes}; votes is only set for the last vote.
+    Raises ValueError if the vote breaks the rules.
+    """
+    from redis.exceptions import ResponseError
+
+    from app.db.redis import redis_client
+
+    try:
+        count, needed, votes = await redis_client.cast_ballot_vote(
+            game_id, kind, user_id, vote, time.time()
+        )
+    except ResponseError as e:
+        raise ValueError(str(e)) from e
+    return {"votes_count": count, "needed": needed, "votes": votes}
+
+
+async def resolve_ballot(
+    game_id: int, kind: str, votes: dict[int, tuple[bool, float]]
+) -> tuple[Optional[AvalonGame], Optional[dict]]:
+    """Apply a complete ballot to the latest game state, save it and open the next ballot"""
+    game = await reload_game(game_id)
+    if not game:
+        return None, None
+
+    result = game.apply_ballot(kind, votes)
+    await save_game(game)
+    await open_ballot(game)
+    return game, result
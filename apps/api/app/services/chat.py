@@ -0,0 +1,59 @@
+"""
+Chat History Service
+
+Keeps a capped, per-room chat history in a Redis stream so reconnecting
+clients can page back through recent messages.
+"""
+
+import re
+from typing import Optional
+
+from app.config import settings
+from app.db.redis import redis_client
+
+
+CHAT_HISTORY_PAGE_MAX = 100
+
+# Stream entry IDs: <ms>-<seq>, both unsigned 64-bit
+_CURSOR_PATTERN = re.compile(r"^(\d{1,20})-(\d{1,20})$")
+
+
+async def record_chat_messages(room_id: str, messages: list[dict]):
+    """Append messages to the room history (one Redis round trip)"""
+    try:
+        await redis_client.append_chat_messages(
+            room_id,
+            messages,
+            max_len=settings.chat_history_size,
+            expire=settings.chat_history_ttl,
+        )
+    except Exception as e:
+        print(f"[chat] Failed to record {len(messages)} messages for room {room_id}: {e}")
+
+
+def _parse_page(before, limit) -> tuple[Optional[str], int]:
+    if before is not None:
+        match = _CURSOR_PATTERN.match(before) if isinstance(before, str) else None
+        if not match or any(int(part) >= 2 ** 64 for part in match.groups()):
+            raise ValueError("Invalid cursor")
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid limit")
+    return before, max(1, min(limit, CHAT_HISTORY_PAGE_MAX))
+
+
+async def get_chat_history(room_id: str, before: Optional[str] = None, limit: int = 50) -> dict:
+    """
+    Get a page of chat history, oldest first.
+    Pass the returned next_cursor as `before` to fetch the previous page.
+    Raises ValueError for a malformed cursor or limit.
+    """
+    before, limit = _parse_page(before, limit)
+    messages = await redis_client.get_chat_messages(room_id, before=before, count=limit)
+    next_cursor = messages[0]["id"] if len(messages) == limit else None
+    return {
+        "room_id": room_id,
+        "messages": messages,
+        "next_cursor": next_cursor,
+    }
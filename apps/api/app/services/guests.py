@@ -0,0 +1,266 @@
+"""
+Guest User Lifecycle
+
+Every visitor gets a guest user, so this is the hottest write on the users
+table:
+
+- Creation is batched: concurrent requests within `guest_batch_wait_ms`
+  share one multi-row INSERT ... ON CONFLICT DO NOTHING RETURNING, on one
+  pooled connection, instead of an insert + flush + refresh each. Generated
+  usernames that collide are skipped by the unique index and retried with
+  new names in the next statement.
+- Activity: socket connects mark users as seen; the IDs are written in one
+  UPDATE every `user_activity_flush_seconds`.
+- Purge: guests not seen for `guest_ttl_days` (and not hosting a room) are
+  deleted in chunks of `guest_purge_batch`, one short transaction per chunk
+  with SKIP LOCKED, so it never holds long locks or blocks sign-ups.
+- Each purge run also reports the size of the users table.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.config import settings
+from app.core.metrics import metrics
+from app.core.security import generate_guest_username
+from app.models.user import User
+
+
+class GuestBatcher:
+    def __init__(self, max_batch: int = 100, max_wait: float = 0.005):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: list[tuple[Optional[str], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inserts: set[asyncio.Task] = set()
+
+    async def create(self, display_name: Optional[str] = None) -> User:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((display_name, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._insert(batch))
+            self._inserts.add(task)
+            task.add_done_callback(self._inserts.discard)
+
+    async def _insert(self, batch: list[tuple[Optional[str], asyncio.Future]]):
+        from app.db.database import AsyncSessionLocal
+
+        started = time.perf_counter()
+        waiting = [(name, future) for name, future in batch if not future.done()]
+        try:
+            async with AsyncSessionLocal() as session:
+                for _ in range(5):
+                    if not waiting:
+                        break
+                    now = datetime.utcnow()
+                    rows = {}
+                    for display_name, future in waiting:
+                        username = generate_guest_username()
+                        rows[username] = (display_name, future, {
+                            "username": username,
+                            "display_name": display_name or username,
+                            "is_guest": True,
+                            "created_at": now,
+                            "updated_at": now,
+                            "last_seen_at": now,
+                        })
+                    result = await session.scalars(
+                        pg_insert(User)
+                        .on_conflict_do_nothing(index_elements=[User.username])
+                        .returning(User),
+                        [row for _, _, row in rows.values()],
+                    )
+                    created = {user.username: user for user in result.all()}
+                    await session.commit()
+
+                    for username, (_, future, _) in rows.items():
+                        if username in created and not future.done():
+                            future.set_result(created[username])
+                    # Usernames that were already taken get new ones
+                    waiting = [
+                        (display_name, future)
+                        for username, (display_name, future, _) in rows.items()
+                        if username not in created
+                    ]
+                    metrics.inc("guests.username_collisions", len(waiting))
+                if waiting:
+                    raise RuntimeError("Could not find free guest usernames")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            metrics.observe("guests.insert_batch", time.perf_counter() - started)
+
+        metrics.inc("guests.created", len(batch))
+        metrics.inc("guests.batches")
+
+
+guest_batcher = GuestBatcher(
+    max_batch=settings.guest_batch_size,
+    max_wait=settings.guest_batch_wait_ms / 1000,
+)
+
+
+async def create_guest(display_name: Optional[str] = None) -> User:
+    return await guest_batcher.create(display_name)
+
+
+# Users seen since the last activity flush
+_seen: set[int] = set()
+
+
+def touch_user(user_id: int):
+    _seen.add(user_id)
+
+
+async def flush_user_activity() -> int:
+    """Record when the users seen since the last flush were last active (one UPDATE)"""
+    from app.db.database import AsyncSessionLocal
+
+    if not _seen:
+        return 0
+    user_ids = list(_seen)
+    _seen.clear()
+    try:
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(User)
+                .where(User.id.in_(user_ids))
+                .values(last_seen_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+    except Exception:
+        _seen.update(user_ids)
+        raise
+    return len(user_ids)
+
+
+_PURGE_GUESTS_SQL = text("""
+DELETE FROM users WHERE id IN (
+    SELECT u.id FROM users u
+    WHERE u.is_guest AND u.last_seen_at < :cutoff
+      AND NOT EXISTS (SELECT 1 FROM rooms r WHERE r.host_id = u.id)
+    ORDER BY u.last_seen_at
+    LIMIT :batch
+    FOR UPDATE SKIP LOCKED
+)
+""")
+
+_USERS_TABLE_SIZE_SQL = text("""
+SELECT c.reltuples::bigint, pg_table_size(c.oid), pg_indexes_size(c.oid)
+FROM pg_class c WHERE c.oid = 'users'::regclass
+""")
+
+
+async def purge_inactive_guests(
+    ttl: timedelta,
+    batch: Optional[int] = None,
+    pause: Optional[float] = None,
+) -> int:
+    """Delete guests not seen within `ttl`, one short transaction per chunk"""
+    from app.db.database import AsyncSessionLocal
+
+    batch = batch or settings.guest_purge_batch
+    pause = settings.guest_purge_pause_seconds if pause is None else pause
+    cutoff = datetime.utcnow() - ttl
+    purged = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(_PURGE_GUESTS_SQL, {"cutoff": cutoff, "batch": batch})
+            await session.commit()
+        purged += result.rowcount
+        metrics.inc("guests.purged", result.rowcount)
+        if result.rowcount < batch:
+            return purged
+        # Let sign-ups and vacuum in between chunks
+        await asyncio.sleep(pause)
+
+
+_last_table_size: Optional[tuple[int, int, int]] = None
+
+
+async def report_users_table() -> dict:
+    """Row estimate and on-disk size of the users table (no table scan)"""
+    global _last_table_size
+    from app.db.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        rows, table_bytes, index_bytes = (await session.execute(_USERS_TABLE_SIZE_SQL)).one()
+
+    metrics.set_gauge("users.rows_estimate", rows)
+    metrics.set_gauge("users.table_bytes", table_bytes)
+    metrics.set_gauge("users.index_bytes", index_bytes)
+    growth = ""
+    if _last_table_size:
+        growth = (f" ({rows - _last_table_size[0]:+d} rows, "
+                  f"{(table_bytes + index_bytes - sum(_last_table_size[1:])) / 1024 / 1024:+.1f} MB)")
+    _last_table_size = (rows, table_bytes, index_bytes)
+    print(f"[guests] users: ~{rows} rows, table {table_bytes / 1024 / 1024:.1f} MB, "
+          f"indexes {index_bytes / 1024 / 1024:.1f} MB{growth}")
+    return {"rows_estimate": rows, "table_bytes": table_bytes, "index_bytes": index_bytes}
+
+
+class GuestMaintenance:
+    """Background loops for activity flushes and guest purges"""
+
+    def __init__(self):
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._activity_loop()),
+            asyncio.create_task(self._purge_loop()),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        try:
+            await flush_user_activity()
+        except Exception as e:
+            print(f"[guests] Failed to flush user activity: {e}")
+
+    async def _activity_loop(self):
+        while True:
+            await asyncio.sleep(settings.user_activity_flush_seconds)
+            try:
+                await flush_user_activity()
+            except Exception as e:
+                print(f"[guests] Failed to flush user activity: {e}")
+
+    async def _purge_loop(self):
+        while True:
+            await asyncio.sleep(settings.guest_purge_interval_seconds)
+            try:
+                started = time.perf_counter()
+                purged = await purge_inactive_guests(timedelta(days=settings.guest_ttl_days))
+                print(f"[guests] Purged {purged} inactive guests in {time.perf_counter() - started:.1f}s")
+                await report_users_table()
+            except Exception as e:
+                print(f"[guests] Guest purge failed: {e}")
+
+
+guest_maintenance = GuestMaintenance()
@@ -0,0 +1,69 @@
+"""
+Game Replay Service
+
+Streams the action log of a finished game in order. Actions are read in
+small keyset-paginated pages with a short-lived session per page, so a
+replay never holds the whole log in memory or a DB connection while it
+waits between actions.
+"""
+
+import asyncio
+import json
+from typing import AsyncIterator
+
+from sqlalchemy import select
+
+from app.models.game import GameAction
+
+
+REPLAY_PAGE_SIZE = 200
+MAX_REPLAY_DELAY = 5.0  # Cap on the pause between two actions (seconds)
+
+
+def _format_action(action: GameAction, fmt: str) -> str:
+    data = json.dumps({
+        "seq": action.seq,
+        "action": action.action,
+        "user_id": action.user_id,
+        "payload": action.payload,
+        "at": action.created_at.isoformat(),
+    })
+    if fmt == "jsonl":
+        return data + "\n"
+    return f"id: {action.seq}\nevent: {action.action}\ndata: {data}\n\n"
+
+
+async def stream_game_replay(game_id: int, speed: float = 0, fmt: str = "sse") -> AsyncIterator[str]:
+    """
+    Yield a finished game's actions in order.
+    speed > 0 replays with the original pacing divided by speed;
+    speed == 0 streams as fast as possible (bulk export).
+    """
+    from app.db.database import AsyncSessionLocal
+
+    last_seq = 0
+    previous_at = None
+    while True:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(GameAction)
+                .where(GameAction.game_id == game_id)
+                .where(GameAction.seq > last_seq)
+                .order_by(GameAction.seq)
+                .limit(REPLAY_PAGE_SIZE)
+            )
+            page = result.scalars().all()
+
+        for action in page:
+            if speed > 0 and previous_at is not None:
+                delay = (action.created_at - previous_at).total_seconds() / speed
+                await asyncio.sleep(min(max(delay, 0), MAX_REPLAY_DELAY))
+            previous_at = action.created_at
+            yield _format_action(action, fmt)
+
+        if len(page) < REPLAY_PAGE_SIZE:
+            break
+        last_seq = page[-1].seq
+
+    if fmt == "sse":
+        yield "event: end\ndata: {}\n\n"
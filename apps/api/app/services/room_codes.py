@@ -0,0 +1,83 @@
+"""
+Room Code Allocator
+
+Hands out room codes from a Redis-backed pool instead of probing the
+database until a free code turns up. The pool is refilled in batches
+(one DB query per batch), and codes of deleted or finished rooms are
+recycled back into it.
+"""
+
+import asyncio
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.security import generate_room_code
+from app.db.redis import redis_client
+from app.models.room import Room, RoomStatus
+
+
+_refill_task: Optional[asyncio.Task] = None
+
+
+async def refill_room_codes(db: AsyncSession, batch_size: Optional[int] = None) -> int:
+    """Add a batch of random codes that no live room is using to the free pool"""
+    batch_size = batch_size or settings.room_code_pool_batch
+    candidates = {generate_room_code() for _ in range(batch_size)}
+
+    result = await db.execute(
+        select(Room.code)
+        .where(Room.code.in_(candidates))
+        .where(Room.status != RoomStatus.FINISHED)
+    )
+    taken = set(result.scalars().all())
+
+    return await redis_client.add_free_room_codes(sorted(candidates - taken))
+
+
+async def _refill_in_background():
+    from app.db.database import AsyncSessionLocal
+
+    try:
+        async with AsyncSessionLocal() as session:
+            added = await refill_room_codes(session)
+            print(f"[room_codes] Refilled pool with {added} codes")
+    except Exception as e:
+        print(f"[room_codes] Background refill failed: {e}")
+
+
+def _schedule_refill():
+    global _refill_task
+    if _refill_task is None or _refill_task.done():
+        _refill_task = asyncio.create_task(_refill_in_background())
+
+
+async def allocate_room_code(db: AsyncSession) -> str:
+    """
+    Reserve a unique room code.
+    Normally a single Redis round trip; the pool is topped up in the
+    background once it drops below the low-water mark.
+    """
+    code, remaining = await redis_client.reserve_room_code()
+    if code is None:
+        # Pool is empty (first use or drained) - refill inline once
+        await refill_room_codes(db)
+        code, remaining = await redis_client.reserve_room_code()
+        if code is None:
+            raise RuntimeError("Room code pool exhausted")
+
+    if remaining < settings.room_code_pool_low_water:
+        _schedule_refill()
+
+    return code
+
+
+async def release_room_code(code: str):
+    """
+    Recycle the code of a deleted or finished room. The room's presence,
+    game mapping and chat are deleted first, so a new room that draws the
+    code doesn't inherit them.
+    """
+    await redis_client.cleanup_rooms([code])
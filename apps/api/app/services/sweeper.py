@@ -0,0 +1,320 @@
+"""
+Stale Room and Game Sweeper
+
+Rooms stay WAITING or IN_GAME once everyone has left, and games left
+mid-way only disappear when their Redis state expires. Every
+`sweep_interval_seconds` one worker (whichever claims the sweep) closes them:
+
+- Games not saved for `game_idle_seconds` are marked ABANDONED in Postgres,
+  their rooms go back to WAITING, anyone still in the room or watching gets
+  game_ended (reason "abandoned"), and their state, ballot and room mapping
+  are deleted from Redis. Idle games
+  come from the games:activity ZSET (scored on every save); unfinished games
+  only Postgres knows about are found through the partial index on
+  games.created_at.
+- Live rooms not updated for `room_idle_seconds` (partial index on
+  rooms.updated_at) are closed when nobody is present and neither the room
+  nor its game was active in Redis since. Their Redis keys are deleted and
+  their codes go back to the free pool. Rooms that turn out to be active get
+  updated_at bumped, so the next batch moves on to other rooms.
+
+Both close at most `sweep_batch` rows per transaction and `sweep_max_batches`
+batches per run. Independently, every worker drops games idle in its memory
+for `game_memory_idle_seconds` (they stay in Redis).
+
+Joins and leaves mark rooms active; the times are written to Redis in one
+ZADD every `room_activity_flush_seconds`.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import exists, select, tuple_, update
+
+from app.config import settings
+from app.core.metrics import metrics
+from app.core.worker import WORKER_ID
+from app.db.redis import redis_client
+from app.games import get_engine, loaded_engines
+from app.models.game import Game, GameStatus
+from app.models.room import Room, RoomStatus
+
+OPEN_GAME_STATUSES = (GameStatus.SETUP, GameStatus.IN_PROGRESS)
+
+# Room ID -> last join/leave time since the last activity flush
+_touched_rooms: dict[str, float] = {}
+
+
+def touch_room(room_id: str):
+    _touched_rooms[str(room_id)] = time.time()
+
+
+async def flush_room_activity() -> int:
+    """Write the rooms touched since the last flush to Redis (one ZADD)"""
+    if not _touched_rooms:
+        return 0
+    activity = dict(_touched_rooms)
+    _touched_rooms.clear()
+    try:
+        await redis_client.touch_rooms(activity)
+    except Exception:
+        for room_id, touched_at in activity.items():
+            _touched_rooms[room_id] = max(touched_at, _touched_rooms.get(room_id, 0))
+        raise
+    return len(activity)
+
+
+async def _close_games(games: list[tuple[int, Optional[str]]]):
+    """
+    Mark games abandoned, put their rooms back to WAITING, tell whoever is
+    still connected, then drop the games from memory and clean up Redis.
+    """
+    from app.db.database import AsyncSessionLocal
+
+    game_ids = [game_id for game_id, _ in games]
+    async with AsyncSessionLocal() as session:
+        abandoned = (await session.execute(
+            update(Game)
+            .where(Game.id.in_(game_ids))
+            .where(Game.status.in_(OPEN_GAME_STATUSES))
+            .values(status=GameStatus.ABANDONED, finished_at=datetime.utcnow())
+            .returning(Game.id, Game.room_id)
+            .execution_options(synchronize_session=False)
+        )).all()
+        room_codes, reset_rooms = {}, set()
+        if abandoned:
+            room_ids = {row.room_id for row in abandoned}
+            room_codes = dict((await session.execute(
+                select(Room.id, Room.code).where(Room.id.in_(room_ids))
+            )).all())
+            # Rooms still running another game stay as they are. Keep updated_at,
+            # so a room nobody is in can still close in this run.
+            reset_rooms = set((await session.execute(
+                update(Room)
+                .where(Room.id.in_(room_ids))
+                .where(Room.status == RoomStatus.IN_GAME)
+                .where(~exists().where(Game.room_id == Room.id).where(Game.status.in_(OPEN_GAME_STATUSES)))
+                .values(status=RoomStatus.WAITING, updated_at=Room.updated_at)
+                .returning(Room.id)
+                .execution_options(synchronize_session=False)
+            )).scalars())
+        await session.commit()
+
+    # Postgres knows the room of games whose Redis state already expired
+    game_rooms = {row.id: room_codes.get(row.room_id) for row in abandoned}
+    games = [(game_id, room_id or game_rooms.get(game_id)) for game_id, room_id in games]
+
+    for game_type in loaded_engines():
+        engine = get_engine(game_type)
+        for game_id, room_id in games:
+            if engine.get_game(game_id) is not None:
+                await engine.remove_game(game_id, room_id)
+    await redis_client.cleanup_games(games)
+
+    if stale_sweeper.on_game_abandoned:
+        for row in abandoned:
+            if row.room_id not in reset_rooms:
+                continue
+            game_id, room_id = row.id, room_codes[row.room_id]
+            try:
+                await stale_sweeper.on_game_abandoned(game_id, room_id)
+            except Exception as e:
+                print(f"[sweeper] Failed to announce abandoned game {game_id}: {e}")
+    metrics.inc("sweeper.games_abandoned", len(abandoned))
+
+
+async def sweep_abandoned_games(
+    idle: float,
+    batch: Optional[int] = None,
+    max_batches: Optional[int] = None,
+    pause: Optional[float] = None,
+) -> int:
+    """Close games not saved within `idle` seconds, in batches"""
+    from app.db.database import AsyncSessionLocal
+
+    batch = batch or settings.sweep_batch
+    max_batches = max_batches or settings.sweep_max_batches
+    pause = settings.sweep_pause_seconds if pause is None else pause
+    cutoff = time.time() - idle
+    closed = 0
+
+    # Games with Redis state (or whose state expired), oldest save first
+    for _ in range(max_batches):
+        games = await redis_client.get_idle_games(cutoff, batch)
+        if games:
+            await _close_games(games)
+            closed += len(games)
+        if len(games) < batch:
+            break
+        await asyncio.sleep(pause)
+
+    # Unfinished games Postgres knows about but Redis doesn't track (never saved, or lost)
+    created_before = datetime.utcnow() - timedelta(seconds=idle)
+    after = None
+    for _ in range(max_batches):
+        query = (
+            select(Game.id, Game.created_at)
+            .where(Game.status.in_(OPEN_GAME_STATUSES))
+            .where(Game.created_at < created_before)
+            .order_by(Game.created_at, Game.id)
+            .limit(batch)
+        )
+        if after is not None:
+            query = query.where(tuple_(Game.created_at, Game.id) > after)
+        async with AsyncSessionLocal() as session:
+            rows = (await session.execute(query)).all()
+        if not rows:
+            break
+        after = (rows[-1].created_at, rows[-1].id)
+
+        # Long games are still saved regularly; leave those alone
+        activity = await redis_client.get_games_activity([row.id for row in rows])
+        games = [(row.id, None) for row, saved_at in zip(rows, activity) if not saved_at or saved_at < cutoff]
+        if games:
+            await _close_games(games)
+            closed += len(games)
+        if len(rows) < batch:
+            break
+        await asyncio.sleep(pause)
+    return closed
+
+
+async def sweep_stale_rooms(
+    idle: float,
+    batch: Optional[int] = None,
+    max_batches: Optional[int] = None,
+    pause: Optional[float] = None,
+) -> int:
+    """Close live rooms nobody has been in for `idle` seconds, one short transaction per batch"""
+    from app.db.database import AsyncSessionLocal
+
+    batch = batch or settings.sweep_batch
+    max_batches = max_batches or settings.sweep_max_batches
+    pause = settings.sweep_pause_seconds if pause is None else pause
+    cutoff = time.time() - idle
+    closed = 0
+
+    for _ in range(max_batches):
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as session:
+            rows = (await session.execute(
+                select(Room.id, Room.code)
+                .where(Room.status != RoomStatus.FINISHED)
+                .where(Room.updated_at < now - timedelta(seconds=idle))
+                .order_by(Room.updated_at)
+                .limit(batch)
+                .with_for_update(skip_locked=True)
+            )).all()
+            if not rows:
+                break
+
+            activity = await redis_client.get_rooms_activity([row.code for row in rows])
+            stale, active = [], []
+            for row, room in zip(rows, activity):
+                last_active = max(room["touched_at"] or 0, room["game_touched_at"] or 0)
+                if room["present"] or last_active >= cutoff:
+                    active.append(row)
+                else:
+                    stale.append(row)
+
+            if stale:
+                await session.execute(
+                    update(Room)
+                    .where(Room.id.in_([row.id for row in stale]))
+                    .values(status=RoomStatus.FINISHED, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+            if active:
+                # Checked again once they've been quiet for another `idle` seconds
+                await session.execute(
+                    update(Room)
+                    .where(Room.id.in_([row.id for row in active]))
+                    .values(updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+            await session.commit()
+
+        # Codes are only freed once the rooms are finished in Postgres
+        await redis_client.cleanup_rooms([row.code for row in stale])
+        metrics.inc("sweeper.rooms_closed", len(stale))
+        closed += len(stale)
+        if len(rows) < batch:
+            break
+        await asyncio.sleep(pause)
+    return closed
+
+
+async def evict_idle_games(idle: float) -> int:
+    """Drop games idle in this worker's memory (saved to Redis first)"""
+    evicted = 0
+    for game_type in loaded_engines():
+        engine = get_engine(game_type)
+        if engine.evict_idle_games:
+            evicted += await engine.evict_idle_games(idle)
+    metrics.inc("sweeper.games_evicted", evicted)
+    return evicted
+
+
+class StaleSweeper:
+    """Background loops for room activity flushes and stale sweeps"""
+
+    def __init__(self):
+        self._tasks: list[asyncio.Task] = []
+        # Called with (game_id, room_id) for each game closed as abandoned
+        self.on_game_abandoned: Optional[Callable[[int, str], Awaitable[None]]] = None
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._activity_loop()),
+            asyncio.create_task(self._sweep_loop()),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        try:
+            await flush_room_activity()
+        except Exception as e:
+            print(f"[sweeper] Failed to flush room activity: {e}")
+
+    async def run_once(self) -> Optional[tuple[int, int]]:
+        """Evict idle games from memory, then sweep if no other worker claimed this run"""
+        await evict_idle_games(settings.game_memory_idle_seconds)
+        await flush_room_activity()
+        if not await redis_client.claim_sweep(
+            "stale", WORKER_ID, max(1, int(settings.sweep_interval_seconds))
+        ):
+            return None
+
+        started = time.perf_counter()
+        # Games first: a room whose game was just abandoned can close in the same run
+        games = await sweep_abandoned_games(settings.game_idle_seconds)
+        rooms = await sweep_stale_rooms(settings.room_idle_seconds)
+        elapsed = time.perf_counter() - started
+        metrics.observe("sweeper.run", elapsed)
+        print(f"[sweeper] Abandoned {games} games and closed {rooms} rooms in {elapsed:.1f}s")
+        return games, rooms
+
+    async def _activity_loop(self):
+        while True:
+            await asyncio.sleep(settings.room_activity_flush_seconds)
+            try:
+                await flush_room_activity()
+            except Exception as e:
+                print(f"[sweeper] Failed to flush room activity: {e}")
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(settings.sweep_interval_seconds)
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"[sweeper] Stale sweep failed: {e}")
+
+
+stale_sweeper = StaleSweeper()
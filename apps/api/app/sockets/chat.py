@@ -0,0 +1,36 @@
+import asyncio
+from typing import Awaitable, Callable
+
+
+class ChatCoalescer:
+    """
+    Batches chat messages per room and flushes them as one frame
+    every `interval` seconds, instead of one emit per message.
+    """
+
+    def __init__(self, emit: Callable[[str, list[dict]], Awaitable[None]], interval: float):
+        self._emit = emit
+        self.interval = interval
+        self._pending: dict[str, list[dict]] = {}
+        # Scheduled flushes (the loop only keeps weak references to tasks)
+        self._flushes: set[asyncio.Task] = set()
+
+    def add(self, room_id: str, message: dict):
+        messages = self._pending.get(room_id)
+        if messages is None:
+            # First message in this window schedules the flush
+            self._pending[room_id] = [message]
+            task = asyncio.create_task(self._flush_later(room_id))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+        else:
+            messages.append(message)
+
+    async def _flush_later(self, room_id: str):
+        await asyncio.sleep(self.interval)
+        messages = self._pending.pop(room_id, None)
+        if messages:
+            try:
+                await self._emit(room_id, messages)
+            except Exception as e:
+                print(f"[chat] Error flushing {len(messages)} messages to room {room_id}: {e}")
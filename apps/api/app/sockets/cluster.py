@@ -0,0 +1,166 @@
+"""
+Game ownership across API workers.
+
+Every worker heartbeats into the Redis worker registry; room presence uses
+it to find dead workers whose sockets need sweeping. With CLUSTER_ENABLED
+each worker also builds a consistent hash ring of the live workers. Each game is owned by one worker,
+which keeps its in-memory game; game events that reach any other worker are
+forwarded to the owner over the owner's Redis pub/sub channel. When workers
+join or leave, games whose owner changed are saved and dropped from memory,
+and the new owner loads them from Redis on first use.
+"""
+
+import asyncio
+import contextvars
+import functools
+import json
+from typing import Awaitable, Callable, Optional
+
+from app.config import settings
+from app.core.hash_ring import HashRing
+from app.core.metrics import metrics
+from app.core.worker import WORKER_ID
+from app.db.redis import redis_client
+from app.games import get_engine, loaded_engines
+
+Handler = Callable[[str, dict], Awaitable[None]]
+
+# (sid, user data) of a forwarded event while its handler runs on the owner
+_forwarded_user: contextvars.ContextVar[Optional[tuple[str, dict]]] = contextvars.ContextVar(
+    "forwarded_user", default=None
+)
+
+
+def forwarded_user_data(sid: str) -> Optional[dict]:
+    """User data sent along with a forwarded event for `sid`, if any"""
+    forwarded = _forwarded_user.get()
+    if forwarded and forwarded[0] == sid:
+        return forwarded[1]
+    return None
+
+
+class GameCluster:
+    def __init__(self, get_user_data: Callable[[str], Optional[dict]]):
+        self.worker_id = WORKER_ID
+        self.ring = HashRing([self.worker_id], virtual_nodes=settings.cluster_virtual_nodes)
+        self._get_user_data = get_user_data
+        self._handlers: dict[str, Handler] = {}
+        self._tasks: list[asyncio.Task] = []
+
+        metrics.register_gauge("cluster.workers", lambda: len(self.ring.nodes))
+
+    @property
+    def enabled(self) -> bool:
+        return settings.cluster_enabled
+
+    def owner_of(self, game_id) -> str:
+        return self.ring.owner(game_id) or self.worker_id
+
+    def owns(self, game_id) -> bool:
+        return not self.enabled or self.owner_of(game_id) == self.worker_id
+
+    def routed(self, handler: Handler) -> Handler:
+        """
+        Run a game event on the worker that owns data["game_id"].
+        A forwarded event returns None here, so its Socket.IO ack is empty;
+        results that must reach the client go out as emits from the owner.
+        """
+        self._handlers[handler.__name__] = handler
+
+        @functools.wraps(handler)
+        async def wrapper(sid, data):
+            game_id = data.get("game_id") if isinstance(data, dict) else None
+            if self.enabled and game_id and not self.owns(game_id):
+                if await self._forward(self.owner_of(game_id), handler.__name__, sid, data):
+                    return None
+                # Nobody is listening on the owner's channel (it just died) - run it here
+                metrics.inc("cluster.forward.undelivered")
+            return await handler(sid, data)
+
+        return wrapper
+
+    async def _forward(self, owner: str, event: str, sid: str, data: dict) -> bool:
+        message = {
+            "event": event,
+            "sid": sid,
+            "user_data": self._get_user_data(sid),
+            "data": data,
+        }
+        try:
+            receivers = await redis_client.publish_worker_event(owner, message)
+        except Exception as e:
+            print(f"[cluster] Failed to forward {event} to {owner}: {e}")
+            return False
+        metrics.inc("cluster.forward.sent")
+        return receivers > 0
+
+    async def _dispatch(self, message: dict):
+        handler = self._handlers.get(message["event"])
+        if handler is None:
+            return
+        _forwarded_user.set((message["sid"], message["user_data"] or {}))
+        metrics.inc("cluster.forward.received")
+        try:
+            await handler(message["sid"], message["data"])
+        except Exception as e:
+            print(f"[cluster] Forwarded {message['event']} failed: {e}")
+
+    async def start(self):
+        await self._heartbeat()
+        self._tasks = [asyncio.create_task(self._heartbeat_loop())]
+        if not self.enabled:
+            return
+        self._tasks.append(asyncio.create_task(self._listen()))
+        print(f"[cluster] Worker {self.worker_id} joined ({len(self.ring.nodes)} workers)")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        try:
+            await redis_client.retire_worker(self.worker_id)
+        except Exception as e:
+            print(f"[cluster] Failed to deregister {self.worker_id}: {e}")
+
+    async def _heartbeat(self):
+        workers = await redis_client.heartbeat_worker(
+            self.worker_id, ttl=settings.cluster_worker_ttl_seconds
+        )
+        if self.enabled and self.ring.set_nodes(workers | {self.worker_id}):
+            metrics.inc("cluster.rebalances")
+            print(f"[cluster] Workers changed: {sorted(self.ring.nodes)}")
+            await self._release_moved_games()
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(settings.cluster_heartbeat_seconds)
+            try:
+                await self._heartbeat()
+            except Exception as e:
+                print(f"[cluster] Heartbeat failed: {e}")
+
+    async def _release_moved_games(self):
+        """Hand games that now belong to another worker back to Redis"""
+        for game_type in loaded_engines():
+            engine = get_engine(game_type)
+            if engine.release_games:
+                released = await engine.release_games(self.owns)
+                if released:
+                    print(f"[cluster] Released {released} {game_type} games to their new owners")
+
+    async def _listen(self):
+        while True:
+            pubsub = redis_client.client.pubsub()
+            try:
+                await pubsub.subscribe(redis_client.worker_channel(self.worker_id))
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message and message["type"] == "message":
+                        asyncio.create_task(self._dispatch(json.loads(message["data"])))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[cluster] Event listener failed, resubscribing: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
@@ -0,0 +1,120 @@
+"""
+Idempotent game actions.
+
+Clients may send an `action_id` with a game action and resend it when they
+don't hear back (flaky mobile networks). The first copy runs; its result is
+kept per game for `window` seconds, and copies that arrive later (or while
+the first is still running) get that result back without touching the game
+or persisting anything.
+
+The result is sent to the sender as an action_result event, which is the
+only reliable way to get it: the handler's return value is also the
+Socket.IO ack, but in cluster mode an action forwarded to the owning worker
+acks with nothing, and only action_result (emitted by the owner to the
+sender's sid) crosses workers.
+
+Results live on the worker that handles the game's actions (the owner in
+cluster mode). In stateless mode a resend that reconnected to another
+worker runs again and is rejected by the game rules as before.
+"""
+
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from app.core.metrics import metrics
+
+Handler = Callable[[str, dict], Awaitable[Optional[dict]]]
+
+
+class ActionDedupe:
+    def __init__(
+        self,
+        get_user_data: Callable[[str], Optional[dict]],
+        reply: Callable[[str, dict], Awaitable[None]],
+        window: float = 60.0,
+        max_actions: int = 256,
+        max_games: int = 10000,
+    ):
+        self.window = window
+        self.max_actions = max_actions  # Per game
+        self.max_games = max_games
+        self._get_user_data = get_user_data
+        self._reply = reply
+        # game_id -> action key -> (expires_at, result future), oldest first
+        self._games: OrderedDict[int, OrderedDict[str, tuple[float, asyncio.Future]]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+        metrics.register_gauge("actions.dedupe.games", lambda: len(self._games))
+        metrics.register_gauge("actions.dedupe.hit_rate", self.hit_rate)
+
+    def hit_rate(self) -> float:
+        total = self._hits + self._misses
+        return round(self._hits / total, 4) if total else 0.0
+
+    def _actions(self, game_id) -> OrderedDict:
+        actions = self._games.get(game_id)
+        if actions is None:
+            actions = self._games[game_id] = OrderedDict()
+            if len(self._games) > self.max_games:
+                self._games.popitem(last=False)
+        else:
+            self._games.move_to_end(game_id)
+        return actions
+
+    def _expire(self, actions: OrderedDict, now: float):
+        while actions:
+            expires_at, future = next(iter(actions.values()))
+            if expires_at > now and len(actions) <= self.max_actions:
+                break
+            if not future.done():
+                break  # Still running; its duplicates must keep waiting on it
+            actions.popitem(last=False)
+
+    def idempotent(self, handler: Handler) -> Handler:
+        """Run each (user, action_id) of a game action once and replay its result"""
+
+        @functools.wraps(handler)
+        async def wrapper(sid, data):
+            action_id = data.get("action_id") if isinstance(data, dict) else None
+            game_id = data.get("game_id") if isinstance(data, dict) else None
+            if not action_id or not game_id:
+                return await handler(sid, data)
+
+            user_data = self._get_user_data(sid) or {}
+            key = f"{handler.__name__}:{user_data.get('user_id') or sid}:{action_id}"
+            now = time.monotonic()
+            actions = self._actions(game_id)
+            self._expire(actions, now)
+
+            entry = actions.get(key)
+            if entry is not None:
+                self._hits += 1
+                metrics.inc("actions.dedupe.hit")
+                result = await asyncio.shield(entry[1])
+                await self._reply(sid, {"event": handler.__name__, "action_id": action_id, **(result or {})})
+                return result
+
+            self._misses += 1
+            metrics.inc("actions.dedupe.miss")
+            future = asyncio.get_running_loop().create_future()
+            actions[key] = (now + self.window, future)
+            try:
+                result = await handler(sid, data)
+            except BaseException as e:
+                # Not cached: a resend gets a fresh try
+                actions.pop(key, None)
+                if isinstance(e, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(e)
+                    future.exception()  # Nobody may be waiting
+                raise
+            future.set_result(result)
+            await self._reply(sid, {"event": handler.__name__, "action_id": action_id, **(result or {})})
+            return result
+
+        return wrapper
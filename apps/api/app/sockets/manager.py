@@ -1,19 +1,27 @@
+import asyncio
 import socketio
-from typing import Optional
+import time
+from datetime import datetime
+from fastapi import HTTPException
+from typing import Optional, TYPE_CHECKING
 
 from app.config import settings
-from app.db.redis import redis_client
-from app.services.avalon import (
-    AvalonGame,
-    AvalonPhase,
-    get_game,
-    get_game_async,
-    create_game,
-    save_game,
-    remove_game,
-    remove_game_async,
-    get_game_by_room,
-)
+from app.core.jobs import JobQueue
+from app.core.metrics import metrics
+from app.core.rate_limit import TokenBucketLimiter
+from app.core.security import decode_access_token_cached
+from app.db.redis import RedisConnectionError, redis_client
+from app.games import GameEngine, get_engine
+from app.services.chat import get_chat_history as fetch_chat_history, record_chat_messages
+from app.services.guests import touch_user
+from app.services.sweeper import stale_sweeper
+from app.sockets.chat import ChatCoalescer
+from app.sockets.cluster import GameCluster, forwarded_user_data
+from app.sockets.dedupe import ActionDedupe
+from app.sockets.presence import RoomPresence
+
+if TYPE_CHECKING:
+    from app.services.avalon import AvalonGame
 
 # Create Socket.IO server with Redis adapter for scaling
 sio = socketio.AsyncServer(
@@ -21,33 +29,60 @@ sio = socketio.AsyncServer(
     cors_allowed_origins=settings.cors_origins_list,
     logger=settings.api_debug,
     engineio_logger=settings.api_debug,
+    # Emits reach sockets connected to other workers
+    client_manager=socketio.AsyncRedisManager(settings.redis_url) if settings.cluster_enabled else None,
 )
 
 
 class ConnectionManager:
     def __init__(self):
         self.active_connections: dict[str, dict] = {}
+        # Rosters across all workers (self.active_connections only has this worker's sockets)
+        self.presence = RoomPresence()
 
     async def connect(self, sid: str, user_data: dict):
         self.active_connections[sid] = user_data
-        await redis_client.set_session(
-            f"socket:{sid}",
-            user_data,
-            expire=86400,
+        await redis_client.write_or_defer(
+            f"session:socket:{sid}", "set_session", f"socket:{sid}", user_data, 86400
         )
 
     async def disconnect(self, sid: str):
         if sid in self.active_connections:
             user_data = self.active_connections.pop(sid)
-            await redis_client.delete_session(f"socket:{sid}")
+            await redis_client.write_or_defer(
+                f"session:socket:{sid}", "delete_session", f"socket:{sid}"
+            )
             return user_data
         return None
 
     def get_user_data(self, sid: str) -> Optional[dict]:
-        return self.active_connections.get(sid)
-
-    def get_room_players(self, room_id: str) -> list[dict]:
-        """Get deduplicated list of players in a room"""
+        return self.active_connections.get(sid) or forwarded_user_data(sid)
+
+    async def get_room_players(self, room_id: str) -> list[dict]:
+        """Get deduplicated list of players in a room (on any worker)"""
+        try:
+            roster = await self.presence.get_roster(room_id)
+        except RedisConnectionError:
+            return self._get_local_room_players(room_id)
+        return [
+            {
+                "user_id": user["user_id"],
+                "username": user["username"],
+                "display_name": user["display_name"],
+            }
+            for user in roster
+        ]
+
+    async def get_room_sockets(self, room_id: str) -> list[tuple[str, int]]:
+        """Get (socket_id, user_id) for every identified connection in a room (on any worker)"""
+        try:
+            roster = await self.presence.get_roster(room_id)
+        except RedisConnectionError:
+            return self._get_local_room_sockets(room_id)
+        return [(sid, user["user_id"]) for user in roster for sid in user["sids"]]
+
+    def _get_local_room_players(self, room_id: str) -> list[dict]:
+        """Players connected to this worker (fallback while Redis is unavailable)"""
         seen_users = set()
         players = []
         for socket_id, conn_data in self.active_connections.items():
@@ -62,19 +97,104 @@ class ConnectionManager:
                     })
         return players
 
+    def _get_local_room_sockets(self, room_id: str) -> list[tuple[str, int]]:
+        return [
+            (socket_id, conn_data["user_id"])
+            for socket_id, conn_data in self.active_connections.items()
+            if isinstance(conn_data, dict)
+            and conn_data.get("room_id") == room_id
+            and conn_data.get("user_id")
+        ]
+
 
 manager = ConnectionManager()
+cluster = GameCluster(get_user_data=manager.get_user_data)
+
+
+async def _send_action_result(sid: str, result: dict):
+    await sio.emit("action_result", result, to=sid)
+
+
+# Resent game actions (same action_id) get the first result back, as an
+# action_result event. Handlers also return it as the ack, but a forwarded
+# action (cluster mode) acks with nothing; clients should use action_result.
+actions = ActionDedupe(
+    get_user_data=manager.get_user_data,
+    reply=_send_action_result,
+    window=settings.action_dedupe_seconds,
+    max_actions=settings.action_dedupe_size,
+)
+
+
+async def _reject(sid: str, message: str) -> dict:
+    """Send an action error to the client (and return it as the action's result)"""
+    await sio.emit("error", {"message": message}, to=sid)
+    return {"success": False, "error": message}
+
+
+def _avalon() -> GameEngine:
+    return get_engine("avalon")
+
+
+def _stateless() -> bool:
+    return settings.game_execution_mode == "redis"
+
+
+async def _load_game(game_id: int) -> Optional["AvalonGame"]:
+    # In stateless mode (or if another worker owns it) the cached game may be stale
+    if _stateless() or not cluster.owns(game_id):
+        return await _avalon().reload_game(game_id)
+    return await _avalon().load_game(game_id)
+
+
+async def _load_game_by_room(room_id: str) -> Optional["AvalonGame"]:
+    # The owner's in-memory game is the latest (it may have unsaved votes);
+    # other workers and stateless mode check Redis for a newer version
+    game = await _avalon().load_game_by_room(room_id, fresh=_stateless())
+    if game and not _stateless() and not cluster.owns(game.state.game_id):
+        game = await _avalon().load_game_by_room(room_id, fresh=True)
+    return game
+
+# DB writes and cleanup that the next event doesn't have to wait for
+jobs = JobQueue(
+    "side_effects",
+    concurrency=settings.jobs_concurrency,
+    max_pending=settings.jobs_max_pending,
+    max_retries=settings.jobs_max_retries,
+    retry_delay=settings.jobs_retry_delay,
+)
+
+chat_limiter = TokenBucketLimiter(
+    rate=settings.chat_rate_per_second,
+    capacity=settings.chat_burst,
+)
+
+
+async def _emit_chat_batch(room_id: str, messages: list[dict]):
+    await asyncio.gather(
+        sio.emit("chat_messages", {"room_id": room_id, "messages": messages}, room=room_id),
+        record_chat_messages(room_id, messages),
+    )
+
+
+chat_coalescer = (
+    ChatCoalescer(_emit_chat_batch, settings.chat_coalesce_ms / 1000)
+    if settings.chat_coalesce_ms > 0
+    else None
+)
 
 
 async def _handle_host_transfer(room_id: str, leaving_user_id: int):
     """Transfer host to the next earliest joined user when host leaves."""
-    from app.db.database import async_session
-    from app.models.room import Room
+    from app.db.database import AsyncSessionLocal
+    from app.models.room import Room, RoomStatus
     from sqlalchemy import select
 
-    async with async_session() as session:
+    async with AsyncSessionLocal() as session:
         result = await session.execute(
-            select(Room).where(Room.code == room_id)
+            select(Room)
+            .where(Room.code == room_id)
+            .where(Room.status != RoomStatus.FINISHED)
         )
         room = result.scalar_one_or_none()
 
@@ -97,10 +217,57 @@ async def _handle_host_transfer(room_id: str, leaving_user_id: int):
                 print(f"[host_transfer] No eligible user to transfer host in room {room_id}")
 
 
+async def _announce_ghost_left(room_id: str, user_id: str):
+    """A user whose worker died was swept from the room"""
+    user_id = int(user_id) if user_id.isdigit() else user_id
+    if isinstance(user_id, int):
+        await jobs.submit(f"room:{room_id}", _handle_host_transfer, room_id, user_id)
+    await sio.emit("user_left", {"user_id": user_id, "username": None}, room=room_id)
+
+
+manager.presence.on_user_left = _announce_ghost_left
+
+
+async def _announce_game_abandoned(game_id: int, room_id: str):
+    """The stale sweeper closed a game nobody had played for a while"""
+    game_ended_data = {"game_id": game_id, "winner_team": None, "reason": "abandoned"}
+    await sio.emit("game_ended", game_ended_data, room=room_id)
+    if _has_spectators(room_id):
+        await sio.emit("game_ended", game_ended_data, room=_spectator_room(room_id))
+    _spectator_payloads.pop(game_id, None)
+
+
+stale_sweeper.on_game_abandoned = _announce_game_abandoned
+
+
+def authenticate_socket(auth: Optional[dict]) -> dict:
+    """Build connection user data from the handshake auth, verifying its token"""
+    token = auth.get("token") if auth else None
+    if not token:
+        return {"guest": True}
+
+    try:
+        claims = decode_access_token_cached(token)
+    except HTTPException:
+        raise socketio.exceptions.ConnectionRefusedError("Invalid or expired token")
+
+    try:
+        user_id = int(claims["sub"])
+    except (KeyError, TypeError, ValueError):
+        raise socketio.exceptions.ConnectionRefusedError("Invalid token")
+
+    return {
+        "user_id": user_id,
+        "username": claims.get("username"),
+    }
+
+
 @sio.event
 async def connect(sid, environ, auth):
     print(f"Client connected: {sid}")
-    user_data = auth if auth else {"guest": True}
+    user_data = authenticate_socket(auth)
+    if user_data.get("user_id"):
+        touch_user(user_data["user_id"])
     await manager.connect(sid, user_data)
     await sio.emit("connected", {"sid": sid}, to=sid)
 
@@ -113,11 +280,13 @@ async def disconnect(sid):
         room_id = user_data["room_id"]
         user_id = user_data.get("user_id")
 
-        # Handle host transfer before removing user
+        # Other tabs of the same user keep them in the room
+        if not await manager.presence.leave(room_id, user_id or sid, sid):
+            return
+
         if user_id:
-            await _handle_host_transfer(room_id, user_id)
+            await jobs.submit(f"room:{room_id}", _handle_host_transfer, room_id, user_id)
 
-        await redis_client.remove_user_from_room(room_id, str(user_id or sid))
         await sio.emit(
             "user_left",
             {"user_id": user_id, "username": user_data.get("username")},
@@ -128,25 +297,32 @@ async def disconnect(sid):
 @sio.event
 async def join_room(sid, data):
     room_id = data.get("room_id")
-    user_id = data.get("user_id")
-    username = data.get("username")
+    user_data = manager.get_user_data(sid) or {}
+    # Identity comes from the token verified at connect, never from the payload.
+    # Sockets without one can't join: /users/guest issues tokens to guests too.
+    user_id = user_data.get("user_id")
+    username = user_data.get("username") or data.get("username")
     display_name = data.get("display_name", username)
 
     print(f"[join_room] sid={sid}, room_id={room_id}, user_id={user_id}, display_name={display_name}")
 
-    if not room_id or not user_id:
-        await sio.emit("error", {"message": "Missing room_id or user_id"}, to=sid)
+    if not room_id:
+        await sio.emit("error", {"message": "Missing room_id"}, to=sid)
+        return
+    if not user_id:
+        await sio.emit("error", {"message": "Authentication required"}, to=sid)
+        return
+    if data.get("user_id") is not None and str(data["user_id"]) != str(user_id):
+        await sio.emit("error", {"message": "user_id does not match your token"}, to=sid)
         return
 
     await sio.enter_room(sid, room_id)
     print(f"[join_room] Socket {sid} entered room {room_id}")
-    await redis_client.add_user_to_room(room_id, str(user_id), sid)
+    await manager.presence.join(room_id, user_id, sid, username, display_name)
 
     # Update connection data with full user info
-    user_data = manager.get_user_data(sid) or {}
     user_data.update({
         "room_id": room_id,
-        "user_id": user_id,
         "username": username,
         "display_name": display_name,
     })
@@ -164,7 +340,7 @@ async def join_room(sid, data):
     )
 
     # Build full player list with user details (deduplicated by user_id)
-    all_players = manager.get_room_players(room_id)
+    all_players = await manager.get_room_players(room_id)
 
     print(f"Room {room_id} players: {all_players}")
     await sio.emit("room_users", {"players": all_players}, to=sid)
@@ -173,18 +349,19 @@ async def join_room(sid, data):
 @sio.event
 async def leave_room(sid, data):
     room_id = data.get("room_id")
-    user_id = data.get("user_id")
-    username = data.get("username")
+    user_data = manager.get_user_data(sid) or {}
+    user_id = user_data.get("user_id")
+    username = user_data.get("username")
 
-    if not room_id:
+    if not room_id or not user_id:
         return
 
-    # Handle host transfer before removing user
-    if user_id:
-        await _handle_host_transfer(room_id, user_id)
-
     await sio.leave_room(sid, room_id)
-    await redis_client.remove_user_from_room(room_id, str(user_id))
+    if not await manager.presence.leave(room_id, user_id, sid):
+        return
+
+    if user_id:
+        await jobs.submit(f"room:{room_id}", _handle_host_transfer, room_id, user_id)
 
     await sio.emit(
         "user_left",
@@ -202,18 +379,53 @@ async def chat_message(sid, data):
     if not room_id or not message or not user_data:
         return
 
-    await sio.emit(
-        "chat_message",
-        {
-            "user_id": user_data.get("user_id"),
-            "username": user_data.get("username"),
-            "display_name": user_data.get("display_name"),
-            "message": message,
-        },
-        room=room_id,
+    if not chat_limiter.allow(str(user_data.get("user_id") or sid)):
+        await sio.emit("error", {"message": "Too many messages, slow down"}, to=sid)
+        return
+
+    chat_data = {
+        "user_id": user_data.get("user_id"),
+        "username": user_data.get("username"),
+        "display_name": user_data.get("display_name"),
+        "message": message,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+    if chat_coalescer:
+        chat_coalescer.add(room_id, chat_data)
+        return
+
+    await asyncio.gather(
+        sio.emit("chat_message", chat_data, room=room_id),
+        record_chat_messages(room_id, [chat_data]),
     )
 
 
+@sio.event
+async def get_chat_history(sid, data):
+    """
+    Get a page of chat history for the room.
+    Expected data: { room_id, before?: cursor, limit?: int }
+    """
+    room_id = data.get("room_id")
+    user_data = manager.get_user_data(sid)
+
+    if not room_id or not user_data or user_data.get("room_id") != room_id:
+        await sio.emit("error", {"message": "Invalid request"}, to=sid)
+        return
+
+    try:
+        history = await fetch_chat_history(
+            room_id,
+            before=data.get("before"),
+            limit=data.get("limit", 50),
+        )
+    except ValueError as e:
+        await sio.emit("error", {"message": str(e)}, to=sid)
+        return
+    await sio.emit("chat_history", history, to=sid)
+
+
 @sio.event
 async def game_action(sid, data):
     room_id = data.get("room_id")
@@ -240,7 +452,7 @@ async def game_action(sid, data):
 @sio.event
 async def ready_toggle(sid, data):
     room_id = data.get("room_id")
-    user_id = data.get("user_id")
+    user_id = (manager.get_user_data(sid) or {}).get("user_id")
     is_ready = data.get("is_ready", False)
 
     if not room_id or not user_id:
@@ -271,8 +483,9 @@ async def start_game(sid, data):
         await sio.emit("error", {"message": "Missing room_id"}, to=sid)
         return
 
-    if game_type != "avalon":
-        # For non-Avalon games, just broadcast game_started
+    engine = get_engine(game_type)
+    if engine is None:
+        # For games without a server-side engine, just broadcast game_started
         await sio.emit(
             "game_started",
             {"room_id": room_id, "game_type": game_type},
@@ -281,23 +494,23 @@ async def start_game(sid, data):
         return
 
     # Get all players in the room
-    players = manager.get_room_players(room_id)
-
-    if len(players) < 5:
-        await sio.emit("error", {"message": "아발론은 최소 5명이 필요합니다"}, to=sid)
-        return
+    players = await manager.get_room_players(room_id)
 
-    if len(players) > 10:
-        await sio.emit("error", {"message": "아발론은 최대 10명까지 가능합니다"}, to=sid)
+    error = engine.player_count_error(len(players))
+    if error:
+        await sio.emit("error", {"message": error}, to=sid)
         return
 
     try:
         # Create and initialize the game
-        game = create_game(game_id, room_id, players)
+        game = engine.create_game(game_id, room_id, players)
         game_state = game.state.to_dict()
 
         # Save game state to Redis for reconnection support
-        await save_game(game)
+        await engine.save_game(game)
+        if not cluster.owns(game_id):
+            # The owning worker loads it from Redis when the first action arrives
+            await engine.release_games(cluster.owns)
 
         # Broadcast game started to all players
         await sio.emit(
@@ -312,33 +525,28 @@ async def start_game(sid, data):
         )
 
         # Send individual role information and game state to each player
-        for socket_id, conn_data in manager.active_connections.items():
-            if isinstance(conn_data, dict) and conn_data.get("room_id") == room_id:
-                user_id = conn_data.get("user_id")
-                if user_id:
-                    player_view = game.get_player_view(user_id)
-                    # Send role assignment
-                    await sio.emit(
-                        "role_assigned",
-                        {
-                            "game_id": game_id,
-                            "role": player_view.get("my_role"),
-                            "team": player_view.get("my_team"),
-                            "known_info": player_view.get("known_info", []),
-                        },
-                        to=socket_id,
-                    )
-                    # Send full game state with can_act and available_actions
-                    await sio.emit(
-                        "game_state_update",
-                        {
-                            "game_id": game_id,
-                            "state": player_view,
-                        },
-                        to=socket_id,
-                    )
-
-        print(f"Avalon game {game_id} started in room {room_id} with {len(players)} players")
+        deliveries = []
+        for socket_id, user_id in await manager.get_room_sockets(room_id):
+            player_view = game.get_player_view_cached(user_id)
+            deliveries.append((socket_id, [
+                # Role assignment
+                ("role_assigned", {
+                    "game_id": game_id,
+                    "role": player_view.get("my_role"),
+                    "team": player_view.get("my_team"),
+                    "known_info": player_view.get("known_info", []),
+                }),
+                # Full game state with can_act and available_actions
+                ("game_state_update", {
+                    "game_id": game_id,
+                    "state": player_view,
+                }),
+            ]))
+        await _emit_to_each(deliveries, "start_game")
+
+        await _broadcast_spectator_state(game, room_id)
+
+        print(f"{engine.display_name} game {game_id} started in room {room_id} with {len(players)} players")
 
     except Exception as e:
         print(f"Error starting game: {e}")
@@ -346,10 +554,12 @@ async def start_game(sid, data):
 
 
 @sio.event
+@cluster.routed
+@actions.idempotent
 async def propose_team(sid, data):
     """
     Leader proposes a team for the mission.
-    Expected data: { game_id, team_members: [user_id, ...] }
+    Expected data: { game_id, team_members: [user_id, ...], action_id? }
     """
     print(f"[propose_team] Received: {data}")
 
@@ -361,16 +571,14 @@ async def propose_team(sid, data):
 
     if not game_id or not user_data:
         print(f"[propose_team] ERROR: Invalid request - game_id={game_id}, user_data={user_data}")
-        await sio.emit("error", {"message": "Invalid request"}, to=sid)
-        return
+        return await _reject(sid, "Invalid request")
 
-    game = get_game(game_id)
+    game = await _load_game(game_id)
     print(f"[propose_team] get_game result: {game}")
 
     if not game:
         print(f"[propose_team] ERROR: Game not found for game_id={game_id}")
-        await sio.emit("error", {"message": "Game not found"}, to=sid)
-        return
+        return await _reject(sid, "Game not found")
 
     user_id = user_data.get("user_id")
     room_id = user_data.get("room_id")
@@ -391,7 +599,10 @@ async def propose_team(sid, data):
         print(f"[propose_team] propose_team result: {result}")
 
         # Save game state to Redis
-        await save_game(game)
+        await _avalon().save_game(game)
+        if _stateless():
+            from app.services.avalon_ballot import open_ballot
+            await open_ballot(game)
 
         # Broadcast team proposal to all players
         broadcast_data = {
@@ -409,33 +620,37 @@ async def propose_team(sid, data):
 
         # Send updated player views
         await _broadcast_player_views(game, room_id)
+        return result
 
     except ValueError as e:
-        await sio.emit("error", {"message": str(e)}, to=sid)
+        return await _reject(sid, str(e))
 
 
 @sio.event
+@cluster.routed
+@actions.idempotent
 async def vote_team(sid, data):
     """
     Player votes to approve or reject the proposed team.
-    Expected data: { game_id, approve: bool }
+    Expected data: { game_id, approve: bool, action_id? }
     """
     game_id = data.get("game_id")
     approve = data.get("approve", False)
     user_data = manager.get_user_data(sid)
 
     if not game_id or not user_data:
-        await sio.emit("error", {"message": "Invalid request"}, to=sid)
-        return
-
-    game = get_game(game_id)
-    if not game:
-        await sio.emit("error", {"message": "Game not found"}, to=sid)
-        return
+        return await _reject(sid, "Invalid request")
 
     user_id = user_data.get("user_id")
     room_id = user_data.get("room_id")
 
+    if _stateless():
+        return await _cast_stateless_vote(sid, "team", game_id, user_id, room_id, approve)
+
+    game = await _load_game(game_id)
+    if not game:
+        return await _reject(sid, "Game not found")
+
     try:
         result = game.vote_team(user_id, approve)
 
@@ -450,59 +665,67 @@ async def vote_team(sid, data):
             },
             room=room_id,
         )
+        await _broadcast_spectator_state(game, room_id)
 
         if result.get("voting_complete"):
             # Save game state to Redis
-            await save_game(game)
+            await _avalon().save_game(game)
+            await _finish_team_vote(game, game_id, room_id, result)
+        return result
 
-            # Broadcast the final vote result with all votes revealed
-            await sio.emit(
-                "team_vote_result",
-                {
-                    "game_id": game_id,
-                    "team_approved": result["team_approved"],
-                    "approve_count": result["approve_count"],
-                    "reject_count": result["reject_count"],
-                    "votes": result["votes"],
-                    "vote_track": game.state.vote_track,
-                    "phase": result["phase"],
-                    "new_leader_id": result.get("new_leader_id"),
-                },
-                room=room_id,
-            )
+    except ValueError as e:
+        return await _reject(sid, str(e))
 
-            if result.get("game_over"):
-                await _broadcast_game_ended(game, room_id, result.get("reason"))
-            else:
-                # Send updated player views
-                await _broadcast_player_views(game, room_id)
 
-    except ValueError as e:
-        await sio.emit("error", {"message": str(e)}, to=sid)
+async def _finish_team_vote(game: "AvalonGame", game_id: int, room_id: str, result: dict):
+    # Broadcast the final vote result with all votes revealed
+    await sio.emit(
+        "team_vote_result",
+        {
+            "game_id": game_id,
+            "team_approved": result["team_approved"],
+            "approve_count": result["approve_count"],
+            "reject_count": result["reject_count"],
+            "votes": result["votes"],
+            "vote_track": game.state.vote_track,
+            "phase": result["phase"],
+            "new_leader_id": result.get("new_leader_id"),
+        },
+        room=room_id,
+    )
+
+    if result.get("game_over"):
+        await _broadcast_game_ended(game, room_id, result.get("reason"))
+    else:
+        # Send updated player views
+        await _broadcast_player_views(game, room_id)
 
 
 @sio.event
+@cluster.routed
+@actions.idempotent
 async def vote_mission(sid, data):
     """
     Mission team member votes success or fail.
-    Expected data: { game_id, success: bool }
+    Expected data: { game_id, success: bool, action_id? }
     """
     game_id = data.get("game_id")
     success = data.get("success", True)
     user_data = manager.get_user_data(sid)
 
     if not game_id or not user_data:
-        await sio.emit("error", {"message": "Invalid request"}, to=sid)
-        return
-
-    game = get_game(game_id)
-    if not game:
-        await sio.emit("error", {"message": "Game not found"}, to=sid)
-        return
+        return await _reject(sid, "Invalid request")
 
     user_id = user_data.get("user_id")
     room_id = user_data.get("room_id")
 
+    if _stateless():
+        return await _cast_stateless_vote(sid, "mission", game_id, user_id, room_id, success)
+
+    game = await _load_game(game_id)
+    if not game:
+        return await _reject(sid, "Game not found")
+
     try:
         result = game.vote_mission(user_id, success)
         print(f"[vote_mission] Result: {result}")
@@ -518,62 +741,119 @@ async def vote_mission(sid, data):
                 },
                 room=room_id,
             )
+            await _broadcast_spectator_state(game, room_id)
         else:
             # Save game state to Redis
-            await save_game(game)
-
-            # Broadcast mission result
-            mission_result_data = {
-                "game_id": game_id,
-                "round": result["round"],
-                "result": result["mission_result"],
-                "fail_count": result["fail_count"],
-                "mission_votes_shuffled": result["mission_votes_shuffled"],
-                "success_total": result["success_total"],
-                "fail_total": result["fail_total"],
-                "phase": result["phase"],
-                "next_round": result.get("next_round"),
-                "new_leader_id": result.get("new_leader_id"),
-            }
-            print(f"[vote_mission] Broadcasting mission_result to room={room_id}: {mission_result_data}")
-            await sio.emit(
-                "mission_result",
-                mission_result_data,
-                room=room_id,
-            )
-
-            if result.get("game_over"):
-                await _broadcast_game_ended(game, room_id, result.get("reason"))
-            else:
-                # Send updated player views
-                await _broadcast_player_views(game, room_id)
+            await _avalon().save_game(game)
+            await _finish_mission_vote(game, game_id, room_id, result)
+        return result
 
     except ValueError as e:
         print(f"[vote_mission] ValueError: {e}")
-        await sio.emit("error", {"message": str(e)}, to=sid)
+        return await _reject(sid, str(e))
     except Exception as e:
         print(f"[vote_mission] Unexpected error: {type(e).__name__}: {e}")
-        await sio.emit("error", {"message": f"Error: {str(e)}"}, to=sid)
+        return await _reject(sid, f"Error: {str(e)}")
+
+
+async def _finish_mission_vote(game: "AvalonGame", game_id: int, room_id: str, result: dict):
+    # Broadcast mission result
+    mission_result_data = {
+        "game_id": game_id,
+        "round": result["round"],
+        "result": result["mission_result"],
+        "fail_count": result["fail_count"],
+        "mission_votes_shuffled": result["mission_votes_shuffled"],
+        "success_total": result["success_total"],
+        "fail_total": result["fail_total"],
+        "phase": result["phase"],
+        "next_round": result.get("next_round"),
+        "new_leader_id": result.get("new_leader_id"),
+    }
+    print(f"[vote_mission] Broadcasting mission_result to room={room_id}: {mission_result_data}")
+    await sio.emit(
+        "mission_result",
+        mission_result_data,
+        room=room_id,
+    )
+
+    if result.get("game_over"):
+        await _broadcast_game_ended(game, room_id, result.get("reason"))
+    else:
+        # Send updated player views
+        await _broadcast_player_views(game, room_id)
+
+
+async def _cast_stateless_vote(sid: str, kind: str, game_id: int, user_id: int, room_id: str, vote: bool):
+    """
+    Stateless mode: the vote is checked and recorded in Redis in one round trip,
+    and whichever worker receives the last vote resolves the ballot.
+    """
+    from app.services.avalon_ballot import cast_vote, resolve_ballot
+
+    try:
+        ballot = await cast_vote(game_id, kind, user_id, vote)
+    except ValueError as e:
+        return await _reject(sid, str(e))
+
+    if kind == "team":
+        await sio.emit(
+            "team_vote_update",
+            {
+                "game_id": game_id,
+                "user_id": user_id,
+                "votes_count": ballot["votes_count"],
+                "total_players": ballot["needed"],
+            },
+            room=room_id,
+        )
+    elif ballot["votes"] is None:
+        await sio.emit(
+            "mission_vote_update",
+            {
+                "game_id": game_id,
+                "votes_count": ballot["votes_count"],
+                "team_size": ballot["needed"],
+            },
+            room=room_id,
+        )
+
+    if ballot["votes"] is None:
+        return {"success": True, "votes_count": ballot["votes_count"], "needed": ballot["needed"]}
+
+    try:
+        game, result = await resolve_ballot(game_id, kind, ballot["votes"])
+    except ValueError as e:
+        print(f"[stateless_vote] Could not resolve {kind} ballot for game {game_id}: {e}")
+        return await _reject(sid, str(e))
+    if not game:
+        return await _reject(sid, "Game not found")
+
+    if kind == "team":
+        await _finish_team_vote(game, game_id, room_id, result)
+    else:
+        await _finish_mission_vote(game, game_id, room_id, result)
+    return result
 
 
 @sio.event
+@cluster.routed
+@actions.idempotent
 async def assassinate(sid, data):
     """
     Assassin attempts to kill Merlin.
-    Expected data: { game_id, target_id: user_id }
+    Expected data: { game_id, target_id: user_id, action_id? }
     """
     game_id = data.get("game_id")
     target_id = data.get("target_id")
     user_data = manager.get_user_data(sid)
 
     if not game_id or not target_id or not user_data:
-        await sio.emit("error", {"message": "Invalid request"}, to=sid)
-        return
+        return await _reject(sid, "Invalid request")
 
-    game = get_game(game_id)
+    game = await _load_game(game_id)
     if not game:
-        await sio.emit("error", {"message": "Game not found"}, to=sid)
-        return
+        return await _reject(sid, "Game not found")
 
     user_id = user_data.get("user_id")
     room_id = user_data.get("room_id")
@@ -594,12 +874,14 @@ async def assassinate(sid, data):
         )
 
         await _broadcast_game_ended(game, room_id, result.get("reason"))
+        return result
 
     except ValueError as e:
-        await sio.emit("error", {"message": str(e)}, to=sid)
+        return await _reject(sid, str(e))
 
 
 @sio.event
+@cluster.routed
 async def get_game_state(sid, data):
     """
     Get current game state for a player (used for reconnection).
@@ -613,7 +895,7 @@ async def get_game_state(sid, data):
         return
 
     # Try to get game from memory or Redis
-    game = await get_game_async(game_id)
+    game = await _load_game(game_id)
     if not game:
         await sio.emit("error", {"message": "Game not found"}, to=sid)
         return
@@ -621,7 +903,7 @@ async def get_game_state(sid, data):
     user_id = user_data.get("user_id")
 
     try:
-        player_view = game.get_player_view(user_id)
+        player_view = game.get_player_view_cached(user_id)
         # Also send role info for reconnection
         await sio.emit(
             "role_assigned",
@@ -661,7 +943,7 @@ async def rejoin_game(sid, data):
     user_id = user_data.get("user_id")
 
     # Try to find active game for this room
-    game = await get_game_by_room(room_id)
+    game = await _load_game_by_room(room_id)
     if not game:
         await sio.emit("rejoin_result", {"success": False, "message": "No active game found"}, to=sid)
         return
@@ -673,7 +955,11 @@ async def rejoin_game(sid, data):
         return
 
     try:
-        player_view = game.get_player_view(user_id)
+        if _stateless():
+            # Votes on the open ballot aren't in the saved game until it completes
+            from app.services.avalon_ballot import with_pending_votes
+            game = await with_pending_votes(game)
+        player_view = game.get_player_view_cached(user_id)
 
         # Send rejoin success with game info
         await sio.emit(
@@ -715,50 +1001,151 @@ async def rejoin_game(sid, data):
         await sio.emit("rejoin_result", {"success": False, "message": str(e)}, to=sid)
 
 
-async def _broadcast_player_views(game: AvalonGame, room_id: str):
+@sio.event
+async def spectate_game(sid, data):
+    """
+    Watch an active game without taking a seat.
+    Expected data: { room_id }
+    """
+    room_id = data.get("room_id")
+    if not room_id:
+        await sio.emit("error", {"message": "Missing room_id"}, to=sid)
+        return
+
+    game = await _load_game_by_room(room_id)
+    if not game:
+        await sio.emit("error", {"message": "No active game found"}, to=sid)
+        return
+
+    # Roles only reach spectators with game_ended, but a player on a second
+    # tokenless socket must still not be able to watch their own game
+    user_id = (manager.get_user_data(sid) or {}).get("user_id")
+    if not user_id:
+        await sio.emit("error", {"message": "Authentication required"}, to=sid)
+        return
+    if any(p.user_id == user_id for p in game.state.players):
+        await sio.emit("error", {"message": "Players cannot spectate their own game"}, to=sid)
+        return
+
+    await sio.enter_room(sid, _spectator_room(room_id))
+    await sio.emit("spectator_state", _get_spectator_payload(game), to=sid)
+
+
+@sio.event
+async def stop_spectating(sid, data):
+    room_id = data.get("room_id")
+    if room_id:
+        await sio.leave_room(sid, _spectator_room(room_id))
+
+
+# Latest spectator payload per game, rebuilt only when the game version changes
+_spectator_payloads: dict[int, dict] = {}
+
+
+def _spectator_room(room_id: str) -> str:
+    return f"spectate:{room_id}"
+
+
+def _has_spectators(room_id: str) -> bool:
+    if cluster.enabled:
+        # Spectators may be connected to other workers
+        return True
+    return bool(sio.manager.rooms.get("/", {}).get(_spectator_room(room_id)))
+
+
+def _get_spectator_payload(game: "AvalonGame") -> dict:
+    payload = _spectator_payloads.get(game.state.game_id)
+    if payload is None or payload["version"] != game.state.version:
+        payload = {
+            "game_id": game.state.game_id,
+            "version": game.state.version,
+            "state": game.state.to_dict(),
+        }
+        _spectator_payloads[game.state.game_id] = payload
+    return payload
+
+
+async def _broadcast_spectator_state(game: "AvalonGame", room_id: str):
+    """Send the public game state once to the whole spectator room"""
+    if not _has_spectators(room_id):
+        return
+    await sio.emit("spectator_state", _get_spectator_payload(game), room=_spectator_room(room_id))
+
+
+async def _emit_to_each(deliveries: list[tuple[str, list[tuple[str, dict]]]], label: str) -> int:
+    """
+    Send each socket its own ordered list of (event, data), sockets in parallel.
+    Parallelism is bounded and a failing socket doesn't affect the others.
+    Returns the number of sockets that got everything.
+    """
+    semaphore = asyncio.Semaphore(settings.emit_concurrency)
+
+    async def send(socket_id: str, events: list[tuple[str, dict]]) -> bool:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                for event, data in events:
+                    await sio.emit(event, data, to=socket_id)
+                return True
+            except Exception as e:
+                metrics.inc(f"emit.{label}.errors")
+                print(f"[{label}] Error sending to {socket_id}: {e}")
+                return False
+            finally:
+                metrics.observe(f"emit.{label}.recipient", time.perf_counter() - started)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(send(socket_id, events) for socket_id, events in deliveries))
+    metrics.observe(f"emit.{label}.fanout", time.perf_counter() - started)
+    return sum(results)
+
+
+async def _broadcast_player_views(game: "AvalonGame", room_id: str):
     """Send updated game state to each player with their personal view"""
     print(f"[_broadcast_player_views] Broadcasting to room_id={room_id}")
-    sent_count = 0
-    for socket_id, conn_data in manager.active_connections.items():
-        if isinstance(conn_data, dict) and conn_data.get("room_id") == room_id:
-            user_id = conn_data.get("user_id")
-            if user_id:
-                try:
-                    player_view = game.get_player_view(user_id)
-                    print(f"[_broadcast_player_views] Sending to user_id={user_id}, phase={player_view.get('phase')}, round={player_view.get('current_round')}")
-                    await sio.emit(
-                        "game_state_update",
-                        {
-                            "game_id": game.state.game_id,
-                            "state": player_view,
-                        },
-                        to=socket_id,
-                    )
-                    sent_count += 1
-                except Exception as e:
-                    print(f"[_broadcast_player_views] Error sending player view to {user_id}: {e}")
+    deliveries = []
+    for socket_id, user_id in await manager.get_room_sockets(room_id):
+        try:
+            player_view = game.get_player_view_cached(user_id)
+        except Exception as e:
+            print(f"[_broadcast_player_views] Error building player view for {user_id}: {e}")
+            continue
+        deliveries.append((socket_id, [
+            ("game_state_update", {
+                "game_id": game.state.game_id,
+                "state": player_view,
+            }),
+        ]))
+    sent_count = await _emit_to_each(deliveries, "player_views")
     print(f"[_broadcast_player_views] Sent to {sent_count} players")
 
+    await _broadcast_spectator_state(game, room_id)
 
-async def _broadcast_game_ended(game: AvalonGame, room_id: str, reason: str):
+
+async def _broadcast_game_ended(game: "AvalonGame", room_id: str, reason: str):
     """Broadcast game end with all roles revealed"""
     try:
         game_result = game.get_game_result()
-        await sio.emit(
-            "game_ended",
-            {
-                "game_id": game.state.game_id,
-                "winner_team": game_result["winner_team"],
-                "reason": reason,
-                "players": game_result["players"],
-                "mission_results": game_result["mission_results"],
-                "assassination_target": game_result.get("assassination_target"),
-            },
-            room=room_id,
-        )
-
-        # Clean up the game from memory and Redis
-        await remove_game_async(game.state.game_id, room_id)
+        game_ended_data = {
+            "game_id": game.state.game_id,
+            "winner_team": game_result["winner_team"],
+            "reason": reason,
+            "players": game_result["players"],
+            "mission_results": game_result["mission_results"],
+            "assassination_target": game_result.get("assassination_target"),
+        }
+        await sio.emit("game_ended", game_ended_data, room=room_id)
+        if _has_spectators(room_id):
+            await sio.emit("game_ended", game_ended_data, room=_spectator_room(room_id))
+        _spectator_payloads.pop(game.state.game_id, None)
+
+        # Keep the result and action log for replays, then clean up memory and Redis.
+        # Same key, so they run in this order after the players have the result.
+        engine = _avalon()
+        game_id = game.state.game_id
+        await jobs.submit(f"game:{game_id}", engine.persist_result, game)
+        await jobs.submit(f"game:{game_id}", engine.archive_result, game)
+        await jobs.submit(f"game:{game_id}", engine.remove_game, game_id, room_id)
 
     except Exception as e:
         print(f"Error broadcasting game end: {e}")
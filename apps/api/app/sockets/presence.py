@@ -0,0 +1,171 @@
+"""
+Room presence shared by all workers.
+
+Rosters live in Redis (room:{id}:users), so every worker sees every player
+no matter which worker their socket is connected to. Each worker keeps a
+read-through cache of the rosters it has read; joins and leaves publish
+the room ID on a pub/sub channel and every worker drops its cached copy.
+
+Every socket is also listed under the worker it's connected to. Workers
+heartbeat into the worker registry (see GameCluster); once one has been
+silent for `cluster_worker_ttl_seconds`, a sweeper on another worker removes
+its sockets from their rooms in batches.
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+from typing import Awaitable, Callable, Optional
+
+from app.config import settings
+from app.core.metrics import metrics
+from app.core.worker import WORKER_ID
+from app.db.redis import PRESENCE_CHANNEL, redis_client
+from app.services.sweeper import touch_room
+
+
+class RoomPresence:
+    def __init__(self, ttl: float = 30.0, max_rooms: int = 10000):
+        # Bounds staleness if an invalidation is ever missed
+        self.ttl = ttl
+        self.max_rooms = max_rooms
+        self._cache: dict[str, tuple[float, list[dict]]] = {}
+        # Bumped on every invalidation so a read that raced one isn't cached
+        self._generations: dict[str, int] = defaultdict(int)
+        self._tasks: list[asyncio.Task] = []
+
+        # Called with (room_id, user_id) when a ghost sweep removes a user's last socket
+        self.on_user_left: Optional[Callable[[str, str], Awaitable[None]]] = None
+
+        metrics.register_gauge("presence.cached_rooms", lambda: len(self._cache))
+
+    async def join(self, room_id: str, user_id, sid: str, username: str, display_name: str):
+        await redis_client.write_or_defer(
+            f"presence:{room_id}:{sid}",
+            "add_user_to_room", room_id, str(user_id), sid, username, display_name, WORKER_ID,
+        )
+        self.invalidate(room_id)
+        touch_room(room_id)
+
+    async def leave(self, room_id: str, user_id, sid: str) -> bool:
+        """Remove one socket. Returns True if it was the user's last socket in the room."""
+        # The leave script counts the sockets left atomically, so concurrent
+        # leaves of one user's tabs can't both see another tab still there
+        ran, remaining = await redis_client.run_or_defer(
+            f"presence:{room_id}:{sid}",
+            "remove_user_from_room", room_id, str(user_id), sid, WORKER_ID,
+        )
+        if ran:
+            last_socket = remaining == 0
+        else:
+            # Redis is unavailable and the leave is queued: best guess from the cached roster
+            cached = self._cache.get(room_id)
+            entry = next((u for u in cached[1] if str(u["user_id"]) == str(user_id)), None) if cached else None
+            last_socket = entry is None or set(entry["sids"]) <= {sid}
+        self.invalidate(room_id)
+        touch_room(room_id)
+        return last_socket
+
+    async def get_roster(self, room_id: str) -> list[dict]:
+        """[{user_id, username, display_name, sids}] in join order"""
+        cached = self._cache.get(room_id)
+        if cached and time.monotonic() - cached[0] < self.ttl:
+            metrics.inc("presence.cache.hit")
+            return cached[1]
+
+        metrics.inc("presence.cache.miss")
+        generation = self._generations[room_id]
+        roster = await redis_client.get_room_roster(room_id)
+        if self._generations[room_id] == generation:
+            self._cache[room_id] = (time.monotonic(), roster)
+        return roster
+
+    def invalidate(self, room_id: str):
+        if len(self._generations) >= self.max_rooms and room_id not in self._generations:
+            self._cache.clear()
+            self._generations.clear()
+        self._generations[room_id] += 1
+        self._cache.pop(room_id, None)
+
+    def clear(self):
+        for room_id in list(self._cache):
+            self.invalidate(room_id)
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._listen()),
+            asyncio.create_task(self._sweep_loop()),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    async def _sweep_loop(self):
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"[presence] Ghost sweep failed: {e}")
+            await asyncio.sleep(settings.presence_sweep_seconds)
+
+    async def sweep(self, ttl: Optional[float] = None) -> int:
+        """Remove the sockets of workers silent for `ttl` seconds. Returns ghosts removed."""
+        ttl = settings.cluster_worker_ttl_seconds if ttl is None else ttl
+        removed = 0
+        for worker_id, last_seen in await redis_client.get_dead_workers(ttl):
+            if worker_id == WORKER_ID or not await redis_client.claim_worker_sweep(worker_id):
+                continue
+
+            started = time.perf_counter()
+            worker_removed = 0
+            while True:
+                ghosts = await redis_client.remove_ghost_sockets(
+                    worker_id, settings.presence_sweep_batch
+                )
+                if not ghosts:
+                    break
+                worker_removed += len(ghosts)
+                for room_id, user_id, remaining in ghosts:
+                    self.invalidate(room_id)
+                    if remaining == 0 and self.on_user_left:
+                        try:
+                            await self.on_user_left(room_id, user_id)
+                        except Exception as e:
+                            print(f"[presence] Failed to announce ghost {user_id} leaving {room_id}: {e}")
+            await redis_client.forget_worker(worker_id)
+
+            elapsed = time.perf_counter() - started
+            metrics.inc("presence.ghosts_removed", worker_removed)
+            metrics.observe("presence.sweep", elapsed)
+            # Workers that stopped cleanly are retired with a last heartbeat of 0
+            since = f"{time.time() - last_seen:.1f}s after its last heartbeat" if last_seen else "after it stopped"
+            print(
+                f"[presence] Removed {worker_removed} ghost sockets of worker {worker_id} "
+                f"in {elapsed * 1000:.0f} ms, {since}"
+            )
+            removed += worker_removed
+        return removed
+
+    async def _listen(self):
+        while True:
+            pubsub = redis_client.client.pubsub()
+            try:
+                await pubsub.subscribe(PRESENCE_CHANNEL)
+                # Anything cached before (re)subscribing may have missed invalidations
+                self.clear()
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message and message["type"] == "message":
+                        self.invalidate(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[presence] Invalidation listener failed, resubscribing: {e}")
+                self.clear()
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
@@ -0,0 +1,99 @@
+"""
+Archive analytics benchmark.
+
+Plays a pool of random Avalon games with the real game logic (5-10
+players), archives N copies of them, then times loading the archive into
+columns cold (parsing every segment), warm (from the per-segment cache),
+and computing every summary table. Runs offline, no Redis or Postgres needed.
+
+Usage (from apps/api, needs numpy):
+    python -m benchmarks.analytics [--games 200000] [--pool 2000] [--workers 4] [--dir /tmp/archive]
+"""
+
+import argparse
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.analytics import load_columns, summary_tables
+from app.services.archive import ArchiveWriter
+from app.services.avalon import AvalonGame, AvalonPhase, AvalonRole, AvalonTeam
+
+
+def _play(game_id: int) -> dict:
+    count = random.randint(5, 10)
+    game = AvalonGame(game_id, game_id)
+    game.initialize_game([
+        {"user_id": i, "username": f"user{i}", "display_name": f"user{i}"}
+        for i in range(1, count + 1)
+    ])
+    state = game.state
+    while state.phase not in (AvalonPhase.ASSASSINATION, AvalonPhase.GAME_OVER):
+        ids = [p.user_id for p in state.players]
+        game.propose_team(state.get_current_leader_id(), random.sample(ids, state.get_team_size_required()))
+        for user_id in ids:
+            game.vote_team(user_id, random.random() < 0.5 + 0.1 * state.vote_track)
+        if state.phase == AvalonPhase.MISSION:
+            for user_id in list(state.proposed_team):
+                player = game._get_player(user_id)
+                game.vote_mission(user_id, player.team == AvalonTeam.GOOD or random.random() < 0.4)
+
+    if state.phase == AvalonPhase.ASSASSINATION:
+        assassin = next(p for p in state.players if p.role == AvalonRole.ASSASSIN)
+        target = random.choice([p for p in state.players if p.team == AvalonTeam.GOOD])
+        game.assassinate(assassin.user_id, target.user_id)
+
+    return {
+        "game_id": game_id,
+        "game_type": "avalon",
+        "room_id": game_id,
+        "finished_at": time.time(),
+        "result": game.get_game_result(),
+        "action_log": state.action_log,
+    }
+
+
+def run(games: int, pool: int, workers: int, directory: Path):
+    records = [_play(game_id) for game_id in range(1, pool + 1)]
+    writer = ArchiveWriter(directory, 16 * 1024 * 1024)
+    started = time.perf_counter()
+    for game_id in range(1, games + 1):
+        writer.append(game_id, {**records[game_id % pool], "game_id": game_id})
+    writer.close()
+    print(f"archived {games} games in {time.perf_counter() - started:.1f}s")
+
+    for label in ("cold", "warm"):
+        started = time.perf_counter()
+        columns = load_columns(directory, workers=workers)
+        print(f"{label} load: {len(columns)} games in {time.perf_counter() - started:.2f}s")
+
+    started = time.perf_counter()
+    tables = summary_tables(columns)
+    print(f"metrics: {len(tables)} tables in {(time.perf_counter() - started) * 1000:.1f} ms")
+    fail_rate = next(
+        (row["fail_rate"] for row in tables["mission_fail_rates"] if row["players"] == 7 and row["round"] == 4),
+        None,
+    )
+    print(f"  mission 4 fail rate with 7 players: {fail_rate}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=200_000)
+    parser.add_argument("--pool", type=int, default=2000, help="Distinct games played, then repeated")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--dir", type=Path, default=None, help="Kept after the run if given")
+    args = parser.parse_args()
+
+    directory = args.dir or Path(tempfile.mkdtemp(prefix="analytics-bench-"))
+    try:
+        run(args.games, args.pool, args.workers, directory)
+    finally:
+        if args.dir is None:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Game archive write, lookup and scan benchmark.
+
+Archives N synthetic finished Avalon games (result plus a typical action
+log) into a fresh directory, then measures random lookups by game_id
+through the mmapped index and a full streaming scan of every segment.
+Runs offline, no Redis or Postgres needed.
+
+Usage (from apps/api):
+    python -m benchmarks.archive [--games 200000] [--lookups 10000] [--segment-mb 64] [--dir /tmp/archive]
+"""
+
+import argparse
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.archive import ArchiveReader, ArchiveWriter, list_segments
+
+
+def _record(game_id: int) -> dict:
+    players = [
+        {"user_id": game_id * 10 + i, "username": f"user{i}", "role": "loyal_servant", "team": "good"}
+        for i in range(7)
+    ]
+    action_log = []
+    at = 1_700_000_000.0 + game_id
+    for round_number in range(1, 6):
+        for action, payload in (
+            ("propose_team", {"team": [p["user_id"] for p in players[:3]]}),
+            *(("vote_team", {"approve": random.random() < 0.6}) for _ in players),
+            ("team_vote_result", {"approved": True, "round": round_number}),
+            ("mission_result", {"success": random.random() < 0.5, "fail_count": 0}),
+        ):
+            at += random.uniform(0.5, 20)
+            action_log.append({
+                "seq": len(action_log) + 1,
+                "action": action,
+                "user_id": random.choice(players)["user_id"],
+                "payload": payload,
+                "at": at,
+            })
+    return {
+        "game_id": game_id,
+        "game_type": "avalon",
+        "room_id": game_id,
+        "finished_at": at,
+        "result": {"winner_team": random.choice(["good", "evil"]), "players": players},
+        "action_log": action_log,
+    }
+
+
+def run(games: int, lookups: int, segment_mb: int, directory: Path):
+    writer = ArchiveWriter(directory, segment_mb * 1024 * 1024)
+    records = [_record(game_id) for game_id in range(1, 1001)]
+    started = time.perf_counter()
+    for game_id in range(1, games + 1):
+        record = records[game_id % len(records)]
+        writer.append(game_id, {**record, "game_id": game_id})
+    elapsed = time.perf_counter() - started
+    writer.close()
+
+    segments = list_segments(directory)
+    size = sum(f.stat().st_size for f in directory.glob("segment-*.jsonl.gz"))
+    index_size = (directory / "index.bin").stat().st_size
+    print(f"write: {games} games in {elapsed:.2f}s ({games / elapsed:.0f} games/s), "
+          f"{len(segments)} segments, {size / games:.0f} bytes/game, "
+          f"index {index_size / 1024 / 1024:.1f} MB")
+
+    reader = ArchiveReader(directory)
+    ids = [random.randint(1, games) for _ in range(lookups)]
+    latencies = []
+    for game_id in ids:
+        started = time.perf_counter()
+        record = reader.get(game_id)
+        latencies.append(time.perf_counter() - started)
+        assert record["game_id"] == game_id
+    latencies.sort()
+    print(f"lookup: {lookups} random games, "
+          f"p50 {latencies[len(latencies) // 2] * 1e6:.0f} us, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:.0f} us")
+
+    started = time.perf_counter()
+    scanned = sum(1 for _ in reader.iter_games())
+    elapsed = time.perf_counter() - started
+    print(f"scan: {scanned} games in {elapsed:.2f}s ({scanned / elapsed:.0f} games/s)")
+    reader.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=200_000)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    parser.add_argument("--segment-mb", type=int, default=64)
+    parser.add_argument("--dir", type=Path, default=None, help="Kept after the run if given")
+    args = parser.parse_args()
+
+    directory = args.dir or Path(tempfile.mkdtemp(prefix="archive-bench-"))
+    try:
+        run(args.games, args.lookups, args.segment_mb, directory)
+    finally:
+        if args.dir is None:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
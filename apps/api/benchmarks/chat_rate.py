@@ -0,0 +1,92 @@
+"""
+Chat packets per second with the token bucket and frame coalescing.
+
+Every member of a --players room sends --rate messages/s for --seconds
+through the real chat_message handler, in four setups: no limit, the chat
+token bucket (chat_rate_per_second / chat_burst), --coalesce-ms coalescing,
+and both. Packets are per-recipient deliveries (a room emit counts once per
+member). Emits are counted, not sent; chat history is written to Redis.
+
+Usage (from apps/api, with REDIS_URL pointing at a disposable Redis):
+    python -m benchmarks.chat_rate [--players 10] [--rate 10] [--seconds 3] \\
+        [--coalesce-ms 50]
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.config import settings
+from app.core.rate_limit import TokenBucketLimiter
+from app.db.redis import redis_client
+from app.sockets import manager as sockets
+from app.sockets.chat import ChatCoalescer
+
+
+async def _measure(room_id: str, players: int, rate: float, seconds: float, limit: bool, coalesce_ms: int) -> float:
+    packets = 0
+
+    async def count_emit(event, data=None, room=None, to=None, **kwargs):
+        nonlocal packets
+        packets += players if room else 1
+
+    sockets.sio.emit = count_emit
+    sockets.chat_limiter = (
+        TokenBucketLimiter(settings.chat_rate_per_second, settings.chat_burst)
+        if limit
+        else TokenBucketLimiter(float("inf"), 10**9)
+    )
+    sockets.chat_coalescer = ChatCoalescer(sockets._emit_chat_batch, coalesce_ms / 1000) if coalesce_ms else None
+
+    sids = []
+    for p in range(players):
+        sid = f"chat-{room_id}-{p}"
+        sockets.manager.active_connections[sid] = {
+            "user_id": p + 1, "username": f"u{p}", "display_name": f"u{p}", "room_id": room_id,
+        }
+        sids.append(sid)
+
+    async def member(sid: str):
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            await sockets.chat_message(sid, {"room_id": room_id, "message": "hi"})
+            await asyncio.sleep(1 / rate)
+
+    await asyncio.gather(*(member(sid) for sid in sids))
+    # Let the last coalescing window flush
+    await asyncio.sleep(coalesce_ms / 1000 + 0.1)
+    for sid in sids:
+        sockets.manager.active_connections.pop(sid, None)
+    return packets / seconds
+
+
+async def run(players: int, rate: float, seconds: float, coalesce_ms: int):
+    await redis_client.connect()
+    emit = sockets.sio.emit
+    print(f"{players}-player room, each sending {rate:g} msg/s for {seconds:g}s")
+    for label, limit, coalesce in (
+        ("no limit, no coalescing", False, 0),
+        ("token bucket", True, 0),
+        (f"{coalesce_ms} ms coalescing", False, coalesce_ms),
+        ("token bucket + coalescing", True, coalesce_ms),
+    ):
+        room_id = f"CHAT{limit:d}{coalesce}"
+        packets = await _measure(room_id, players, rate, seconds, limit, coalesce)
+        print(f"  {label:<27} {packets:6.0f} packets/s")
+        await redis_client.cleanup_rooms([room_id])
+    sockets.sio.emit = emit
+    await redis_client.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=10)
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--coalesce-ms", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.players, args.rate, args.seconds, args.coalesce_ms))
+
+
+if __name__ == "__main__":
+    main()
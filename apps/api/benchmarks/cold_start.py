@@ -0,0 +1,97 @@
+"""
+Worker cold-start benchmark: the parts of startup the schema mode changes.
+
+Each step runs in a fresh interpreter, so module imports are cold:
+- `import app.main`
+- importing alembic.script and finding the head revision (check mode)
+- with --database: the check-mode revision query, and create_all against a
+  schema that already exists (what every worker used to run at startup)
+
+Usage (from apps/api, with DATABASE_URL pointing at a migrated database for
+--database):
+    python -m benchmarks.cold_start [--runs 5] [--database]
+"""
+
+import argparse
+import subprocess
+import sys
+
+
+IMPORT_APP = """
+import time
+started = time.perf_counter()
+import app.main
+print(time.perf_counter() - started)
+"""
+
+HEAD_REVISION = """
+import time
+from app.db.migrate import get_head_revision
+started = time.perf_counter()
+import alembic.script
+imported = time.perf_counter()
+get_head_revision()
+print(imported - started, time.perf_counter() - imported)
+"""
+
+SCHEMA_STARTUP = """
+import asyncio, time
+import app.models
+from app.db.database import Base, engine
+from app.db.migrate import get_current_revision
+
+async def main():
+    async with engine.connect() as conn:
+        await conn.exec_driver_sql("SELECT 1")  # open the pool outside the timings
+    started = time.perf_counter()
+    await get_current_revision()
+    checked = time.perf_counter()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    print(checked - started, time.perf_counter() - checked)
+    await engine.dispose()
+
+asyncio.run(main())
+"""
+
+
+def _timings(code: str, runs: int) -> list[list[float]]:
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", code], check=True, capture_output=True, text=True
+        ).stdout
+        results.append([float(value) for value in output.strip().splitlines()[-1].split()])
+    return results
+
+
+def _report(label: str, values: list[float]):
+    values = sorted(values)
+    print(f"  {label:<28} median {values[len(values) // 2] * 1000:7.1f} ms, "
+          f"min {values[0] * 1000:7.1f} ms")
+
+
+def run(runs: int, database: bool):
+    print(f"{runs} runs, fresh interpreter each")
+    _report("import app.main", [r[0] for r in _timings(IMPORT_APP, runs)])
+
+    head = _timings(HEAD_REVISION, runs)
+    _report("import alembic.script", [r[0] for r in head])
+    _report("find head revision", [r[1] for r in head])
+
+    if database:
+        schema = _timings(SCHEMA_STARTUP, runs)
+        _report("check: revision query", [r[0] for r in schema])
+        _report("create_all (tables exist)", [r[1] for r in schema])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database", action="store_true", help="also time the schema queries")
+    args = parser.parse_args()
+    run(args.runs, args.database)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Resent game actions benchmark.
+
+Plays team votes of --games games through the real vote_team handler,
+sending each vote 1 + --resends times with the same action_id, as a client
+retrying on a flaky network would: one resend right away (while the first
+is still running), the rest after it finished. Reports error emits (should
+be 0), the dedupe hit rate and how long originals and resends take.
+Runs in-process against Redis, with emits recorded instead of sent.
+
+Usage (from apps/api, with REDIS_URL pointing at a disposable Redis):
+    python -m benchmarks.duplicate_actions [--games 100] [--players 7] [--resends 2]
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from collections import Counter
+
+from app.db.redis import redis_client
+from app.services import avalon
+from app.services.avalon import AvalonPhase
+from app.sockets import manager as sockets
+
+GAME_ID_BASE = 700_000
+
+emitted: Counter = Counter()
+
+
+async def _record_emit(event, data=None, to=None, room=None, **kwargs):
+    emitted[event] += 1
+
+
+async def _vote(sid: str, game_id: int, resends: int, originals: list[float], repeats: list[float]):
+    data = {"game_id": game_id, "approve": True, "action_id": uuid.uuid4().hex}
+
+    async def send(timings: list[float]):
+        started = time.perf_counter()
+        await sockets.vote_team(sid, dict(data))
+        timings.append(time.perf_counter() - started)
+
+    # The first resend races the original; the rest arrive after it completed
+    await asyncio.gather(send(originals), *([send(repeats)] if resends else []))
+    for _ in range(resends - 1):
+        await send(repeats)
+
+
+async def run(games: int, players: int, resends: int):
+    await redis_client.connect()
+    sockets.sio.emit = _record_emit
+
+    votes = []
+    for g in range(games):
+        game_id, room_id = GAME_ID_BASE + g, f"DUP{g}"
+        roster = [
+            {"user_id": game_id * 100 + p, "username": f"u{p}", "display_name": f"u{p}"}
+            for p in range(players)
+        ]
+        game = avalon.create_game(game_id, room_id, roster)
+        game.propose_team(game.state.get_current_leader_id(), [
+            p.user_id for p in game.state.players[:game.state.get_team_size_required()]
+        ])
+        await avalon.save_game(game)
+        for player in roster:
+            sid = f"dup-{player['user_id']}"
+            sockets.manager.active_connections[sid] = {"user_id": player["user_id"], "room_id": room_id}
+            votes.append((sid, game_id))
+
+    originals: list[float] = []
+    repeats: list[float] = []
+    started = time.perf_counter()
+    await asyncio.gather(*(_vote(sid, game_id, resends, originals, repeats) for sid, game_id in votes))
+    elapsed = time.perf_counter() - started
+
+    in_mission = sum(
+        1 for g in range(games) if avalon.get_game(GAME_ID_BASE + g).state.phase != AvalonPhase.TEAM_VOTE
+    )
+    originals.sort()
+    repeats.sort()
+    print(f"{len(originals)} votes sent {1 + resends}x each in {elapsed * 1000:.0f} ms; "
+          f"{in_mission}/{games} votes resolved, {emitted['error']} error emits, "
+          f"dedupe hit rate {sockets.actions.hit_rate():.2%}")
+    print(f"  original: p50 {originals[len(originals) // 2] * 1000:.2f} ms, "
+          f"p99 {originals[int(len(originals) * 0.99)] * 1000:.2f} ms")
+    if repeats:
+        print(f"  resend:   p50 {repeats[len(repeats) // 2] * 1000:.2f} ms, "
+              f"p99 {repeats[int(len(repeats) * 0.99)] * 1000:.2f} ms")
+
+    for g in range(games):
+        await avalon.remove_game_async(GAME_ID_BASE + g, f"DUP{g}")
+    await redis_client.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--players", type=int, default=7)
+    parser.add_argument("--resends", type=int, default=2)
+    args = parser.parse_args()
+    asyncio.run(run(args.games, args.players, args.resends))
+
+
+if __name__ == "__main__":
+    main()
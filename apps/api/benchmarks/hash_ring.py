@@ -0,0 +1,54 @@
+"""
+Game distribution across workers on the consistent hash ring.
+
+Shows how evenly games spread over N workers and what fraction of games
+change owner when one worker joins or leaves (ideally about 1/N).
+Runs offline, no Redis needed.
+
+Usage (from apps/api):
+    python -m benchmarks.hash_ring [--workers 8] [--games 100000] [--virtual-nodes 64]
+"""
+
+import argparse
+from collections import Counter
+
+from app.core.hash_ring import HashRing
+
+
+def _owners(ring: HashRing, games: int) -> list[str]:
+    return [ring.owner(game_id) for game_id in range(1, games + 1)]
+
+
+def run(workers: int, games: int, virtual_nodes: int):
+    nodes = [f"worker-{i}" for i in range(workers)]
+    ring = HashRing(nodes, virtual_nodes=virtual_nodes)
+    before = _owners(ring, games)
+
+    counts = Counter(before)
+    ideal = games / workers
+    print(f"{games} games on {workers} workers ({virtual_nodes} virtual nodes each)")
+    print(f"  per worker: min {min(counts.values())}, max {max(counts.values())}, "
+          f"ideal {ideal:.0f} (max/ideal {max(counts.values()) / ideal:.2f})")
+
+    for label, changed in (
+        ("join", nodes + [f"worker-{workers}"]),
+        ("leave", nodes[1:]),
+    ):
+        ring.set_nodes(changed)
+        moved = sum(1 for old, new in zip(before, _owners(ring, games)) if old != new)
+        print(f"  one worker {label}s: {moved / games:.1%} of games move "
+              f"(ideal {1 / len(changed if label == 'join' else nodes):.1%})")
+        ring.set_nodes(nodes)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--virtual-nodes", type=int, default=64)
+    args = parser.parse_args()
+    run(args.workers, args.games, args.virtual_nodes)
+
+
+if __name__ == "__main__":
+    main()
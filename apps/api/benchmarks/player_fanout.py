@@ -0,0 +1,83 @@
+"""
+Per-player state fan-out: sequential emits vs _emit_to_each.
+
+Starts an Avalon game for a --players room and sends --updates full
+player-view updates, once awaiting each socket's emit in turn (how
+_broadcast_player_views used to work) and once through the real
+_broadcast_player_views, which fans out with bounded parallelism. Emits are
+simulated: each takes --emit-ms, except one slow socket at --slow-ms.
+Reports the wall time per update. The roster is read from Redis.
+
+Usage (from apps/api, with REDIS_URL pointing at a disposable Redis):
+    python -m benchmarks.player_fanout [--players 10] [--updates 20] \\
+        [--emit-ms 2] [--slow-ms 30]
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.db.redis import redis_client
+from app.services.avalon import AvalonGame
+from app.sockets import manager as sockets
+
+ROOM_ID = "FANOUT"
+
+
+async def _sequential(game: AvalonGame):
+    for socket_id, user_id in await sockets.manager.get_room_sockets(ROOM_ID):
+        player_view = game.get_player_view_cached(user_id)
+        await sockets.sio.emit(
+            "game_state_update", {"game_id": game.state.game_id, "state": player_view}, to=socket_id
+        )
+
+
+async def _concurrent(game: AvalonGame):
+    await sockets._broadcast_player_views(game, ROOM_ID)
+
+
+async def run(players: int, updates: int, emit_ms: float, slow_ms: float):
+    await redis_client.connect()
+    roster = [{"user_id": i, "username": f"u{i}", "display_name": f"u{i}"} for i in range(1, players + 1)]
+    game = AvalonGame(1, ROOM_ID)
+    game.initialize_game(roster)
+    for player in roster:
+        await sockets.manager.presence.join(
+            ROOM_ID, player["user_id"], f"fanout-{player['user_id']}", player["username"], player["display_name"]
+        )
+    slow_sid = f"fanout-{players // 2}"
+
+    async def simulated_emit(event, data=None, room=None, to=None, **kwargs):
+        await asyncio.sleep((slow_ms if to == slow_sid else emit_ms) / 1000)
+
+    emit = sockets.sio.emit
+    sockets.sio.emit = simulated_emit
+    results = {}
+    for label, broadcast in (("sequential", _sequential), ("concurrent", _concurrent)):
+        await broadcast(game)  # warm up the view cache
+        started = time.perf_counter()
+        for _ in range(updates):
+            await broadcast(game)
+        results[label] = (time.perf_counter() - started) / updates
+    sockets.sio.emit = emit
+
+    print(f"{players}-player room, {emit_ms:g} ms per emit, one socket at {slow_ms:g} ms")
+    for label, elapsed in results.items():
+        print(f"  {label:<10} {elapsed * 1000:6.1f} ms per update")
+
+    await redis_client.cleanup_rooms([ROOM_ID])
+    await redis_client.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=10)
+    parser.add_argument("--updates", type=int, default=20)
+    parser.add_argument("--emit-ms", type=float, default=2)
+    parser.add_argument("--slow-ms", type=float, default=30)
+    args = parser.parse_args()
+    asyncio.run(run(args.players, args.updates, args.emit_ms, args.slow_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Redis outage drill for the circuit breaker and replay queue.
+
+Saves a game in a tight loop (like players voting) against a local Redis,
+pauses Redis with CLIENT PAUSE part way through, and reports save latency
+while it is paused, breaker state, and whether the latest state reached
+Redis after it resumed.
+
+Usage (from apps/api, with REDIS_URL pointing at a disposable Redis):
+    python -m benchmarks.redis_outage [--pause 5] [--duration 15] [--interval 0.05]
+"""
+
+import argparse
+import asyncio
+import time
+
+import redis.asyncio as redis
+
+from app.config import settings
+from app.core.metrics import metrics
+from app.db.redis import redis_client
+from app.services import avalon
+
+GAME_ID = 999_999
+ROOM_ID = "OUTAGE"
+
+
+async def run(pause: float, duration: float, interval: float):
+    await redis_client.connect()
+    admin = redis.from_url(settings.redis_url)
+
+    players = [
+        {"user_id": i, "username": f"user{i}", "display_name": f"user{i}"}
+        for i in range(1, 6)
+    ]
+    game = avalon.create_game(GAME_ID, ROOM_ID, players)
+
+    paused_at = duration / 3
+    latencies: dict[str, list[float]] = {"before": [], "paused": [], "after": []}
+    states: list[str] = []
+    started = time.perf_counter()
+    pause_sent = False
+
+    while (elapsed := time.perf_counter() - started) < duration:
+        if not pause_sent and elapsed >= paused_at:
+            await admin.execute_command("CLIENT", "PAUSE", int(pause * 1000), "ALL")
+            pause_sent = True
+
+        phase = "before" if elapsed < paused_at else "paused" if elapsed < paused_at + pause else "after"
+        game.state.version += 1
+        save_started = time.perf_counter()
+        await avalon.save_game(game)
+        latencies[phase].append(time.perf_counter() - save_started)
+
+        state = redis_client.breaker.state
+        if not states or states[-1] != state:
+            states.append(state)
+        await asyncio.sleep(interval)
+
+    # Give the replay loop time to drain
+    for _ in range(50):
+        if not metrics.snapshot()["gauges"]["redis.replay_queue.size"]:
+            break
+        await asyncio.sleep(0.1)
+
+    saved = await redis_client.get_game_state(GAME_ID)
+    for phase, values in latencies.items():
+        if values:
+            values.sort()
+            print(f"{phase:>6}: {len(values)} saves, p50 {values[len(values) // 2] * 1000:.1f} ms, "
+                  f"max {values[-1] * 1000:.1f} ms")
+    print(f"breaker states: {' -> '.join(states)}")
+    print(f"redis version {saved['version'] if saved else None}, in-memory {game.state.version}")
+    print({k: v for k, v in metrics.snapshot()["counters"].items() if k.startswith("redis.")})
+
+    await avalon.remove_game_async(GAME_ID, ROOM_ID)
+    await admin.close()
+    await redis_client.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pause", type=float, default=5.0)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--interval", type=float, default=0.05)
+    args = parser.parse_args()
+    asyncio.run(run(args.pause, args.duration, args.interval))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Mass rejoin load harness.
+
+Simulates the reconnect storm after a deploy: --games active games of
+--players players are saved to Redis, the worker's memory is cleared (a
+fresh process), then every player calls rejoin_game at once. Runs the real
+socket handler in-process against Redis, with emits recorded instead of
+sent, and checks per-rejoin latency against --target-ms. A second wave
+shows the warm (cached) path.
+
+Usage (from apps/api, with REDIS_URL pointing at a disposable Redis):
+    python -m benchmarks.rejoin_load [--games 100] [--players 10] [--target-ms 250]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from app.db.redis import redis_client
+from app.services import avalon
+from app.sockets import manager as sockets
+
+GAME_ID_BASE = 800_000
+
+
+async def _record_emit(event, data=None, to=None, room=None, **kwargs):
+    if event == "rejoin_result" and not data.get("success"):
+        raise RuntimeError(f"rejoin failed for {to}: {data}")
+
+
+async def _wave(clients: list[tuple[str, str]]) -> list[float]:
+    latencies: list[float] = []
+
+    async def rejoin(sid: str, room_id: str):
+        started = time.perf_counter()
+        await sockets.rejoin_game(sid, {"room_id": room_id})
+        latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(rejoin(sid, room_id) for sid, room_id in clients))
+    return sorted(latencies)
+
+
+async def run(games: int, players: int, target_ms: float) -> bool:
+    await redis_client.connect()
+    sockets.sio.emit = _record_emit
+
+    clients = []
+    for g in range(games):
+        game_id, room_id = GAME_ID_BASE + g, f"LOAD{g}"
+        roster = [
+            {"user_id": game_id * 100 + p, "username": f"u{p}", "display_name": f"u{p}"}
+            for p in range(players)
+        ]
+        await avalon.save_game(avalon.create_game(game_id, room_id, roster))
+        for player in roster:
+            sid = f"load-{player['user_id']}"
+            sockets.manager.active_connections[sid] = {"user_id": player["user_id"], "room_id": room_id}
+            clients.append((sid, room_id))
+
+    # A freshly deployed worker has nothing in memory
+    for game_id in list(avalon._active_games):
+        avalon.remove_game(game_id)
+
+    passed = True
+    for label in ("cold", "warm"):
+        started = time.perf_counter()
+        latencies = await _wave(clients)
+        elapsed = time.perf_counter() - started
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        ok = p99 <= target_ms
+        passed = passed and ok
+        print(f"{label}: {len(latencies)} rejoins in {elapsed * 1000:.0f} ms, "
+              f"p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, p99 {p99:.1f} ms, "
+              f"max {latencies[-1] * 1000:.1f} ms -> {'OK' if ok else 'OVER'} target {target_ms:.0f} ms")
+
+    for g in range(games):
+        await avalon.remove_game_async(GAME_ID_BASE + g, f"LOAD{g}")
+    await redis_client.disconnect()
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--players", type=int, default=10)
+    parser.add_argument("--target-ms", type=float, default=250)
+    args = parser.parse_args()
+    if not asyncio.run(run(args.games, args.players, args.target_ms)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
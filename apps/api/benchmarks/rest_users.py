@@ -0,0 +1,61 @@
+"""
+GET /users/{id} throughput benchmark.
+
+Run against a live API (with Postgres), e.g. once with
+DB_STATEMENT_CACHE_SIZE=0 and once with the default to compare:
+
+Usage (from apps/api):
+    python -m benchmarks.rest_users --url http://localhost:8000 --user-id 1 \\
+        [--requests 5000] [--concurrency 50]
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+
+async def _worker(client: httpx.AsyncClient, path: str, count: int, latencies: list[float]):
+    for _ in range(count):
+        started = time.perf_counter()
+        response = await client.get(path)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+
+
+async def run(url: str, user_id: int, requests: int, concurrency: int):
+    path = f"/api/v1/users/{user_id}"
+    latencies: list[float] = []
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits) as client:
+        await client.get(path)  # warm up
+        started = time.perf_counter()
+        per_worker = requests // concurrency
+        await asyncio.gather(*(
+            _worker(client, path, per_worker, latencies) for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+        metrics = (await client.get("/metrics")).json()
+
+    latencies.sort()
+    print(f"{len(latencies)} requests, concurrency={concurrency}")
+    print(f"  {len(latencies) / elapsed:.0f} req/s")
+    print(f"  p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
+    print(f"  pool checkout wait: {metrics['timings'].get('db.pool.checkout_wait')}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.user_id, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Room code allocation throughput at high code-space occupancy.
+
+Creates --rooms room codes with --occupancy of the 16^6 code space already
+held by live rooms, two ways:
+
+- loop: draw a random code and query Room.code until one is free (how
+  create_room used to work), one DB round trip per attempt
+- pool: allocate_room_code, which pops a code from the Redis free pool and
+  refills it in batches (one DB query per batch) when it runs dry
+
+The database is simulated: a code is taken with probability --occupancy
+(deterministically per code), each query costs --db-ms. Redis is real.
+Reports codes/s and DB queries per code.
+
+Usage (from apps/api, with REDIS_URL pointing at a disposable Redis):
+    python -m benchmarks.room_codes [--rooms 2000] [--db-ms 0.5] \\
+        [--occupancy 0.5 0.9 0.98]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import select
+
+from app.core.security import generate_room_code
+from app.db.redis import ROOM_CODES_FREE_KEY, ROOM_CODES_USED_KEY, redis_client
+from app.models.room import Room
+from app.services import room_codes
+
+
+class _Result:
+    def __init__(self, rows: list[str]):
+        self._rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self) -> list[str]:
+        return self._rows
+
+    def scalar_one_or_none(self):
+        return self._rows[0] if self._rows else None
+
+
+class _SimulatedDB:
+    """Answers Room.code lookups (one code, or IN (...)) against a simulated occupancy"""
+
+    def __init__(self, occupancy: float, db_ms: float):
+        self.occupancy = occupancy
+        self.db_ms = db_ms
+        self.created: set[str] = set()
+        self.queries = 0
+
+    def is_taken(self, code: str) -> bool:
+        if code in self.created:
+            return True
+        return random.Random(int(code, 16)).random() < self.occupancy
+
+    async def execute(self, statement):
+        self.queries += 1
+        await asyncio.sleep(self.db_ms / 1000)
+        codes = []
+        for value in statement.compile().params.values():
+            codes.extend(value if isinstance(value, (list, tuple, set)) else [value])
+        return _Result([code for code in codes if isinstance(code, str) and self.is_taken(code)])
+
+
+async def _loop(db: _SimulatedDB, rooms: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rooms):
+        while True:
+            code = generate_room_code()
+            result = await db.execute(select(Room).where(Room.code == code))
+            if not result.scalar_one_or_none():
+                break
+        db.created.add(code)
+    return time.perf_counter() - started
+
+
+async def _pool(db: _SimulatedDB, rooms: int) -> float:
+    await redis_client.client.delete(ROOM_CODES_FREE_KEY, ROOM_CODES_USED_KEY)
+    started = time.perf_counter()
+    for _ in range(rooms):
+        db.created.add(await room_codes.allocate_room_code(db))
+    return time.perf_counter() - started
+
+
+async def run(rooms: int, db_ms: float, occupancies: list[float]):
+    await redis_client.connect()
+    # The background refill opens a real session; refill inline when the pool runs dry instead
+    room_codes._schedule_refill = lambda: None
+
+    print(f"{rooms} codes per run, {db_ms} ms per DB query")
+    for occupancy in occupancies:
+        line = f"  {occupancy:4.0%} occupancy:"
+        for label, allocate in (("loop", _loop), ("pool", _pool)):
+            db = _SimulatedDB(occupancy, db_ms)
+            elapsed = await allocate(db, rooms)
+            line += f"  {label} {rooms / elapsed:6.0f}/s ({db.queries / rooms:.3f} DB q/code)"
+        print(line)
+
+    await redis_client.client.delete(ROOM_CODES_FREE_KEY, ROOM_CODES_USED_KEY)
+    await redis_client.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=2000)
+    parser.add_argument("--db-ms", type=float, default=0.5)
+    parser.add_argument("--occupancy", type=float, nargs="+", default=[0.5, 0.9, 0.98])
+    args = parser.parse_args()
+    asyncio.run(run(args.rooms, args.db_ms, args.occupancy))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Inline vs background side effects in socket handlers.
+
+Every player of --rooms rooms calls leave_room at once (the end of a game
+night). Each leave runs a host transfer whose DB write is simulated with
+--db-ms of latency behind a pool of db_pool_size + db_max_overflow
+connections, like the real session pool.
+
+- inline: the handler waits for the host transfer (how handlers used to work)
+- queued: the handler submits it to the background job queue
+
+Reports handler latency, and for the queued mode how long the queue took to
+drain. Runs the real handler in-process against Redis, with emits dropped.
+
+Usage (from apps/api, with REDIS_URL pointing at a disposable Redis):
+    python -m benchmarks.side_effects [--rooms 200] [--players 8] [--db-ms 20]
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.config import settings
+from app.core.metrics import metrics
+from app.db.redis import redis_client
+from app.sockets import manager as sockets
+
+
+class _Inline:
+    async def submit(self, key, func, *args, label=None):
+        await func(*args)
+
+
+async def _drop_emit(*args, **kwargs):
+    pass
+
+
+async def _noop(*args, **kwargs):
+    pass
+
+
+async def _wave(mode: str, rooms: int, players: int, db_ms: float):
+    pool = asyncio.Semaphore(settings.db_pool_size + settings.db_max_overflow)
+
+    async def host_transfer(room_id: str, user_id: int):
+        async with pool:
+            await asyncio.sleep(db_ms / 1000)
+
+    sockets._handle_host_transfer = host_transfer
+    sockets.jobs = _Inline() if mode == "inline" else queue
+
+    clients = []
+    for r in range(rooms):
+        room_id = f"SIDE{mode}{r}"
+        for p in range(players):
+            sid, user_id = f"side-{mode}-{r}-{p}", r * 100 + p + 1
+            await sockets.manager.presence.join(room_id, user_id, sid, f"u{p}", f"u{p}")
+            sockets.manager.active_connections[sid] = {"user_id": user_id, "username": f"u{p}", "room_id": room_id}
+            clients.append((sid, room_id, user_id))
+
+    latencies: list[float] = []
+
+    async def leave(sid: str, room_id: str, user_id: int):
+        started = time.perf_counter()
+        await sockets.leave_room(sid, {"room_id": room_id})
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(leave(*client) for client in clients))
+    handled = time.perf_counter() - started
+    while queue.pending:
+        await asyncio.sleep(0.005)
+    drained = time.perf_counter() - started
+
+    latencies.sort()
+    line = (f"{mode:>6}: {len(latencies)} leaves, "
+            f"p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+            f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms, "
+            f"all handled in {handled * 1000:.0f} ms")
+    if mode == "queued":
+        line += f", side effects done in {drained * 1000:.0f} ms"
+    print(line)
+
+
+async def run(rooms: int, players: int, db_ms: float):
+    global queue
+    await redis_client.connect()
+    sockets.sio.emit = _drop_emit
+    sockets.sio.leave_room = _noop
+    queue = sockets.jobs
+
+    for mode in ("inline", "queued"):
+        await _wave(mode, rooms, players, db_ms)
+    wait = metrics.snapshot()["timings"].get("jobs.side_effects.wait", {})
+    print(f"queue wait: p50 {wait.get('p50_ms', 0):.1f} ms, p99 {wait.get('p99_ms', 0):.1f} ms")
+
+    await queue.drain(5)
+    await redis_client.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--db-ms", type=float, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.rooms, args.players, args.db_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+In-process vs stateless (Redis Lua) vote execution benchmark.
+
+Plays full Avalon games concurrently against a local Redis. Every round the
+leader proposes a team, then all votes are cast at once, like players on
+different sockets:
+
+- memory: votes go to the worker's AvalonGame; state is saved to Redis
+  when a vote completes (what a sticky worker does today)
+- redis: each vote is one Lua call on the game's ballot hash; the last
+  voter reloads the game from Redis and resolves it (any worker could)
+
+Usage (from apps/api, with REDIS_URL pointing at a disposable Redis):
+    python -m benchmarks.stateless_votes [--games 200] [--players 7]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from app.db.redis import redis_client
+from app.services import avalon
+from app.services.avalon import AvalonPhase, AvalonRole, AvalonTeam
+from app.services.avalon_ballot import cast_vote, open_ballot, resolve_ballot
+
+GAME_ID_BASE = 900_000
+
+
+def _vote_value(game: avalon.AvalonGame, user_id: int) -> bool:
+    if game.state.phase == AvalonPhase.TEAM_VOTE:
+        return random.random() < 0.6
+    player = game._get_player(user_id)
+    return player.team == AvalonTeam.GOOD or random.random() < 0.5
+
+
+async def _memory_vote(game: avalon.AvalonGame, user_id: int, vote: bool):
+    if game.state.phase == AvalonPhase.TEAM_VOTE:
+        result = game.vote_team(user_id, vote)
+        if result.get("voting_complete"):
+            await avalon.save_game(game)
+    else:
+        result = game.vote_mission(user_id, vote)
+        if result.get("mission_complete"):
+            await avalon.save_game(game)
+
+
+async def _redis_vote(game_id: int, kind: str, user_id: int, vote: bool):
+    ballot = await cast_vote(game_id, kind, user_id, vote)
+    if ballot["votes"] is not None:
+        await resolve_ballot(game_id, kind, ballot["votes"])
+
+
+async def _play(mode: str, game_id: int, players: int, latencies: list[float]):
+    game = avalon.create_game(game_id, f"BENCH{game_id}", [
+        {"user_id": i, "username": f"user{i}", "display_name": f"user{i}"}
+        for i in range(1, players + 1)
+    ])
+    await avalon.save_game(game)
+
+    while game.state.phase not in (AvalonPhase.ASSASSINATION, AvalonPhase.GAME_OVER):
+        if game.state.phase == AvalonPhase.TEAM_SELECTION:
+            ids = [p.user_id for p in game.state.players]
+            game.propose_team(
+                game.state.get_current_leader_id(),
+                random.sample(ids, game.state.get_team_size_required()),
+            )
+            await avalon.save_game(game)
+            if mode == "redis":
+                await open_ballot(game)
+
+        if game.state.phase == AvalonPhase.TEAM_VOTE:
+            kind, voters = "team", [p.user_id for p in game.state.players]
+        else:
+            kind, voters = "mission", list(game.state.proposed_team)
+        votes = [(user_id, _vote_value(game, user_id)) for user_id in voters]
+
+        async def timed(user_id: int, vote: bool):
+            started = time.perf_counter()
+            if mode == "memory":
+                await _memory_vote(game, user_id, vote)
+            else:
+                await _redis_vote(game_id, kind, user_id, vote)
+            latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(timed(user_id, vote) for user_id, vote in votes))
+        if mode == "redis":
+            game = await avalon.reload_game(game_id)
+
+    if game.state.phase == AvalonPhase.ASSASSINATION:
+        assassin = next(p for p in game.state.players if p.role == AvalonRole.ASSASSIN)
+        target = next(p for p in game.state.players if p.team == AvalonTeam.GOOD)
+        game.assassinate(assassin.user_id, target.user_id)
+    await avalon.remove_game_async(game_id)
+
+
+async def run(games: int, players: int):
+    await redis_client.connect()
+    for mode in ("memory", "redis"):
+        latencies: list[float] = []
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            _play(mode, GAME_ID_BASE + i, players, latencies) for i in range(games)
+        ))
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        print(f"{mode:>6}: {games} games, {len(latencies)} votes in {elapsed:.2f}s "
+              f"({len(latencies) / elapsed:.0f} votes/s), "
+              f"p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms")
+    await redis_client.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--players", type=int, default=7)
+    args = parser.parse_args()
+    asyncio.run(run(args.games, args.players))
+
+
+if __name__ == "__main__":
+    main()
@@ -267,6 +267,11 @@ export const useSocketStore = create<SocketState>((set) => ({
       // Handle chat messages
     })
 
+    socket.on('chat_messages', (data) => {
+      console.log('Chat messages:', data)
+      // Handle batched chat messages (same shape as chat_message, per item)
+    })
+
     socket.on('game_action', (data) => {
       console.log('Game action:', data)
       // Handle game actions
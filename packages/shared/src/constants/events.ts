@@ -15,6 +15,7 @@ export const SOCKET_EVENTS = {
 
   // Chat events
   CHAT_MESSAGE: 'chat_message',
+  CHAT_MESSAGES: 'chat_messages',
 
   // Ready state
   READY_TOGGLE: 'ready_toggle',
@@ -25,6 +26,11 @@ export const SOCKET_EVENTS = {
   GAME_STARTED: 'game_started',
   GAME_ACTION: 'game_action',
   GAME_STATE_UPDATE: 'game_state_update',
+
+  // Spectator events
+  SPECTATE_GAME: 'spectate_game',
+  STOP_SPECTATING: 'stop_spectating',
+  SPECTATOR_STATE: 'spectator_state',
 } as const
 
 // Avalon specific actions
@@ -16,10 +16,12 @@ export interface ServerToClientEvents {
   user_left: (data: UserLeftEvent) => void
   room_users: (data: RoomUsersEvent) => void
   chat_message: (data: ChatMessageReceivedEvent) => void
+  chat_messages: (data: ChatMessagesReceivedEvent) => void
   player_ready: (data: PlayerReadyEvent) => void
   game_started: (data: GameStartedEvent) => void
   game_action: (data: GameActionReceivedEvent) => void
   game_state_update: (data: GameStateUpdateEvent) => void
+  spectator_state: (data: SpectatorStateEvent) => void
 }
 
 // Event payloads
@@ -90,6 +92,12 @@ export interface ChatMessageReceivedEvent {
   timestamp?: string
 }
 
+// Coalesced chat frame (sent when the server batches chat per room)
+export interface ChatMessagesReceivedEvent {
+  room_id: string
+  messages: ChatMessageReceivedEvent[]
+}
+
 export interface PlayerReadyEvent {
   user_id: number
   is_ready: boolean
@@ -110,3 +118,9 @@ export interface GameStateUpdateEvent {
   game_id: number
   state: Record<string, unknown>
 }
+
+export interface SpectatorStateEvent {
+  game_id: number
+  version: number
+  state: Record<string, unknown>
+}